@@ -0,0 +1,50 @@
+"""
+SGA em um único processo: Portal do Aluno, Portal do Docente e Painel
+Administrativo como páginas de um app multipágina.
+
+Um só interpretador importa streamlit/pandas/sqlalchemy uma vez e todas as
+páginas dividem o mesmo pool de conexões, o cache de consultas e o índice de
+ocupação.
+
+Rotas: /aluno (padrão), /docente e /admin. O painel só aparece no menu para
+quem está logado; quem não está chega nele pelo endereço /admin (tela de login).
+
+Uso:
+    streamlit run app.py
+"""
+import os
+import sys
+
+import streamlit as st
+
+# Permite importar 'database' e 'apps' a partir da raiz do projeto
+root_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(root_dir)
+
+from database import autenticacao
+
+st.set_page_config(page_title="SGA Anhanguera", page_icon="🏫")
+
+# Perfil da sessão: administrador logado (estado da sessão ou token assinado no cookie)
+admin_logado = bool(st.session_state.get('logado')) or autenticacao.restaurar_sessao() is not None
+
+pagina_aluno = st.Page(
+    os.path.join(root_dir, "apps", "portal_aluno.py"), title="Portal do Aluno", icon="🎓",
+    url_path="aluno", default=not admin_logado,
+)
+pagina_docente = st.Page(
+    os.path.join(root_dir, "apps", "portal_docente.py"), title="Portal do Docente", icon="👨‍🏫",
+    url_path="docente",
+)
+pagina_admin = st.Page(
+    os.path.join(root_dir, "apps", "admin.py"), title="Painel Administrativo", icon="🔒",
+    url_path="admin", default=admin_logado, visibility="visible" if admin_logado else "hidden",
+)
+
+navegacao = st.navigation({
+    "Portais": [pagina_aluno, pagina_docente],
+    "Administração": [pagina_admin],
+})
+if navegacao is not pagina_admin:
+    autenticacao.sincronizar_cookie()  # O painel sincroniza sozinho (também roda fora do app.py)
+navegacao.run()
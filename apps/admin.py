@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
+import altair as alt
 import sys
 import os
+import io
 import time
+import datetime
 from streamlit_calendar import calendar
 
 # --- CONFIGURAÇÃO DE CAMINHOS ---
@@ -13,9 +16,22 @@ sys.path.append(root_dir)
 
 # Agora importamos do novo local renomeado, chamando de 'db' para manter compatibilidade
 from database import db_connection as db 
+from database import ocupacao
+from database import agendador
+from database import recomendacao
+from database import importacao
+from database import metricas
+from database import utilizacao
+from database import validacao
+from database import periodos
+from database import exportacao
+from database import instrumentacao
+from database import autenticacao
+from apps import comum
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
-st.set_page_config(page_title="SGA Anhanguera", layout="wide", page_icon="🔒")
+comum.configurar_pagina(page_title="SGA Anhanguera", layout="wide", page_icon="🔒")
+instrumentacao.iniciar_pagina("admin")
 
 st.title("🛡️ Painel Administrativo - Anhanguera")
 st.markdown("---")
@@ -26,6 +42,18 @@ if 'logado' not in st.session_state:
     st.session_state['logado'] = False
     st.session_state['usuario_nome'] = ''
 
+# Sessão assinada no cookie: sobrevive a F5 e a reinícios do servidor até o logout
+if not st.session_state['logado']:
+    sessao = autenticacao.restaurar_sessao()
+    if sessao:
+        st.session_state['logado'] = True
+        st.session_state['usuario_nome'] = sessao['nome']
+
+# Grava/apaga o cookie da sessão: esta página também roda sozinha (index.py --modo
+# separado ou streamlit run apps/admin.py), sem o app.py. Login e logout fazem
+# st.rerun(), então a execução seguinte já passa por aqui com o estado novo.
+autenticacao.sincronizar_cookie()
+
 def tela_login():
     st.markdown("<h1 style='text-align: center;'>🔒 Acesso Restrito - SGA</h1>", unsafe_allow_html=True)
     st.markdown("---")
@@ -39,15 +67,16 @@ def tela_login():
             btn_entrar = st.form_submit_button("Entrar", type="primary")
             
             if btn_entrar:
-                sucesso, nome = db.verificar_login(usuario, senha)
+                sucesso, nome, erro = autenticacao.autenticar(usuario, senha, ip=autenticacao.ip_do_cliente())
                 if sucesso:
                     st.session_state['logado'] = True
                     st.session_state['usuario_nome'] = nome
+                    autenticacao.iniciar_sessao(usuario, nome)
                     st.success("Login realizado! Redirecionando...")
                     time.sleep(1)
                     st.rerun() # Recarrega a página para entrar no sistema
                 else:
-                    st.error("Usuário ou senha incorretos.")
+                    st.error(erro)
 
 # SE NÃO ESTIVER LOGADO, MOSTRA LOGIN E PARA TUDO
 if not st.session_state['logado']:
@@ -59,13 +88,17 @@ with st.sidebar:
     st.write(f"👤 Olá, **{st.session_state['usuario_nome']}**")
     if st.button("Sair (Logout)"):
         st.session_state['logado'] = False
+        autenticacao.encerrar_sessao()
         st.rerun()
+    ativo = periodos.periodo_ativo()
+    st.caption(f"📅 Período letivo: **{ativo['descricao'] if ativo else 'nenhum ativo'}**")
     st.markdown("---")
 
 menu = st.sidebar.radio(
     "Gerenciamento",
-    ["Visão Geral", "Salas", "Docentes", "Cursos & Turmas", "Alocações (Grade)", "Nova Alocação", "Gerenciar Grade", "Calendário Visual"]
+    ["Visão Geral", "Salas", "Docentes", "Cursos & Turmas", "Alocações (Grade)", "Nova Alocação", "Agendamento Automático", "Gerenciar Grade", "Calendário Visual", "Utilização das Salas", "Auditoria da Grade", "Períodos Letivos", "Desempenho"]
 )
+instrumentacao.definir_pagina(f"admin/{menu}")
 
 # --- 1. VISÃO GERAL (DASHBOARD) ---
 if menu == "Visão Geral":
@@ -73,23 +106,52 @@ if menu == "Visão Geral":
     
     col1, col2, col3, col4 = st.columns(4)
     
-    # Buscando contagens reais do banco
-    # Tratamento de erro simples caso as tabelas estejam vazias
+    # Todas as métricas numa única consulta (com cache invalidado a cada escrita)
     try:
-        qtd_salas = db.run_query("SELECT COUNT(*) FROM tb_salas").iloc[0,0]
-        qtd_profs = db.run_query("SELECT COUNT(*) FROM tb_docentes").iloc[0,0]
-        qtd_turmas = db.run_query("SELECT COUNT(*) FROM tb_turmas").iloc[0,0]
-        qtd_aulas = db.run_query("SELECT COUNT(*) FROM tb_alocacoes").iloc[0,0]
-    except:
-        qtd_salas, qtd_profs, qtd_turmas, qtd_aulas = 0, 0, 0, 0
-    
-    col1.metric("Salas Cadastradas", qtd_salas)
-    col2.metric("Docentes Ativos", qtd_profs)
-    col3.metric("Turmas Registradas", qtd_turmas)
-    col4.metric("Aulas Alocadas", qtd_aulas)
+        m = metricas.get_metricas_dashboard()
+    except Exception as e:
+        st.error(f"Erro ao carregar métricas: {e}")
+        st.stop()
+    
+    col1.metric("Salas Cadastradas", m['qtd_salas'])
+    col2.metric("Docentes Ativos", m['qtd_docentes'])
+    col3.metric("Turmas Registradas", m['qtd_turmas'])
+    col4.metric("Aulas Alocadas", m['qtd_aulas'])
+    
+    st.markdown("---")
+    col_ocup, col_lot = st.columns(2)
+    
+    with col_ocup:
+        st.write("#### 📈 Ocupação por Turno")
+        st.caption("Minutos com aula na janela do turno ÷ (salas × dias da semana × minutos da janela)")
+        df_ocup = pd.DataFrame({"Ocupação (%)": m['ocupacao_por_turno']})
+        st.bar_chart(df_ocup)
+    
+    with col_lot:
+        st.write(f"#### 🔴 Aulas em Salas Lotadas: {m['qtd_lotadas']}")
+        if m['salas_lotadas']:
+            st.dataframe(pd.DataFrame(m['salas_lotadas']), use_container_width=True, hide_index=True)
+        else:
+            st.success("Nenhuma sala acima da capacidade.")
+    
+    st.write("#### 👨‍🏫 Carga Docente")
+    c_media, c_max = st.columns(2)
+    c_media.metric("Média de Aulas por Docente", m['media_aulas_docente'])
+    c_max.metric("Maior Carga", m['max_aulas_docente'])
+    if m['carga_docentes']:
+        st.dataframe(pd.DataFrame(m['carga_docentes']), use_container_width=True, hide_index=True)
     
     st.info("Bem-vindo, Administrador. Use o menu lateral para gerenciar o banco de dados.")
 
+    with st.expander("🔌 Pool de Conexões"):
+        stats = db.get_stats_pool()
+        p1, p2, p3, p4 = st.columns(4)
+        p1.metric("Em Uso", f"{stats['em_uso']} / {stats['tamanho_max']}")
+        p2.metric("Ociosas", stats['ociosas'])
+        p3.metric("Esperas (Fila)", stats['esperas'])
+        p4.metric("Checkout Médio", f"{stats['latencia_media_ms']} ms")
+        st.json(stats)
+
 # --- 2. GERENCIAR SALAS ---
 elif menu == "Salas":
     st.subheader("🏢 Gestão de Salas")
@@ -111,7 +173,7 @@ elif menu == "Salas":
                     st.error(f"Erro: {msg}")
 
     st.write("### Salas Existentes")
-    df_salas = db.run_query("SELECT * FROM tb_salas ORDER BY nome")
+    df_salas = db.run_query_cached("SELECT * FROM tb_salas ORDER BY nome")
     st.dataframe(df_salas, use_container_width=True)
 
 # --- 3. GERENCIAR DOCENTES ---
@@ -137,7 +199,7 @@ elif menu == "Docentes":
     
     with col_grid:
         st.write("#### Lista de Docentes")
-        df_profs = db.run_query("SELECT * FROM tb_docentes ORDER BY nome")
+        df_profs = db.run_query_cached("SELECT * FROM tb_docentes ORDER BY nome")
         st.dataframe(df_profs, use_container_width=True, height=500)
 
 # --- 4. CURSOS E TURMAS ---
@@ -146,7 +208,7 @@ elif menu == "Cursos & Turmas":
     
     with tab1:
         st.subheader("Lista de Cursos")
-        df_cursos = db.run_query("SELECT * FROM tb_cursos ORDER BY nome")
+        df_cursos = db.run_query_cached("SELECT * FROM tb_cursos ORDER BY nome")
         st.dataframe(df_cursos, use_container_width=True)
         
     with tab2:
@@ -157,7 +219,7 @@ elif menu == "Cursos & Turmas":
             JOIN tb_cursos c ON t.id_curso = c.id_curso
             ORDER BY c.nome, t.identificacao
         """
-        df_turmas = db.run_query(sql_turmas)
+        df_turmas = db.run_query_cached(sql_turmas)
         st.dataframe(df_turmas, use_container_width=True)
 
 # --- 5. VISÃO DA GRADE (ALOCAÇÕES) ---
@@ -167,31 +229,7 @@ elif menu == "Alocações (Grade)":
     dia_filtro = st.selectbox("Filtrar por Dia:", 
         ["Todos", "Segunda", "Terca", "Quarta", "Quinta", "Sexta", "Sabado"])
     
-    sql_grade = """
-        SELECT 
-            a.dia_semana,
-            s.nome AS sala,
-            prof.nome AS professor,
-            d.nome AS disciplina,
-            STRING_AGG(t.identificacao, ' + ') AS turmas,
-            CASE 
-                WHEN SUM(t.qtd_alunos) > s.capacidade THEN '🔴 LOTADO'
-                ELSE '🟢 OK'
-            END AS status
-        FROM tb_alocacoes a
-        JOIN tb_salas s ON a.id_sala = s.id_sala
-        JOIN tb_docentes prof ON a.id_docente = prof.id_docente
-        JOIN tb_disciplinas d ON a.id_disciplina = d.id_disciplina
-        JOIN tb_alocacao_turmas atur ON a.id_alocacao = atur.id_alocacao
-        JOIN tb_turmas t ON atur.id_turma = t.id_turma
-    """
-    
-    if dia_filtro != "Todos":
-        sql_grade += f" WHERE a.dia_semana = '{dia_filtro}'"
-        
-    sql_grade += " GROUP BY a.id_alocacao, a.dia_semana, s.nome, s.capacidade, prof.nome, d.nome ORDER BY s.nome"
-    
-    df_grade = db.run_query(sql_grade)
+    df_grade = db.get_grade_geral(None if dia_filtro == "Todos" else dia_filtro)
     st.dataframe(df_grade, use_container_width=True)
 
 
@@ -199,26 +237,66 @@ elif menu == "Alocações (Grade)":
 elif menu == "Nova Alocação":
     st.subheader("📝 Agendar Nova Aula")
     
-    # Listas básicas
-    df_profs = db.run_query("SELECT id_docente, nome FROM tb_docentes ORDER BY nome")
-    df_cursos = db.run_query("SELECT id_curso, nome FROM tb_cursos ORDER BY nome")
+    # Listas básicas (independentes entre si: buscadas em paralelo)
+    listas = db.run_queries_cached({
+        "nova_alocacao/docentes": "SELECT id_docente, nome FROM tb_docentes ORDER BY nome",
+        "nova_alocacao/cursos": "SELECT id_curso, nome FROM tb_cursos ORDER BY nome",
+        "nova_alocacao/salas": "SELECT id_sala, nome, capacidade FROM tb_salas ORDER BY nome",
+        "nova_alocacao/turmas": """
+            SELECT t.id_turma, t.identificacao, c.nome as curso, t.qtd_alunos
+            FROM tb_turmas t JOIN tb_cursos c ON t.id_curso = c.id_curso
+            ORDER BY c.nome, t.identificacao
+        """,
+    })
+    df_profs, df_cursos, df_salas, df_turmas = listas.values()
     
     # --- Passo 1: Quando? ---
     st.info("1️⃣ Selecione o horário para verificarmos a disponibilidade.")
     c_dia, c_turno = st.columns(2)
     dia = c_dia.selectbox("Dia da Semana", ["Segunda", "Terca", "Quarta", "Quinta", "Sexta", "Sabado"])
-    turno = c_turno.selectbox("Turno", ["Noturno", "Matutino", "Vespertino"])
     
-    # --- VALIDAÇÃO EM TEMPO REAL ---
-    df_salas = db.run_query("SELECT id_sala, nome, capacidade FROM tb_salas ORDER BY nome")
-    sql_ocupadas = f"SELECT id_sala FROM tb_alocacoes WHERE dia_semana = '{dia}' AND turno = '{turno}'"
-    df_ocupadas = db.run_query(sql_ocupadas)
+    # Turnos são atalhos para o horário; "Personalizado" aceita qualquer início/fim
+    atalhos = {f"{t} ({db.MAP_HORARIOS[t]['start'][:5]}-{db.MAP_HORARIOS[t]['end'][:5]})": t
+               for t in ["Noturno", "Matutino", "Vespertino"]}
+    horario_label = c_turno.selectbox("Horário", list(atalhos) + ["Personalizado"])
+    if horario_label in atalhos:
+        inicio, fim = db.horario_do_turno(atalhos[horario_label])
+    else:
+        c_ini, c_fim = st.columns(2)
+        inicio = db.minutos(c_ini.time_input("Início", value=datetime.time(19, 0), step=300))
+        fim = db.minutos(c_fim.time_input("Fim", value=datetime.time(19, 50), step=300))
+    horario_valido = fim > inicio
+    if not horario_valido:
+        st.error("O fim da aula precisa ser depois do início.")
+        fim = inicio + 1  # Só para as consultas abaixo; o botão fica bloqueado
+    turno = atalhos.get(horario_label) or db.turno_do_horario(inicio)
+    st.caption(f"🕒 {dia}, {db.hora_texto(inicio)} às {db.hora_texto(fim)} ({turno})")
+    
+    # --- Passo 2: Para Quem? ---
+    st.markdown("---")
+    st.write("2️⃣ Turmas Participantes")
     
-    lista_ids_ocupados = []
-    if not df_ocupadas.empty:
-        lista_ids_ocupados = df_ocupadas['id_sala'].tolist()
+    turmas_dict = {}
+    alunos_por_turma = {}
+    for i, row in df_turmas.iterrows():
+        label = f"{row['identificacao']} | {row['curso']} ({row['qtd_alunos']} alunos)"
+        turmas_dict[label] = row['id_turma']
+        alunos_por_turma[label] = int(row['qtd_alunos'] or 0)
+        
+    turmas_labels = st.multiselect("Selecione uma ou mais turmas:", list(turmas_dict.keys()))
+    ids_turmas = [turmas_dict[l] for l in turmas_labels]
+    total_alunos = sum(alunos_por_turma[l] for l in turmas_labels)
+    
+    turmas_ocupadas = [l for l in turmas_labels if ocupacao.turma_ocupada(dia, inicio, fim, turmas_dict[l])]
+    if turmas_ocupadas:
+        st.error("⚠️ Atenção: estas turmas JÁ TÊM AULA neste horário: " + ", ".join(turmas_ocupadas))
+    
+    # --- VALIDAÇÃO EM TEMPO REAL ---
+    # Índice de ocupação em memória (sem SQL a cada interação)
+    lista_ids_ocupados = ocupacao.salas_ocupadas(dia, inicio, fim)
     
     sala_options = {}
+    label_por_id = {}
     primeira_livre = None
     
     for index, row in df_salas.iterrows():
@@ -233,13 +311,29 @@ elif menu == "Nova Alocação":
             if primeira_livre is None: primeira_livre = label
             
         sala_options[label] = id_s
+        label_por_id[int(id_s)] = label
     
     st.markdown("---")
     
-    # --- Passo 2: Onde? ---
-    st.write("2️⃣ Escolha a Sala")
-    
-    # Tenta focar na primeira livre
+    # --- Passo 3: Onde? ---
+    st.write("3️⃣ Escolha a Sala")
+    
+    # Recomendação: salas livres que comportam as turmas, da menor sobra para a maior
+    c_tipo, c_total = st.columns(2)
+    tipo_label = c_tipo.selectbox("Tipo de Sala", ["Qualquer"] + recomendacao.tipos_de_sala())
+    tipo_sala = None if tipo_label == "Qualquer" else tipo_label
+    c_total.metric("Alunos nas Turmas", total_alunos)
+    
+    sugestoes = recomendacao.recomendar_salas(total_alunos, dia, inicio, fim, tipo_sala) if ids_turmas else []
+    if sugestoes:
+        st.caption("Salas recomendadas (melhor encaixe de capacidade):")
+        st.dataframe(pd.DataFrame(sugestoes)[['nome', 'capacidade', 'sobra']], use_container_width=True, hide_index=True)
+        primeira_livre = label_por_id.get(sugestoes[0]['id_sala'], primeira_livre)
+    elif ids_turmas:
+        maior = recomendacao.maior_sala_livre(dia, inicio, fim, tipo_sala)
+        st.warning(f"Nenhuma sala livre ({tipo_label}) comporta {total_alunos} alunos neste horário. Maior livre: {maior} lugares.")
+    
+    # Foca na recomendada (ou na primeira livre)
     idx_padrao = list(sala_options.keys()).index(primeira_livre) if primeira_livre else 0
     sala_label = st.selectbox("Salas Disponíveis:", list(sala_options.keys()), index=idx_padrao)
     id_sala_selecionada = sala_options[sala_label]
@@ -247,10 +341,13 @@ elif menu == "Nova Alocação":
     sala_esta_ocupada = "🚫" in sala_label
     if sala_esta_ocupada:
         st.error("⚠️ Atenção: Esta sala JÁ ESTÁ OCUPADA neste horário!")
+    capacidade_sala = int(df_salas.loc[df_salas['id_sala'] == id_sala_selecionada, 'capacidade'].iloc[0])
+    if total_alunos > capacidade_sala:
+        st.warning(f"As turmas somam {total_alunos} alunos e a sala tem {capacidade_sala} lugares.")
 
-    # --- Passo 3: O Quê e Quem? ---
+    # --- Passo 4: O Quê e Quem? ---
     st.markdown("---")
-    st.write("3️⃣ Detalhes da Aula")
+    st.write("4️⃣ Detalhes da Aula")
     
     col_curso, col_disc = st.columns(2)
     
@@ -261,7 +358,7 @@ elif menu == "Nova Alocação":
     # Usamos int() para converter o valor do pandas antes de usar no filtro
     id_curso_filtro = int(df_cursos[df_cursos['nome'] == curso_filtro]['id_curso'].values[0])
     
-    df_disc = db.run_query(f"SELECT id_disciplina, nome FROM tb_disciplinas WHERE id_curso = {id_curso_filtro} ORDER BY nome")
+    df_disc = db.run_query_cached("SELECT id_disciplina, nome FROM tb_disciplinas WHERE id_curso = %s ORDER BY nome", params=(id_curso_filtro,))
     
     disc_dict = {row['nome']: row['id_disciplina'] for i, row in df_disc.iterrows()}
     
@@ -278,34 +375,20 @@ elif menu == "Nova Alocação":
     prof_nome = c_prof.selectbox("Docente", list(prof_dict.keys()))
     id_prof = prof_dict[prof_nome]
     
+    docente_esta_ocupado = ocupacao.docente_ocupado(dia, inicio, fim, id_prof)
+    if docente_esta_ocupado:
+        st.error(f"⚠️ Atenção: {prof_nome} JÁ ESTÁ DANDO AULA neste horário!")
+    
     mod = c_mod.selectbox("Modalidade", ["Presencial", "Hibrido", "Semipresencial", "EAD"])
 
-    # --- Passo 4: Turmas (Multi-Select) ---
-    st.markdown("---")
-    st.write("4️⃣ Turmas Participantes")
-    
-    sql_turmas = """
-        SELECT t.id_turma, t.identificacao, c.nome as curso, t.qtd_alunos
-        FROM tb_turmas t JOIN tb_cursos c ON t.id_curso = c.id_curso
-        ORDER BY c.nome, t.identificacao
-    """
-    df_turmas = db.run_query(sql_turmas)
-    
-    turmas_dict = {}
-    for i, row in df_turmas.iterrows():
-        label = f"{row['identificacao']} | {row['curso']} ({row['qtd_alunos']} alunos)"
-        turmas_dict[label] = row['id_turma']
-        
-    turmas_labels = st.multiselect("Selecione uma ou mais turmas:", list(turmas_dict.keys()))
-    ids_turmas = [turmas_dict[l] for l in turmas_labels]
-    
     # --- Botão de Salvar ---
     st.markdown("---")
-    bloqueado = sala_esta_ocupada or not ids_turmas or not id_disc_selecionada
+    tem_conflito = sala_esta_ocupada or docente_esta_ocupado or bool(turmas_ocupadas)
+    bloqueado = tem_conflito or not horario_valido or not ids_turmas or not id_disc_selecionada
     
     if st.button("💾 Confirmar Alocação", type="primary", disabled=bloqueado):
         dados = {
-            'dia': dia, 'turno': turno, 'modalidade': mod,
+            'dia': dia, 'turno': turno, 'inicio': inicio, 'fim': fim, 'modalidade': mod,
             'id_sala': id_sala_selecionada, 'id_docente': id_prof,
             'id_disciplina': id_disc_selecionada
         }
@@ -318,14 +401,113 @@ elif menu == "Nova Alocação":
         else:
             st.error(msg)
             
-    if sala_esta_ocupada:
-        st.warning("Escolha uma sala livre (✅) para liberar o botão.")
+    if tem_conflito:
+        st.warning("Resolva os conflitos de sala, docente ou turma para liberar o botão.")
 
-# --- 7. GERENCIAR GRADE (EXCLUIR) ---
+# --- 7. AGENDAMENTO AUTOMÁTICO (SEMESTRE INTEIRO) ---
+elif menu == "Agendamento Automático":
+    st.subheader("🤖 Agendamento Automático do Semestre")
+    st.info("Informe a demanda (uma linha por aula). O agendador escolhe sala, dia e turno sem conflitos, respeitando a capacidade.")
+
+    df_profs = db.run_query_cached("SELECT id_docente, nome FROM tb_docentes ORDER BY nome")
+    df_disc = db.run_query_cached("""
+        SELECT d.id_disciplina, d.nome, c.nome AS curso
+        FROM tb_disciplinas d JOIN tb_cursos c ON d.id_curso = c.id_curso
+        ORDER BY c.nome, d.nome
+    """)
+    df_turmas = db.run_query_cached("SELECT id_turma, identificacao FROM tb_turmas ORDER BY identificacao")
+    df_tipos = db.run_query_cached("SELECT DISTINCT tipo FROM tb_salas ORDER BY tipo")
+
+    disc_dict = {f"{row['nome']} | {row['curso']}": int(row['id_disciplina']) for i, row in df_disc.iterrows()}
+    prof_dict = {row['nome']: int(row['id_docente']) for i, row in df_profs.iterrows()}
+    turma_dict = {row['identificacao']: int(row['id_turma']) for i, row in df_turmas.iterrows()}
+    tipos = ["Qualquer"] + df_tipos['tipo'].tolist()
+
+    st.write("1️⃣ Demanda")
+    st.caption("Turmas unificadas: separe as identificações com '+' (ex: DIR9A + DIR10A).")
+    df_demanda = st.data_editor(
+        pd.DataFrame(columns=["Disciplina", "Docente", "Turmas", "Tipo de Sala", "Modalidade"]),
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "Disciplina": st.column_config.SelectboxColumn(options=list(disc_dict.keys()), required=True),
+            "Docente": st.column_config.SelectboxColumn(options=list(prof_dict.keys()), required=True),
+            "Turmas": st.column_config.TextColumn(required=True),
+            "Tipo de Sala": st.column_config.SelectboxColumn(options=tipos, default="Qualquer"),
+            "Modalidade": st.column_config.SelectboxColumn(options=["Presencial", "Hibrido", "Semipresencial", "EAD"], default="Presencial"),
+        },
+        key="editor_demanda",
+    )
+
+    if st.button("🔍 Pré-visualizar Plano (sem gravar)"):
+        demandas, erros = [], []
+        for n, row in enumerate(df_demanda.itertuples(index=False), start=1):
+            if not row.Disciplina or not row.Docente or not row.Turmas:
+                erros.append(f"Linha {n}: preencha disciplina, docente e turmas.")
+                continue
+            nomes_turmas = [t.strip() for t in str(row.Turmas).split("+") if t.strip()]
+            desconhecidas = [t for t in nomes_turmas if t not in turma_dict]
+            if desconhecidas:
+                erros.append(f"Linha {n}: turma(s) não encontrada(s): {', '.join(desconhecidas)}")
+                continue
+            demandas.append({
+                "id_disciplina": disc_dict[row.Disciplina], "id_docente": prof_dict[row.Docente],
+                "turmas": [turma_dict[t] for t in nomes_turmas],
+                "tipo_sala": None if row[3] in (None, "Qualquer") else row[3],
+                "modalidade": row.Modalidade or "Presencial",
+            })
+        for erro in erros:
+            st.error(erro)
+        if demandas and not erros:
+            inicio = time.perf_counter()
+            st.session_state['plano_agendador'] = agendador.resolver(demandas)
+            st.session_state['plano_agendador_tempo'] = time.perf_counter() - inicio
+
+    plano = st.session_state.get('plano_agendador')
+    if plano:
+        st.markdown("---")
+        st.write("2️⃣ Plano Proposto")
+        df_salas = db.run_query_cached("SELECT id_sala, nome, capacidade FROM tb_salas ORDER BY nome")
+        sala_nomes = dict(zip(df_salas['id_sala'], df_salas['nome']))
+        sala_caps = dict(zip(df_salas['id_sala'], df_salas['capacidade']))
+        prof_nomes = {v: k for k, v in prof_dict.items()}
+        disc_nomes = {v: k for k, v in disc_dict.items()}
+        turma_nomes = {v: k for k, v in turma_dict.items()}
+
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Aulas Alocadas", len(plano['alocadas']))
+        c2.metric("Pendentes", len(plano['pendentes']))
+        c3.metric("Tempo de Resolução", f"{st.session_state['plano_agendador_tempo']:.2f} s")
+
+        st.dataframe(pd.DataFrame([{
+            "dia_semana": a['dia'], "turno": a['turno'],
+            "sala": sala_nomes.get(a['id_sala']), "lugares": f"{a['alunos']}/{sala_caps.get(a['id_sala'])}",
+            "disciplina": disc_nomes.get(a['id_disciplina']), "professor": prof_nomes.get(a['id_docente']),
+            "turmas": " + ".join(turma_nomes.get(t, str(t)) for t in a['turmas']),
+        } for a in plano['alocadas']]), use_container_width=True)
+
+        if plano['pendentes']:
+            st.warning("Estas aulas não puderam ser alocadas:")
+            st.dataframe(pd.DataFrame([{
+                "disciplina": disc_nomes.get(d['id_disciplina']), "professor": prof_nomes.get(d['id_docente']),
+                "turmas": " + ".join(turma_nomes.get(t, str(t)) for t in d['turmas']), "motivo": motivo,
+            } for d, motivo in plano['pendentes']]), use_container_width=True)
+
+        if st.button("💾 Gravar Plano", type="primary", disabled=not plano['alocadas']):
+            sucesso, msg, _ = agendador.gravar_plano(plano)
+            if sucesso:
+                del st.session_state['plano_agendador']
+                st.success(msg)
+                time.sleep(2)
+                st.rerun()
+            else:
+                st.error(msg)
+
+# --- 8. GERENCIAR GRADE (EXCLUIR) ---
 elif menu == "Gerenciar Grade":
     st.subheader("⚙️ Gerenciamento da Grade")
     
-    tab_del, tab_exp = st.tabs(["🗑️ Excluir Aulas", "📥 Exportar Relatórios"])
+    tab_del, tab_imp, tab_exp = st.tabs(["🗑️ Excluir Aulas", "📤 Importar Planilha", "📥 Exportar Relatórios"])
     
     with tab_del:
         st.warning("Cuidado: A exclusão é permanente.")
@@ -333,7 +515,9 @@ elif menu == "Gerenciar Grade":
         
         sql_lista = """
             SELECT 
-                a.id_alocacao, a.dia_semana, s.nome AS sala, d.nome AS disciplina, 
+                a.id_alocacao, a.dia_semana,
+                to_char(a.hora_inicio, 'HH24:MI') || '-' || to_char(a.hora_fim, 'HH24:MI') AS horario,
+                s.nome AS sala, d.nome AS disciplina, 
                 prof.nome AS professor, STRING_AGG(t.identificacao, ', ') AS turmas
             FROM tb_alocacoes a
             JOIN tb_salas s ON a.id_sala = s.id_sala
@@ -345,7 +529,7 @@ elif menu == "Gerenciar Grade":
         if filtro_dia != "Todos":
             sql_lista += f" WHERE a.dia_semana = '{filtro_dia}'"
             
-        sql_lista += " GROUP BY a.id_alocacao, a.dia_semana, s.nome, d.nome, prof.nome ORDER BY a.dia_semana, s.nome"
+        sql_lista += " GROUP BY a.id_alocacao, a.dia_semana, a.hora_inicio, a.hora_fim, s.nome, d.nome, prof.nome ORDER BY a.dia_semana, a.hora_inicio, s.nome"
         
         df_aulas = db.run_query(sql_lista)
         
@@ -354,7 +538,7 @@ elif menu == "Gerenciar Grade":
             
             lista_opcoes = {}
             for index, row in df_aulas.iterrows():
-                label = f"ID {row['id_alocacao']} | {row['dia_semana']} | {row['sala']} | {row['disciplina']}"
+                label = f"ID {row['id_alocacao']} | {row['dia_semana']} {row['horario']} | {row['sala']} | {row['disciplina']}"
                 lista_opcoes[label] = row['id_alocacao']
             
             escolha = st.selectbox("Escolha a aula para remover:", list(lista_opcoes.keys()))
@@ -370,15 +554,74 @@ elif menu == "Gerenciar Grade":
         else:
             st.info("Nenhuma aula encontrada.")
 
+    with tab_imp:
+        st.write("Carregue a grade de um período inteiro a partir de um CSV ou XLSX.")
+        st.caption("Colunas: " + ", ".join(importacao.COLUNAS) + ". Opcionais: " + ", ".join(importacao.COLUNAS_OPCIONAIS)
+                   + " (HH:MM; sem elas vale o horário do turno). Turmas unificadas separadas por '+'.")
+        arquivo = st.file_uploader("Arquivo da grade", type=["csv", "xlsx"])
+        c_dry, c_tudo = st.columns(2)
+        dry_run = c_dry.checkbox("Apenas validar (dry-run)", value=True)
+        tudo_ou_nada = c_tudo.checkbox("Cancelar tudo se houver erro", value=False)
+
+        if arquivo and st.button("📤 Importar", type="primary"):
+            formato = "xlsx" if arquivo.name.lower().endswith(".xlsx") else "csv"
+            with st.spinner("Processando arquivo..."):
+                try:
+                    relatorio = importacao.importar(arquivo, formato, dry_run=dry_run, tudo_ou_nada=tudo_ou_nada)
+                except (ValueError, RuntimeError) as e:  # Arquivo sem as colunas obrigatórias / openpyxl ausente
+                    st.error(str(e))
+                    st.stop()
+
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Linhas Lidas", relatorio['lidas'])
+            c2.metric("Válidas", relatorio['validas'])
+            c3.metric("Com Erro", len(relatorio['erros']))
+            c4.metric("Gravadas", relatorio['gravadas'])
+
+            if relatorio['erros']:
+                st.dataframe(pd.DataFrame(relatorio['erros'], columns=["linha", "erro"]), use_container_width=True)
+            if dry_run:
+                st.info("Dry-run: nada foi gravado. Desmarque a opção para importar.")
+            elif relatorio['gravadas']:
+                st.success(f"{relatorio['gravadas']} aulas importadas!")
+
     with tab_exp:
-        st.write("Baixe a grade completa.")
-        # Reutilizamos a query de grade completa
-        sql_relatorio = "SELECT * FROM tb_alocacoes" # Simplificado para teste, pode usar a query completa
-        df_export = db.run_query("SELECT * FROM tb_alocacoes")
-        csv = df_export.to_csv(index=False).encode('utf-8')
-        st.download_button("📥 Baixar CSV", data=csv, file_name='grade.csv', mime='text/csv')
-
-# --- 8. CALENDÁRIO VISUAL ---
+        st.write("Baixe a grade completa (sala, docente, disciplina, turmas e lotação).")
+        
+        df_cursos = db.run_query_cached("SELECT id_curso, nome FROM tb_cursos ORDER BY nome")
+        df_profs = db.run_query_cached("SELECT id_docente, nome FROM tb_docentes ORDER BY nome")
+        curso_dict = {row['nome']: int(row['id_curso']) for i, row in df_cursos.iterrows()}
+        prof_dict = {row['nome']: int(row['id_docente']) for i, row in df_profs.iterrows()}
+        
+        f1, f2, f3, f4 = st.columns(4)
+        exp_dia = f1.selectbox("Dia", ["Todos", "Segunda", "Terca", "Quarta", "Quinta", "Sexta", "Sabado"], key="exp_dia")
+        exp_turno = f2.selectbox("Turno", ["Todos", "Matutino", "Vespertino", "Noturno"], key="exp_turno")
+        exp_curso = f3.selectbox("Curso", ["Todos"] + list(curso_dict.keys()), key="exp_curso")
+        exp_prof = f4.selectbox("Docente", ["Todos"] + list(prof_dict.keys()), key="exp_prof")
+        formato = st.radio("Formato", list(exportacao.FORMATOS.keys()), horizontal=True, format_func=str.upper)
+        
+        if st.button("⚙️ Gerar Arquivo"):
+            with st.spinner("Exportando a grade..."):
+                try:
+                    arquivo, linhas = exportacao.gerar_arquivo(
+                        formato,
+                        dia=None if exp_dia == "Todos" else exp_dia,
+                        turno=None if exp_turno == "Todos" else exp_turno,
+                        id_curso=curso_dict.get(exp_curso),
+                        id_docente=prof_dict.get(exp_prof),
+                    )
+                except Exception as e:
+                    st.error(f"Erro na exportação: {e}")
+                    st.stop()
+            st.success(f"{linhas} aulas exportadas.")
+            st.caption("O download passa pela sessão do Streamlit, que carrega o arquivo inteiro na memória do servidor. "
+                       "Para grades muito grandes use `python -m database.exportacao grade.parquet` no servidor.")
+            st.download_button(
+                f"📥 Baixar {formato.upper()}", data=arquivo,
+                file_name=f"grade.{formato}", mime=exportacao.FORMATOS[formato]
+            )
+
+# --- 9. CALENDÁRIO VISUAL ---
 elif menu == "Calendário Visual":
     st.subheader("🗓️ Visão Semanal Interativa")
     
@@ -399,4 +642,208 @@ elif menu == "Calendário Visual":
         "locale": "pt-br",
     }
     
-    calendar(events=eventos_calendario, options=calendar_options)
\ No newline at end of file
+    calendar(events=eventos_calendario, options=calendar_options)
+
+# --- 10. UTILIZAÇÃO DAS SALAS ---
+elif menu == "Utilização das Salas":
+    st.subheader("🌡️ Utilização das Salas")
+    st.caption("Ocupação (minutos com aula ÷ minutos da janela do turno) e preenchimento (alunos ÷ capacidade) de cada sala por dia e turno.")
+
+    try:
+        m = utilizacao.get_matrizes()
+    except Exception as e:
+        st.error(f"Erro ao carregar a ocupação: {e}")
+        st.stop()
+
+    c_tipo, c_medida, c_top = st.columns([2, 2, 1])
+    tipos = c_tipo.multiselect("Tipo de Sala", sorted(m['salas']['tipo'].dropna().unique()))
+    medida = c_medida.radio("Medida", ["ocupacao", "preenchimento"], horizontal=True,
+                            format_func=lambda x: {"ocupacao": "Ocupação", "preenchimento": "Preenchimento"}[x])
+    top_n = c_top.number_input("Top N", min_value=1, max_value=100, value=utilizacao.TOP_N)
+
+    mascara = utilizacao.filtrar(m, tipos)
+    if not mascara.any():
+        st.info("Nenhuma sala cadastrada para o filtro.")
+        st.stop()
+    resumo = utilizacao.resumo_por_sala(m, mascara)
+
+    r1, r2, r3, r4 = st.columns(4)
+    r1.metric("Salas", len(resumo))
+    r2.metric("Uso Médio", f"{resumo['uso_pct'].mean():.1f}%")
+    r3.metric("Aproveitamento Médio", f"{resumo['aproveitamento_pct'].mean():.1f}%")
+    r4.metric("Salas Sem Aula", int((resumo['aulas'] == 0).sum()))
+
+    # Mapa geral: dia x turno agregado sobre as salas do filtro
+    titulo_medida = "Ocupação (%)" if medida == "ocupacao" else "Preenchimento (%)"
+    df_mapa = utilizacao.mapa_dia_turno(m, mascara, medida).rename_axis("dia_semana").reset_index()
+    df_mapa = df_mapa.melt(id_vars="dia_semana", var_name="turno", value_name="valor")
+    grafico = alt.Chart(df_mapa).mark_rect().encode(
+        x=alt.X("turno:N", sort=m['turnos'], title=None),
+        y=alt.Y("dia_semana:N", sort=m['dias'], title=None),
+        color=alt.Color("valor:Q", title=titulo_medida, scale=alt.Scale(scheme="orangered")),
+        tooltip=["dia_semana", "turno", alt.Tooltip("valor:Q", title=titulo_medida)],
+    )
+    rotulos = grafico.mark_text(baseline="middle").encode(text=alt.Text("valor:Q", format=".1f"), color=alt.value("black"))
+    st.altair_chart(grafico + rotulos, use_container_width=True)
+
+    col_mais, col_menos = st.columns(2)
+    colunas_ranking = ['nome', 'tipo', 'capacidade', 'aulas', 'uso_pct', 'preenchimento_pct', 'aproveitamento_pct']
+    mais_usadas = utilizacao.ranking(resumo, top_n, mais_usadas=True)
+    menos_usadas = utilizacao.ranking(resumo, top_n, mais_usadas=False)
+    with col_mais:
+        st.write(f"#### 🔥 {len(mais_usadas)} Mais Aproveitadas")
+        st.dataframe(mais_usadas[colunas_ranking], use_container_width=True, hide_index=True)
+    with col_menos:
+        st.write(f"#### 🧊 {len(menos_usadas)} Menos Aproveitadas")
+        st.dataframe(menos_usadas[colunas_ranking], use_container_width=True, hide_index=True)
+
+    # Mapa por sala: só as salas do ranking (o campus inteiro não cabe num gráfico legível)
+    st.write("#### 🗺️ Mapa por Sala")
+    ids_ranking = list(dict.fromkeys(mais_usadas['id_sala'].tolist() + menos_usadas['id_sala'].tolist()))
+    df_celulas = utilizacao.celulas_das_salas(m, ids_ranking, medida)
+    df_celulas['horario'] = df_celulas['dia_semana'] + " " + df_celulas['turno']
+    ordem_horarios = [f"{dia} {turno}" for dia in m['dias'] for turno in m['turnos']]
+    titulo_celula = titulo_medida
+    mapa_salas = alt.Chart(df_celulas).mark_rect().encode(
+        x=alt.X("horario:N", sort=ordem_horarios, title=None),
+        y=alt.Y("sala:N", sort=None, title=None),
+        color=alt.Color("valor:Q", title=titulo_celula, scale=alt.Scale(scheme="orangered")),
+        tooltip=["sala", "dia_semana", "turno", alt.Tooltip("valor:Q", title=titulo_celula)],
+    ).properties(height=max(200, 18 * len(ids_ranking)))
+    st.altair_chart(mapa_salas, use_container_width=True)
+
+    if resumo['conflitos'].any():
+        st.warning(f"{int(resumo['conflitos'].sum())} aula(s) em horário sobreposto a outra aula da mesma sala. "
+                   "Veja os detalhes em Auditoria da Grade.")
+
+    st.download_button("📥 Baixar Resumo por Sala (CSV)", data=resumo.to_csv(index=False).encode("utf-8"),
+                       file_name="utilizacao_salas.csv", mime="text/csv")
+
+# --- 11. AUDITORIA DA GRADE ---
+elif menu == "Auditoria da Grade":
+    st.subheader("🩺 Auditoria da Grade")
+    st.caption("Confere a grade inteira de uma vez: choques de sala, docente e turma no mesmo horário e salas acima da capacidade.")
+
+    if st.button("🔍 Auditar Agora", type="primary"):
+        try:
+            with st.spinner("Auditando a grade..."):
+                st.session_state['auditoria'] = validacao.auditar()
+        except Exception as e:
+            st.error(f"Erro ao auditar a grade: {e}")
+
+    relatorio = st.session_state.get('auditoria')
+    if relatorio:
+        st.caption(f"{relatorio['alocacoes']} alocações auditadas "
+                   f"(leitura {relatorio['leitura_s']}s, validação {relatorio['validacao_s']}s).")
+        colunas = st.columns(len(validacao.TIPOS))
+        for coluna, (tipo, descricao) in zip(colunas, validacao.TIPOS.items()):
+            coluna.metric(descricao, len(relatorio['violacoes'][tipo]))
+
+        if validacao.total_violacoes(relatorio):
+            df_violacoes = validacao.como_dataframe(relatorio)
+            tipos_vistos = st.multiselect("Tipos", list(validacao.TIPOS), default=list(validacao.TIPOS),
+                                          format_func=validacao.TIPOS.get)
+            st.dataframe(df_violacoes[df_violacoes['tipo'].isin(tipos_vistos)], use_container_width=True, hide_index=True)
+            st.download_button("📥 Baixar Relatório (CSV)", data=df_violacoes.to_csv(index=False).encode("utf-8"),
+                               file_name="auditoria_grade.csv", mime="text/csv")
+        else:
+            st.success("Nenhuma violação encontrada.")
+    else:
+        st.info("Para rodar toda noite: python -m database.validacao (código de saída 1 se houver violações).")
+
+# --- 12. PERÍODOS LETIVOS (ATIVO, ARQUIVO E VIRADA) ---
+elif menu == "Períodos Letivos":
+    st.subheader("📅 Períodos Letivos")
+    st.caption("Só o período ativo fica na grade de trabalho (portais, calendário, alocações); os demais ficam arquivados.")
+
+    df_periodos = periodos.listar()
+    st.dataframe(df_periodos.drop(columns=['id_periodo']), use_container_width=True, hide_index=True)
+    ids_periodos = dict(zip(df_periodos['descricao'], df_periodos['id_periodo']))
+    ativo = periodos.periodo_ativo()
+
+    tab_ativar, tab_virar = st.tabs(["🔁 Trocar Período Ativo", "➡️ Virada de Semestre"])
+
+    with tab_ativar:
+        st.write("A grade atual vai para o arquivo e a do período escolhido passa a ser a grade de trabalho.")
+        outros = [d for d in ids_periodos if not ativo or d != ativo['descricao']]
+        if outros:
+            escolhido = st.selectbox("Ativar o período", outros)
+            if st.button("🔁 Ativar Período", type="primary"):
+                with st.spinner("Trocando o período ativo..."):
+                    sucesso, msg = periodos.ativar(ids_periodos[escolhido])
+                if sucesso:
+                    st.success(msg)
+                    time.sleep(1)
+                    st.rerun()
+                else:
+                    st.error(msg)
+        else:
+            st.info("Não há outro período cadastrado. Crie um na aba Virada de Semestre.")
+
+    with tab_virar:
+        st.write("Cria um novo período com uma cópia da grade de outro (mesmas salas, docentes, turmas e horários).")
+        if ids_periodos:
+            descricoes = list(ids_periodos)
+            padrao = descricoes.index(ativo['descricao']) if ativo and ativo['descricao'] in descricoes else 0
+            c_origem, c_destino = st.columns(2)
+            origem = c_origem.selectbox("Copiar a grade de", descricoes, index=padrao)
+            destino = c_destino.text_input("Novo período", value=periodos.proxima_descricao(origem) or "")
+            c_ini, c_fim = st.columns(2)
+            data_inicio = c_ini.date_input("Início das aulas", value=None)
+            data_fim = c_fim.date_input("Fim das aulas", value=None)
+            ativar_novo = st.checkbox("Ativar o novo período ao final", value=True)
+            if st.button("➡️ Virar Semestre", type="primary", disabled=not destino.strip()):
+                with st.spinner("Copiando a grade..."):
+                    sucesso, msg = periodos.virar(ids_periodos[origem], destino, data_inicio, data_fim, ativar_novo)
+                if sucesso:
+                    st.success(msg)
+                    time.sleep(1)
+                    st.rerun()
+                else:
+                    st.error(msg)
+        st.caption("Pela linha de comando: python -m database.periodos virar [--de 2026.1] [--para 2026.2] [--ativar]")
+
+# --- 13. DESEMPENHO (INSTRUMENTAÇÃO) ---
+elif menu == "Desempenho":
+    st.subheader("⏱️ Desempenho da Camada de Dados")
+    st.caption(
+        f"Medições deste processo (últimas {instrumentacao.MAX_REGISTROS} consultas). "
+        f"Consultas acima de {instrumentacao.LIMITE_LENTA_MS:.0f} ms vão para o log de lentas."
+    )
+
+    tab_paginas, tab_consultas, tab_lentas = st.tabs(["📄 Por Página", "🔎 Por Consulta", "🐢 Consultas Lentas"])
+
+    with tab_paginas:
+        df_paginas = instrumentacao.resumo_paginas()
+        if df_paginas.empty:
+            st.info("Nenhum rerun medido ainda.")
+        else:
+            st.dataframe(df_paginas, use_container_width=True, hide_index=True)
+
+    with tab_consultas:
+        df_consultas = instrumentacao.resumo_consultas()
+        if df_consultas.empty:
+            st.info("Nenhuma consulta medida ainda.")
+        else:
+            st.dataframe(df_consultas, use_container_width=True, hide_index=True)
+
+    with tab_lentas:
+        df_lentas = instrumentacao.consultas_lentas()
+        if df_lentas.empty:
+            st.success("Nenhuma consulta lenta registrada.")
+        else:
+            st.dataframe(df_lentas, use_container_width=True, hide_index=True)
+
+    st.markdown("---")
+    c_baixar, c_limpar = st.columns(2)
+    with c_baixar:
+        buffer = io.StringIO()
+        instrumentacao.exportar_jsonl(buffer)
+        st.download_button("📥 Baixar Trace (JSON lines)", data=buffer.getvalue(),
+                           file_name="sga_trace.jsonl", mime="application/x-ndjson")
+    with c_limpar:
+        if st.button("🧹 Zerar Medições"):
+            instrumentacao.limpar()
+            st.rerun()
+
+instrumentacao.finalizar_pagina()
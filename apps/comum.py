@@ -0,0 +1,15 @@
+"""
+Utilidades compartilhadas pelas páginas do SGA.
+
+As páginas rodam tanto sozinhas (streamlit run apps/portal_aluno.py) quanto
+dentro do app multipágina (streamlit run app.py), que já chamou
+st.set_page_config antes de executá-las.
+"""
+import streamlit as st
+
+def configurar_pagina(page_title, page_icon, layout="centered"):
+    """st.set_page_config que também funciona como página do app multipágina."""
+    try:
+        st.set_page_config(page_title=page_title, page_icon=page_icon, layout=layout)
+    except st.errors.StreamlitAPIException:
+        pass  # Versões antigas do Streamlit só aceitam uma chamada por execução
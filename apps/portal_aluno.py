@@ -11,9 +11,12 @@ sys.path.append(root_dir)
 
 # Importa o módulo de banco de dados
 from database import db_connection as db 
+from database import instrumentacao
+from apps import comum
 
 # Configuração da página
-st.set_page_config(page_title="Minha Grade - Anhanguera", page_icon="🎓", layout="centered")
+comum.configurar_pagina(page_title="Minha Grade - Anhanguera", page_icon="🎓", layout="centered")
+instrumentacao.iniciar_pagina("portal_aluno")
 
 # CSS para estilo mobile-friendly
 st.markdown("""
@@ -50,43 +53,25 @@ st.write("Consulte sua grade horária e sala de aula.")
 # --- FILTROS DE SELEÇÃO ---
 st.info("👇 Selecione seus dados abaixo:") 
 
+# Árvore curso -> semestre -> turma carregada numa única consulta e compartilhada
+# pelo processo: trocar de seletor não consulta o banco.
+hierarquia = db.get_hierarquia_cursos()
+
 # 1. Selecionar Curso
-df_cursos = db.run_query("SELECT id_curso, nome FROM tb_cursos ORDER BY nome")
-curso_nomes = df_cursos['nome'].tolist()
-curso_selecionado = st.selectbox("Selecione seu Curso:", [""] + curso_nomes)
+curso_selecionado = st.selectbox("Selecione seu Curso:", [""] + list(hierarquia.keys()))
 
 if curso_selecionado:
-    # Pega o ID do curso
-    id_curso = int(df_cursos[df_cursos['nome'] == curso_selecionado]['id_curso'].values[0])
-    
-    # 2. Selecionar Semestre (Busca apenas semestres que possuem turmas deste curso)
-    query_semestres = """
-        SELECT DISTINCT s.id_semestre, s.descricao 
-        FROM tb_semestres s
-        JOIN tb_turmas t ON t.id_semestre = s.id_semestre
-        WHERE t.id_curso = %s
-        ORDER BY s.id_semestre
-    """
-    df_semestres = db.run_query(query_semestres, params=(id_curso,))
+    # 2. Selecionar Semestre (apenas semestres que possuem turmas deste curso)
+    semestres = hierarquia[curso_selecionado]["semestres"]
     
-    if not df_semestres.empty:
-        semestre_dict = {row['descricao']: row['id_semestre'] for i, row in df_semestres.iterrows()}
-        semestre_selecionado = st.selectbox("Selecione seu Semestre:", [""] + list(semestre_dict.keys()))
+    if semestres:
+        semestre_selecionado = st.selectbox("Selecione seu Semestre:", [""] + list(semestres.keys()))
 
         if semestre_selecionado:
-            id_semestre = semestre_dict[semestre_selecionado]
-
             # 3. Selecionar Turma (Filtrada por Curso e Semestre)
-            query_turmas = """
-                SELECT id_turma, identificacao 
-                FROM tb_turmas 
-                WHERE id_curso = %s AND id_semestre = %s
-                ORDER BY identificacao
-            """
-            df_turmas = db.run_query(query_turmas, params=(id_curso, id_semestre))
+            turma_dict = semestres[semestre_selecionado]["turmas"]
             
-            if not df_turmas.empty:
-                turma_dict = {row['identificacao']: row['id_turma'] for i, row in df_turmas.iterrows()}
+            if turma_dict:
                 turma_nome = st.selectbox("Selecione sua Turma:", [""] + list(turma_dict.keys()))
                 
                 if turma_nome:
@@ -125,7 +110,7 @@ if curso_selecionado:
                                         <div class="aula-header">{aula['disciplina']}</div>
                                         <div style="margin: 8px 0;">
                                             <span class="tag {cor_tag}">{mod}</span>
-                                            <span class="tag tag-turno">{aula['turno']}</span>
+                                            <span class="tag tag-turno">🕒 {aula['hora_inicio']}–{aula['hora_fim']}</span>
                                         </div>
                                         <div class="aula-info">
                                             📍 <b>Sala:</b> {aula['sala']} <br>
@@ -140,4 +125,6 @@ if curso_selecionado:
 
 # Rodapé
 st.markdown("---")
-st.caption("Sistema de Gestão Acadêmica - Faculdade Anhanguera")
\ No newline at end of file
+st.caption("Sistema de Gestão Acadêmica - Faculdade Anhanguera")
+
+instrumentacao.finalizar_pagina()
@@ -12,9 +12,12 @@ sys.path.append(root_dir)
 
 # Agora importamos do novo local renomeado
 from database import db_connection as db
+from database import instrumentacao
+from apps import comum
 
 # Configuração Mobile-First
-st.set_page_config(page_title="Sou Docente - Anhanguera", page_icon="👨‍🏫", layout="centered")
+comum.configurar_pagina(page_title="Sou Docente - Anhanguera", page_icon="👨‍🏫", layout="centered")
+instrumentacao.iniciar_pagina("portal_docente")
 
 # CSS Estilizado para Professores
 st.markdown("""
@@ -58,7 +61,7 @@ st.warning("Aviso: esta aplicacao esta em testes e pode apresentar instabilidade
 st.write("Bem-vindo(a)! Consulte sua alocação de salas.")
 
 # --- SELEÇÃO DE PROFESSOR ---
-df_profs = db.run_query("SELECT id_docente, nome FROM tb_docentes ORDER BY nome")
+df_profs = db.get_docentes()
 prof_nomes = df_profs['nome'].tolist()
 
 prof_selecionado = st.selectbox("Quem é você?", [""] + prof_nomes, placeholder="Selecione seu nome na lista...")
@@ -94,7 +97,7 @@ if prof_selecionado:
 <div class="prof-card">
     <div style="display:flex; justify-content:space-between; align-items:start;">
         <div class="sala-badge">🚪 {row['sala']}</div>
-        <span class="turno-tag">{icone_turno} {row['turno']}</span>
+        <span class="turno-tag">{icone_turno} {row['hora_inicio']}–{row['hora_fim']}</span>
     </div>
     <div class="disciplina-title">{row['disciplina']}</div>
     <div class="turma-info">
@@ -107,4 +110,6 @@ if prof_selecionado:
 """, unsafe_allow_html=True)
 
 st.markdown("---")
-st.caption("🔒 Acesso restrito ao corpo docente - Anhanguera")
\ No newline at end of file
+st.caption("🔒 Acesso restrito ao corpo docente - Anhanguera")
+
+instrumentacao.finalizar_pagina()
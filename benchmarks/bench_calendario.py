@@ -0,0 +1,93 @@
+"""
+Benchmark da montagem de eventos do Calendário Visual.
+
+Compara a implementação antiga (df.iterrows + timedelta/strftime por linha)
+com a nova montar_eventos_calendario (coluna a coluna + modelos por semana)
+para 1k, 10k e 100k alocações sintéticas. Não precisa de banco.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_calendario [--tamanhos 1000 10000 100000] [--repeticoes 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_connection as db
+
+def gerar_alocacoes(n, semente=42):
+    """DataFrame no mesmo formato da consulta de get_dados_calendario."""
+    rnd = random.Random(semente)
+    dias = list(db.MAP_DIAS)
+    turnos = [rnd.choice(list(db.MAP_HORARIOS)) for _ in range(n)]
+    return pd.DataFrame({
+        "id_alocacao": range(1, n + 1),
+        "dia_semana": [rnd.choice(dias) for _ in range(n)],
+        "turno": turnos,
+        "hora_inicio": [db.MAP_HORARIOS[t]["start"] for t in turnos],  # Aulas no atalho do turno
+        "hora_fim": [db.MAP_HORARIOS[t]["end"] for t in turnos],
+        "sala": [f"Sala {rnd.randint(1, 400)}" for _ in range(n)],
+        "professor": [f"Docente {rnd.randint(1, 900)}" for _ in range(n)],
+        "disciplina": [f"Disciplina {rnd.randint(1, 2000)}" for _ in range(n)],
+        "capacidade": [rnd.choice([30, 40, 50, 60, 80, 120]) for _ in range(n)],
+    })
+
+def montar_eventos_iterrows(df):
+    """Implementação original, mantida aqui só como referência de comparação."""
+    events = []
+    map_dias = {'Segunda': 0, 'Terca': 1, 'Quarta': 2, 'Quinta': 3, 'Sexta': 4, 'Sabado': 5}
+    map_horarios = {
+        'Matutino': {'start': '08:00:00', 'end': '11:30:00'},
+        'Vespertino': {'start': '14:00:00', 'end': '17:30:00'},
+        'Noturno': {'start': '19:00:00', 'end': '22:00:00'}
+    }
+    hoje = datetime.now()
+    inicio_semana = hoje - timedelta(days=hoje.weekday())
+    for _, row in df.iterrows():
+        if row['dia_semana'] in map_dias and row['turno'] in map_horarios:
+            delta = map_dias[row['dia_semana']]
+            data_ev = (inicio_semana + timedelta(days=delta)).strftime('%Y-%m-%d')
+            hrs = map_horarios[row['turno']]
+            events.append({
+                "title": f"{row['sala']} | {row['professor']}",
+                "start": f"{data_ev}T{hrs['start']}",
+                "end": f"{data_ev}T{hrs['end']}",
+                "resourceId": row['sala'],
+                "extendedProps": {"disciplina": row['disciplina'], "capacidade": row['capacidade']},
+                "backgroundColor": "#FF4B4B" if row['turno'] == 'Noturno' else "#3DD56D" if row['turno'] == 'Matutino' else "#FFC107"
+            })
+    return events
+
+def cronometrar(funcao, df, repeticoes):
+    """Melhor tempo (s) entre as repetições."""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(df)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da montagem de eventos do calendário.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'alocações':>10} | {'iterrows (s)':>12} | {'vetorizado (s)':>14} | {'ganho':>6}")
+    print("-" * 52)
+    for n in args.tamanhos:
+        df = gerar_alocacoes(n)
+        # Confere que as duas versões produzem os mesmos eventos
+        assert montar_eventos_iterrows(df.head(200)) == db.montar_eventos_calendario(df.head(200))
+        antigo = cronometrar(montar_eventos_iterrows, df, args.repeticoes)
+        novo = cronometrar(db.montar_eventos_calendario, df, args.repeticoes)
+        print(f"{n:>10} | {antigo:>12.3f} | {novo:>14.3f} | {antigo / novo:>5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Benchmark das funções do db_connection contra um Postgres local.
+
+Para cada escala, gera o campus sintético (benchmarks.gerador) e mede as
+leituras dos portais e do painel - com cache frio (cache do processo limpo
+antes de cada chamada) e quente - as listas da Nova Alocação em sequência e
+em paralelo, as matrizes de utilização das salas, a gravação de uma alocação e o login.
+O resultado vai para um JSON em benchmarks/resultados/ e pode ser comparado
+com uma execução anterior.
+
+ATENÇÃO: apaga e recria as tabelas do banco configurado (POSTGRES_URL).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_db --confirmar [--escalas pequeno medio] [--repeticoes 30]
+                                  [--comparar benchmarks/resultados/anterior.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from statistics import mean, quantiles
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import gerador
+from database import db_connection as db
+from database import ocupacao
+from database import utilizacao
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+REPETICOES_LOGIN = 10  # bcrypt é lento de propósito
+
+# ==============================================================================
+# 1. MEDIÇÃO
+# ==============================================================================
+
+def _estatisticas(tempos_ms):
+    ordenados = sorted(tempos_ms)
+    cortes = quantiles(ordenados, n=100, method="inclusive") if len(ordenados) > 1 else ordenados * 99
+    return {
+        "n": len(ordenados),
+        "min_ms": round(ordenados[0], 3),
+        "p50_ms": round(cortes[49], 3),
+        "p95_ms": round(cortes[94], 3),
+        "max_ms": round(ordenados[-1], 3),
+        "media_ms": round(mean(ordenados), 3),
+    }
+
+def _medir(funcao, argumentos, frio=False, depois=None):
+    """
+    Chama funcao(*args) para cada args. Só a chamada é cronometrada.
+    frio=True limpa o cache antes de cada chamada; senão todos os args são chamados uma vez antes (aquecimento).
+    """
+    if not frio and depois is None:
+        for args in set(argumentos):
+            funcao(*args)
+    tempos = []
+    for args in argumentos:
+        if frio:
+            db.limpar_cache()
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        if depois:
+            depois(resultado, *args)
+    return _estatisticas(tempos)
+
+def _alocacoes_livres(rnd, quantidade):
+    """Sorteia (dados_aula, turmas) em horários livres, usando o índice de ocupação."""
+    retrato = ocupacao.retrato()
+    salas = db.run_query("SELECT id_sala FROM tb_salas")["id_sala"].tolist()
+    docentes = db.run_query("SELECT id_docente FROM tb_docentes")["id_docente"].tolist()
+    turmas = db.run_query("SELECT id_turma FROM tb_turmas")["id_turma"].tolist()
+    disciplinas = db.run_query("SELECT id_disciplina FROM tb_disciplinas")["id_disciplina"].tolist()
+
+    livres = []
+    while len(livres) < quantidade:
+        dia, turno = rnd.choice(gerador.DIAS), rnd.choice(gerador.TURNOS)
+        slot = retrato.get((dia, turno), {"salas": set(), "docentes": set(), "turmas": set()})
+        sala = next((s for s in rnd.sample(salas, len(salas)) if s not in slot["salas"]), None)
+        docente = next((d for d in rnd.sample(docentes, len(docentes)) if d not in slot["docentes"]), None)
+        turma = next((t for t in rnd.sample(turmas, len(turmas)) if t not in slot["turmas"]), None)
+        if None in (sala, docente, turma):
+            continue
+        dados = {
+            "dia": dia, "turno": turno, "modalidade": "Presencial",
+            "id_sala": int(sala), "id_docente": int(docente), "id_disciplina": int(rnd.choice(disciplinas)),
+        }
+        livres.append((dados, [int(turma)]))
+    return livres
+
+def _desfazer_alocacao(resultado, dados, turmas):
+    """Apaga a alocação recém-criada para o banco voltar ao estado gerado."""
+    df = db.run_query(
+        "SELECT MAX(id_alocacao) AS id FROM tb_alocacoes WHERE dia_semana = %s AND turno = %s AND id_sala = %s",
+        params=(dados["dia"], dados["turno"], dados["id_sala"]),
+    )
+    if resultado[0] and not df.empty:
+        db.deletar_alocacao(int(df.iloc[0]["id"]))
+
+# As listas independentes da página Nova Alocação do painel
+_LISTAS_NOVA_ALOCACAO = {
+    "docentes": "SELECT id_docente, nome FROM tb_docentes ORDER BY nome",
+    "cursos": "SELECT id_curso, nome FROM tb_cursos ORDER BY nome",
+    "salas": "SELECT id_sala, nome, capacidade FROM tb_salas ORDER BY nome",
+    "turmas": """
+        SELECT t.id_turma, t.identificacao, c.nome as curso, t.qtd_alunos
+        FROM tb_turmas t JOIN tb_cursos c ON t.id_curso = c.id_curso
+        ORDER BY c.nome, t.identificacao
+    """,
+}
+
+def _listas_em_sequencia():
+    return {nome: db.run_query_cached(sql) for nome, sql in _LISTAS_NOVA_ALOCACAO.items()}
+
+def _listas_em_paralelo():
+    return db.run_queries_cached(_LISTAS_NOVA_ALOCACAO)
+
+def rodar_escala(escala, repeticoes, semente=42):
+    contagens = gerador.carregar(escala, semente)
+    db.limpar_cache()
+    rnd = random.Random(semente)
+
+    turmas = db.run_query("SELECT id_turma FROM tb_turmas")["id_turma"].tolist()
+    docentes = db.run_query("SELECT id_docente FROM tb_docentes")["id_docente"].tolist()
+    args_turmas = [(int(rnd.choice(turmas)),) for _ in range(repeticoes)]
+    args_docentes = [(int(rnd.choice(docentes)),) for _ in range(repeticoes)]
+    args_dias = [(rnd.choice(gerador.DIAS),) for _ in range(repeticoes)]
+    usuario, senha, _ = gerador.USUARIO_BENCH
+
+    resultados = {}
+    resultados["get_grade_do_aluno (frio)"] = _medir(db.get_grade_do_aluno, args_turmas, frio=True)
+    resultados["get_grade_do_aluno (cache)"] = _medir(db.get_grade_do_aluno, args_turmas)
+    resultados["get_grade_do_professor (frio)"] = _medir(db.get_grade_do_professor, args_docentes, frio=True)
+    resultados["get_grade_do_professor (cache)"] = _medir(db.get_grade_do_professor, args_docentes)
+    resultados["get_dados_calendario"] = _medir(db.get_dados_calendario, [()] * repeticoes)
+    resultados["get_grade_geral (todos, frio)"] = _medir(db.get_grade_geral, [()] * repeticoes, frio=True)
+    resultados["get_grade_geral (dia, frio)"] = _medir(db.get_grade_geral, args_dias, frio=True)
+    resultados["listas Nova Alocação (sequencial, frio)"] = _medir(_listas_em_sequencia, [()] * repeticoes, frio=True)
+    resultados["listas Nova Alocação (paralelo, frio)"] = _medir(_listas_em_paralelo, [()] * repeticoes, frio=True)
+    resultados["utilizacao.get_matrizes (frio)"] = _medir(utilizacao.get_matrizes, [()] * repeticoes, frio=True)
+    resultados["criar_alocacao_completa"] = _medir(
+        db.criar_alocacao_completa, _alocacoes_livres(rnd, repeticoes), depois=_desfazer_alocacao
+    )
+    resultados["verificar_login"] = _medir(
+        db.verificar_login, [(usuario, senha)] * min(repeticoes, REPETICOES_LOGIN)
+    )
+    return {"contagens": contagens, "casos": resultados}
+
+# ==============================================================================
+# 2. RESULTADOS E COMPARAÇÃO
+# ==============================================================================
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(PASTA_RESULTADOS)).stdout.strip() or None
+    except OSError:
+        return None
+
+def salvar(relatorio, caminho=None):
+    if caminho is None:
+        os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+        caminho = os.path.join(PASTA_RESULTADOS, f"bench_db_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    return caminho
+
+def comparar(atual, anterior):
+    """Imprime a variação do p50 de cada caso em relação a uma execução anterior."""
+    print(f"\nComparação com {anterior['meta'].get('commit')} ({anterior['meta'].get('data')}):")
+    for escala, dados in atual["escalas"].items():
+        antes = anterior["escalas"].get(escala)
+        if not antes:
+            continue
+        print(f"  [{escala}]")
+        for caso, stats in dados["casos"].items():
+            base = antes["casos"].get(caso)
+            if not base or not base["p50_ms"]:
+                continue
+            razao = stats["p50_ms"] / base["p50_ms"]
+            marca = "🔴" if razao > 1.2 else "🟢" if razao < 0.8 else "  "
+            print(f"  {marca} {caso:<40} {base['p50_ms']:>9.2f} -> {stats['p50_ms']:>9.2f} ms ({razao:.2f}x)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das funções do db_connection (APAGA o banco configurado).")
+    parser.add_argument("--escalas", nargs="+", choices=list(gerador.ESCALAS), default=["pequeno", "medio"])
+    parser.add_argument("--repeticoes", type=int, default=30)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Arquivo JSON de resultado (padrão: benchmarks/resultados/).")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar.")
+    parser.add_argument("--confirmar", action="store_true", help="Confirma que o banco pode ser apagado.")
+    args = parser.parse_args(argv)
+
+    if not args.confirmar:
+        print("⚠️  Este benchmark apaga todas as tabelas do banco configurado. Rode de novo com --confirmar.")
+        return 1
+
+    relatorio = {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit_atual(),
+            "python": platform.python_version(),
+            "semente": args.semente,
+            "repeticoes": args.repeticoes,
+        },
+        "escalas": {},
+    }
+    for escala in args.escalas:
+        print(f"\n▶ Escala '{escala}'")
+        dados = rodar_escala(escala, args.repeticoes, args.semente)
+        relatorio["escalas"][escala] = dados
+        print(f"  {'caso':<40} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9}")
+        for caso, stats in dados["casos"].items():
+            print(f"  {caso:<40} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['max_ms']:>9.2f}")
+
+    print(f"\n💾 Resultado salvo em {salvar(relatorio, args.saida)}")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(relatorio, json.load(arquivo))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
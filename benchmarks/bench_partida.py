@@ -0,0 +1,122 @@
+"""
+Perfil de partida: quanto custa importar os módulos do SGA num processo novo.
+
+Cada módulo é importado em processos Python novos com "-X importtime"; medimos
+o tempo acumulado do import (mediana das repetições) e listamos as dependências
+mais caras que ele puxa. Não acessa o banco. O resultado vai para um JSON em
+benchmarks/resultados/ e pode ser comparado com uma execução anterior; com
+--raiz o perfil é feito em outro checkout (ex: um "git worktree" de um commit antigo).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_partida [--repeticoes 5] [--comparar benchmarks/resultados/anterior.json]
+    python -m benchmarks.bench_partida --raiz ../sga_antigo --saida antes.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from statistics import median
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_db import PASTA_RESULTADOS, _commit_atual
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS = [
+    "database.db_connection",
+    "database.criar_usuario",
+    "database.migrar",
+    "database.importacao",
+    "database.autenticacao",
+]
+TOP_DEPENDENCIAS = 5
+
+def _importtime(modulo, raiz):
+    """[(nome, profundidade, acumulado_us)] do import de 'modulo' num processo novo, na ordem do -X importtime."""
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=raiz, capture_output=True, text=True, check=True,
+    ).stderr
+    tempos = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, nome = linha[len("import time:"):].split("|")
+        profundidade = (len(nome) - len(nome.lstrip())) // 2
+        tempos.append((nome.strip(), profundidade, int(acumulado)))
+    return tempos
+
+def _dependencias_diretas(tempos, modulo):
+    """Filhos diretos de 'modulo': o -X importtime lista os filhos logo antes do pai."""
+    posicao = max(i for i, (nome, _, _) in enumerate(tempos) if nome == modulo)
+    nivel = tempos[posicao][1]
+    diretas = []
+    for nome, profundidade, acumulado in reversed(tempos[:posicao]):
+        if profundidade <= nivel:
+            break
+        if profundidade == nivel + 1:
+            diretas.append((nome, acumulado / 1000))
+    return sorted(diretas, key=lambda item: item[1], reverse=True)
+
+def perfilar(modulo, repeticoes, raiz=RAIZ):
+    rodadas = [_importtime(modulo, raiz) for _ in range(repeticoes)]
+    total_ms = median(next(us for nome, _, us in r if nome == modulo) for r in rodadas) / 1000
+    diretas = _dependencias_diretas(rodadas[-1], modulo)
+    return {
+        "import_ms": round(total_ms, 1),
+        "dependencias_ms": {nome: round(ms, 1) for nome, ms in diretas[:TOP_DEPENDENCIAS]},
+    }
+
+def comparar(atual, anterior):
+    print(f"\nComparação com {anterior['meta'].get('commit')} ({anterior['meta'].get('data')}):")
+    for modulo, dados in atual["modulos"].items():
+        base = anterior["modulos"].get(modulo)
+        if not base or not base["import_ms"]:
+            continue
+        razao = dados["import_ms"] / base["import_ms"]
+        marca = "🔴" if razao > 1.2 else "🟢" if razao < 0.8 else "  "
+        print(f"  {marca} {modulo:<26} {base['import_ms']:>8.1f} -> {dados['import_ms']:>8.1f} ms ({razao:.2f}x)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo de import dos módulos do SGA.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--modulos", nargs="+", default=MODULOS)
+    parser.add_argument("--raiz", default=RAIZ, help="Checkout a perfilar (padrão: este).")
+    parser.add_argument("--saida", help="Arquivo JSON de resultado (padrão: benchmarks/resultados/).")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar.")
+    args = parser.parse_args(argv)
+
+    relatorio = {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit_atual() if args.raiz == RAIZ else os.path.abspath(args.raiz),
+            "python": platform.python_version(),
+            "repeticoes": args.repeticoes,
+        },
+        "modulos": {},
+    }
+    print(f"  {'módulo':<26} {'import (ms)':>11}   dependências mais caras")
+    for modulo in args.modulos:
+        dados = perfilar(modulo, args.repeticoes, args.raiz)
+        relatorio["modulos"][modulo] = dados
+        deps = ", ".join(f"{nome} {ms:.0f}" for nome, ms in dados["dependencias_ms"].items())
+        print(f"  {modulo:<26} {dados['import_ms']:>11.1f}   {deps}")
+
+    if args.saida is None:
+        os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+        args.saida = os.path.join(PASTA_RESULTADOS, f"bench_partida_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultado salvo em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(relatorio, json.load(arquivo))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Memória e tempo de partida: três processos (um por portal) x app multipágina.
+
+Cada cenário roda em processos Python novos que renderizam as páginas pela
+primeira vez com o AppTest do Streamlit (mesmo caminho de import/execução do
+servidor, sem navegador). Medimos o tempo do spawn até o fim da renderização
+e o pico de memória (RSS) de cada processo.
+
+- separado: um processo por página (o que o index.py --modo separado sobe).
+- unico: um processo renderizando as três páginas pelo app.py.
+
+Uso (a partir da raiz do projeto; precisa do banco configurado):
+    python -m benchmarks.bench_processos [--repeticoes 3] [--saida resultado.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from statistics import median
+
+try:
+    import resource  # Só em Unix
+except ImportError:
+    resource = None
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGINAS = ["apps/admin.py", "apps/portal_aluno.py", "apps/portal_docente.py"]
+
+def _pico_rss_mb():
+    """Pico de RSS deste processo em MB: getrusage no Unix, psutil (peak_wset) no Windows."""
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024  # macOS: bytes; Linux: KB
+    try:
+        import psutil
+    except ImportError:
+        raise RuntimeError("Para medir a memória nesta plataforma instale o psutil (pip install psutil).")
+    memoria = psutil.Process().memory_info()
+    return getattr(memoria, "peak_wset", memoria.rss) / (1024 * 1024)
+
+def _worker(modo, paginas):
+    """Roda dentro do processo medido: renderiza as páginas e imprime o pico de RSS (MB)."""
+    sys.path.append(RAIZ)
+    from streamlit.testing.v1 import AppTest
+
+    if modo == "unico":
+        teste = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=120).run()
+        for pagina in paginas:
+            teste.switch_page(pagina).run()
+    else:
+        AppTest.from_file(os.path.join(RAIZ, paginas[0]), default_timeout=120).run()
+
+    print(json.dumps({"rss_mb": round(_pico_rss_mb(), 1)}))
+
+def _medir_processo(modo, paginas):
+    inicio = time.perf_counter()
+    saida = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_processos", "--worker", modo, *paginas],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    )
+    segundos = time.perf_counter() - inicio
+    ultima = [linha for linha in saida.stdout.splitlines() if linha.startswith("{")][-1]
+    return segundos, json.loads(ultima)["rss_mb"]
+
+def medir_separado():
+    """Três processos em paralelo, como no deploy com um processo por portal."""
+    inicio = time.perf_counter()
+    processos = [
+        subprocess.Popen([sys.executable, "-m", "benchmarks.bench_processos", "--worker", "separado", pagina],
+                         cwd=RAIZ, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for pagina in PAGINAS
+    ]
+    rss = []
+    for processo in processos:
+        saida, _ = processo.communicate()
+        ultima = [linha for linha in saida.splitlines() if linha.startswith("{")][-1]
+        rss.append(json.loads(ultima)["rss_mb"])
+    return time.perf_counter() - inicio, sum(rss), rss
+
+def medir_unico():
+    segundos, rss = _medir_processo("unico", PAGINAS)
+    return segundos, rss, [rss]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara memória e partida: 3 processos x app multipágina.")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", help="Arquivo JSON com o resultado.")
+    parser.add_argument("--worker", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        _worker(args.worker[0], args.worker[1:])
+        return 0
+
+    resultado = {}
+    for nome, medir in (("separado", medir_separado), ("unico", medir_unico)):
+        rodadas = [medir() for _ in range(args.repeticoes)]
+        resultado[nome] = {
+            "partida_s": round(median(r[0] for r in rodadas), 2),
+            "rss_total_mb": round(median(r[1] for r in rodadas), 1),
+            "rss_por_processo_mb": rodadas[-1][2],
+        }
+
+    print(f"{'cenário':<10} | {'processos':>9} | {'partida (s)':>11} | {'RSS total (MB)':>14}")
+    print("-" * 54)
+    for nome, r in resultado.items():
+        print(f"{nome:<10} | {len(r['rss_por_processo_mb']):>9} | {r['partida_s']:>11.2f} | {r['rss_total_mb']:>14.1f}")
+    sep, uni = resultado["separado"], resultado["unico"]
+    print(f"\nMemória: {uni['rss_total_mb'] / sep['rss_total_mb']:.0%} do cenário separado "
+          f"({sep['rss_total_mb'] - uni['rss_total_mb']:.0f} MB a menos)")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Gerador de campi sintéticos para os benchmarks.
+
+Cria, com semente fixa, um campus completo: salas (teóricas, laboratórios e
+auditórios), docentes, cursos, semestres, turmas, disciplinas e a grade de
+alocações - sem choques de sala/docente/turma e com uma fração de aulas
+unificadas (várias turmas do mesmo curso/semestre na mesma sala). Tudo é
+carregado com COPY e as grades materializadas são reconstruídas no final.
+
+ATENÇÃO: apaga e recria (pelas migrações) as tabelas do banco configurado (POSTGRES_URL).
+Use só com um Postgres local de testes.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.gerador --escala medio [--semente 42] --confirmar
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+
+import bcrypt
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_connection as db
+from database import migrar
+
+ESCALAS = {
+    #            salas  docentes  cursos  turmas  disciplinas  fração de salas ocupadas por horário
+    "pequeno": {"salas": 40, "docentes": 90, "cursos": 6, "turmas": 150, "disciplinas": 240, "ocupacao": 0.55},
+    "medio": {"salas": 150, "docentes": 420, "cursos": 20, "turmas": 650, "disciplinas": 1000, "ocupacao": 0.65},
+    "grande": {"salas": 500, "docentes": 1500, "cursos": 60, "turmas": 2600, "disciplinas": 4000, "ocupacao": 0.75},
+}
+SEMESTRES = 10
+FRACAO_UNIFICADAS = 0.15  # Aulas com 2-3 turmas juntas
+USUARIO_BENCH = ("admin", "admin", "Administrador")
+
+DIAS = list(db.MAP_DIAS)
+TURNOS = list(db.MAP_HORARIOS)
+
+# O esquema vem das migrações (database/migracoes); aqui só se apaga o que existir
+_DROP = """
+    DROP TABLE IF EXISTS tb_migracoes, tb_grade_turma, tb_grade_docente, tb_alocacao_turmas, tb_alocacoes,
+        tb_alocacao_turmas_arquivo, tb_alocacoes_arquivo, tb_periodos,
+        tb_disciplinas, tb_turmas, tb_semestres, tb_cursos, tb_docentes, tb_salas, tb_usuarios CASCADE
+"""
+
+_TABELAS = [
+    "tb_salas", "tb_docentes", "tb_cursos", "tb_semestres", "tb_turmas",
+    "tb_disciplinas", "tb_alocacoes", "tb_alocacao_turmas", "tb_usuarios",
+]
+
+_NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Heitor", "Isabela", "João",
+          "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sabrina", "Tiago", "Vanessa", "Wagner"]
+_SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa", "Almeida", "Ferreira",
+               "Rodrigues", "Gomes", "Martins", "Araújo", "Barbosa", "Ribeiro", "Carvalho", "Rocha", "Mendes"]
+_CURSOS = ["Direito", "Administração", "Enfermagem", "Engenharia Civil", "Psicologia", "Pedagogia",
+           "Ciências Contábeis", "Arquitetura", "Fisioterapia", "Nutrição", "Engenharia de Software",
+           "Medicina Veterinária", "Farmácia", "Educação Física", "Odontologia", "Biomedicina"]
+_AREAS = ["Fundamentos", "Tópicos", "Laboratório", "Seminários", "Práticas", "Teoria", "Projeto", "Estudos"]
+
+# ==============================================================================
+# 1. GERAÇÃO (EM MEMÓRIA, DETERMINÍSTICA)
+# ==============================================================================
+
+def gerar(escala="pequeno", semente=42):
+    """Gera o campus em memória. Retorna {tabela: lista de tuplas (com ids)}."""
+    cfg = ESCALAS[escala]
+    rnd = random.Random(semente)
+
+    salas = []
+    for i in range(1, cfg["salas"] + 1):
+        tipo = rnd.choices(["Teorica", "Laboratorio", "Auditorio"], weights=[75, 20, 5])[0]
+        capacidade = {
+            "Teorica": rnd.choice([30, 40, 50, 60, 70]),
+            "Laboratorio": rnd.choice([20, 25, 30, 40]),
+            "Auditorio": rnd.choice([100, 150, 200]),
+        }[tipo]
+        salas.append((i, f"Bloco {chr(65 + (i - 1) // 100 % 26)} - Sala {100 + (i - 1) % 100}", capacidade, tipo))
+
+    docentes = []
+    for i in range(1, cfg["docentes"] + 1):
+        nome = f"{rnd.choice(_NOMES)} {rnd.choice(_SOBRENOMES)} {rnd.choice(_SOBRENOMES)} ({i})"
+        docentes.append((i, nome, f"docente{i}@anhanguera.edu.br"))
+
+    cursos = []
+    for i in range(1, cfg["cursos"] + 1):
+        base = _CURSOS[(i - 1) % len(_CURSOS)]
+        campus = (i - 1) // len(_CURSOS)
+        cursos.append((i, base if campus == 0 else f"{base} - Campus {campus + 1}"))
+
+    semestres = [(i, f"{i}º Semestre") for i in range(1, SEMESTRES + 1)]
+
+    # Turmas: distribuídas por curso e semestre (A, B, C... no mesmo curso/semestre)
+    turmas, por_grupo = [], {}
+    for i in range(1, cfg["turmas"] + 1):
+        id_curso = rnd.randint(1, cfg["cursos"])
+        id_semestre = rnd.randint(1, SEMESTRES)
+        grupo = por_grupo.setdefault((id_curso, id_semestre), [])
+        letra = chr(65 + len(grupo) % 26)
+        identificacao = f"C{id_curso:02d}S{id_semestre:02d}{letra}{len(grupo) // 26 or ''}"
+        turmas.append((i, identificacao, rnd.randint(15, 65), id_curso, id_semestre))
+        grupo.append(i)
+
+    disciplinas, por_curso = [], {}
+    for i in range(1, cfg["disciplinas"] + 1):
+        id_curso = rnd.randint(1, cfg["cursos"])
+        disciplinas.append((i, f"{rnd.choice(_AREAS)} de {cursos[id_curso - 1][1]} {i}", id_curso))
+        por_curso.setdefault(id_curso, []).append(i)
+
+    # Grade: em cada horário, uma fração das salas recebe aula sem choques
+    curso_da_turma = {t[0]: t[3] for t in turmas}
+    grupo_da_turma = {t[0]: (t[3], t[4]) for t in turmas}
+    alocacoes, vinculos = [], []
+    for dia in DIAS:
+        for turno in TURNOS:
+            livres_docentes = list(range(1, cfg["docentes"] + 1))
+            rnd.shuffle(livres_docentes)
+            livres_turmas = list(range(1, cfg["turmas"] + 1))
+            rnd.shuffle(livres_turmas)
+            ocupadas = set()
+            for sala in rnd.sample(salas, int(len(salas) * cfg["ocupacao"])):
+                while livres_turmas and livres_turmas[-1] in ocupadas:
+                    livres_turmas.pop()
+                if not livres_docentes or not livres_turmas:
+                    break
+                id_turma = livres_turmas.pop()
+                grupo = [id_turma]
+                if rnd.random() < FRACAO_UNIFICADAS:
+                    irmas = [t for t in por_grupo[grupo_da_turma[id_turma]] if t != id_turma and t not in ocupadas]
+                    grupo += rnd.sample(irmas, min(len(irmas), rnd.randint(1, 2)))
+                ocupadas.update(grupo)
+
+                id_curso = curso_da_turma[id_turma]
+                id_disciplina = rnd.choice(por_curso.get(id_curso) or [rnd.randint(1, cfg["disciplinas"])])
+                modalidade = rnd.choices(["Presencial", "Hibrido", "Semipresencial", "EAD"], weights=[80, 10, 7, 3])[0]
+                id_alocacao = len(alocacoes) + 1
+                hora_inicio, hora_fim = db.MAP_HORARIOS[turno]["start"], db.MAP_HORARIOS[turno]["end"]
+                alocacoes.append((id_alocacao, dia, turno, hora_inicio, hora_fim, modalidade, sala[0],
+                                  livres_docentes.pop(), id_disciplina))
+                vinculos.extend((id_alocacao, t) for t in grupo)
+
+    return {
+        "tb_salas": salas, "tb_docentes": docentes, "tb_cursos": cursos, "tb_semestres": semestres,
+        "tb_turmas": turmas, "tb_disciplinas": disciplinas,
+        "tb_alocacoes": alocacoes, "tb_alocacao_turmas": vinculos,
+    }
+
+# ==============================================================================
+# 2. CARGA NO BANCO
+# ==============================================================================
+
+_COLUNAS = {
+    "tb_salas": "id_sala, nome, capacidade, tipo",
+    "tb_docentes": "id_docente, nome, email",
+    "tb_cursos": "id_curso, nome",
+    "tb_semestres": "id_semestre, descricao",
+    "tb_turmas": "id_turma, identificacao, qtd_alunos, id_curso, id_semestre",
+    "tb_disciplinas": "id_disciplina, nome, id_curso",
+    "tb_alocacoes": "id_alocacao, dia_semana, turno, hora_inicio, hora_fim, modalidade, id_sala, id_docente, id_disciplina",
+    "tb_alocacao_turmas": "id_alocacao, id_turma",
+}
+
+def _copiar(cursor, tabela, linhas):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(linhas)
+    buf.seek(0)
+    cursor.copy_expert(f"COPY {tabela} ({_COLUNAS[tabela]}) FROM STDIN WITH (FORMAT csv)", buf)
+
+def carregar(escala="pequeno", semente=42):
+    """Recria as tabelas (pelas migrações) e carrega o campus gerado. Retorna {tabela: nº de linhas}."""
+    dados = gerar(escala, semente)
+    conn = db.get_connection()
+    if not conn:
+        raise RuntimeError("Sem conexão com o banco.")
+    cursor = conn.cursor()
+    try:
+        cursor.execute(_DROP)
+        conn.commit()
+        migrar.aplicar()
+        for tabela, linhas in dados.items():
+            _copiar(cursor, tabela, linhas)
+            id_coluna = _COLUNAS[tabela].split(",")[0]
+            if tabela != "tb_alocacao_turmas":
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{tabela}', '{id_coluna}'), GREATEST(MAX({id_coluna}), 1)) FROM {tabela}"
+                )
+        usuario, senha, nome = USUARIO_BENCH
+        hash_senha = bcrypt.hashpw(senha.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        cursor.execute("INSERT INTO tb_usuarios (usuario, senha_hash, nome) VALUES (%s, %s, %s)", (usuario, hash_senha, nome))
+
+        # Grades materializadas dos portais, já preenchidas
+        db.reconstruir_grades_materializadas(cursor)
+        db.publicar_alteracao(cursor, _TABELAS + db.TABELAS_GRADE)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    db.invalidar_tabelas(_TABELAS + db.TABELAS_GRADE)
+    return {tabela: len(linhas) for tabela, linhas in dados.items()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um campus sintético no banco configurado (APAGA os dados).")
+    parser.add_argument("--escala", choices=list(ESCALAS), default="pequeno")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--confirmar", action="store_true", help="Confirma que o banco pode ser apagado.")
+    args = parser.parse_args(argv)
+
+    if not args.confirmar:
+        print("⚠️  Este comando apaga todas as tabelas do banco configurado. Rode de novo com --confirmar.")
+        return 1
+    inicio = time.perf_counter()
+    contagens = carregar(args.escala, args.semente)
+    for tabela, n in contagens.items():
+        print(f"  {tabela:<20} {n:>8}")
+    print(f"✅ Campus '{args.escala}' (semente {args.semente}) gerado em {time.perf_counter() - inicio:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Agendador automático: distribui uma demanda inteira do semestre em
+(sala, dia_semana, turno) sem conflitos.
+
+Estratégia: guloso + reparo.
+1. As aulas mais difíceis (menos salas possíveis, mais alunos) são colocadas
+   primeiro, cada uma no horário/sala de melhor encaixe (menor sobra de lugares).
+2. As aulas que sobraram tentam "empurrar" uma aula já colocada pelo próprio
+   plano para outro horário, liberando a sala que precisam.
+
+Nada é gravado em resolver(): o plano pode ser pré-visualizado (dry-run) e
+depois gravado numa única transação com gravar_plano().
+"""
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from database import db_connection as db
+from database import ocupacao
+from database import recomendacao
+
+DIAS_SEMANA = ["Segunda", "Terca", "Quarta", "Quinta", "Sexta", "Sabado"]
+TURNOS = ["Matutino", "Vespertino", "Noturno"]
+HORARIOS = [(dia, turno) for dia in DIAS_SEMANA for turno in TURNOS]
+
+# Limites do reparo: aulas "empurradas" testadas por aula não colocada e no total.
+# Com a grade lotada o reparo não tem como dar certo; o orçamento evita que ele
+# domine o tempo de resolução.
+MAX_TENTATIVAS_REPARO = 50
+ORCAMENTO_REPARO = 20000
+
+# ==============================================================================
+# 1. DADOS DE APOIO
+# ==============================================================================
+
+def _carregar_salas():
+    """Salas agrupadas por tipo, ordenadas por capacidade: {tipo: (capacidades, ids)}."""
+    return recomendacao.get_indice_salas()["por_tipo"]
+
+def _carregar_alunos_por_turma():
+    df = db.run_query_cached("SELECT id_turma, qtd_alunos FROM tb_turmas")
+    return {int(t): int(q or 0) for t, q in df.itertuples(index=False, name=None)}
+
+# ==============================================================================
+# 2. ESTADO DA GRADE DURANTE A RESOLUÇÃO
+# ==============================================================================
+
+class _Grade:
+    """Ocupação existente + aulas colocadas pelo plano em construção."""
+
+    def __init__(self, ocupacao_atual):
+        self.salas = defaultdict(set)
+        self.docentes = defaultdict(set)
+        self.turmas = defaultdict(set)
+        for horario, slot in ocupacao_atual.items():
+            self.salas[horario] |= slot["salas"]
+            self.docentes[horario] |= slot["docentes"]
+            self.turmas[horario] |= slot["turmas"]
+        self.carga = Counter({h: len(self.salas[h]) for h in HORARIOS})
+        self.dono = {}       # (horario, id_sala) -> índice da demanda colocada pelo plano
+        self.posicao = {}    # índice da demanda -> (horario, id_sala)
+
+    def pessoas_livres(self, demanda, horario):
+        if demanda["id_docente"] in self.docentes[horario]:
+            return False
+        return not any(t in self.turmas[horario] for t in demanda["turmas"])
+
+    def ocupar(self, i, demanda, horario, id_sala):
+        self.salas[horario].add(id_sala)
+        self.docentes[horario].add(demanda["id_docente"])
+        self.turmas[horario].update(demanda["turmas"])
+        self.carga[horario] += 1
+        self.dono[(horario, id_sala)] = i
+        self.posicao[i] = (horario, id_sala)
+
+    def liberar(self, i, demanda):
+        horario, id_sala = self.posicao.pop(i)
+        del self.dono[(horario, id_sala)]
+        self.salas[horario].discard(id_sala)
+        self.docentes[horario].discard(demanda["id_docente"])
+        self.turmas[horario].difference_update(demanda["turmas"])
+        self.carga[horario] -= 1
+
+# ==============================================================================
+# 3. RESOLUÇÃO
+# ==============================================================================
+
+def _primeira_sala_livre(capacidades, ids, inicio, ocupadas):
+    """Menor sala (capacidade >= alunos) ainda livre no horário."""
+    for j in range(inicio, len(ids)):
+        if ids[j] not in ocupadas:
+            return j
+    return None
+
+def _melhor_posicao(demanda, grade, salas):
+    """Escolhe o (horario, sala) de menor sobra de lugares; empate -> horário menos carregado."""
+    capacidades, ids = salas
+    inicio = bisect_left(capacidades, demanda["alunos"])
+    melhor, melhor_nota = None, None
+    for horario in HORARIOS:
+        if not grade.pessoas_livres(demanda, horario):
+            continue
+        j = _primeira_sala_livre(capacidades, ids, inicio, grade.salas[horario])
+        if j is None:
+            continue
+        nota = (capacidades[j] - demanda["alunos"], grade.carga[horario])
+        if melhor_nota is None or nota < melhor_nota:
+            melhor, melhor_nota = (horario, ids[j]), nota
+    return melhor
+
+def _reparar(i, demandas, grade, indice_salas, orcamento):
+    """Tenta liberar uma sala para a demanda i movendo uma aula do próprio plano."""
+    demanda = demandas[i]
+    capacidades, ids = indice_salas[demanda["tipo_sala"]]
+    inicio = bisect_left(capacidades, demanda["alunos"])
+    tentativas = 0
+    for horario in HORARIOS:
+        if not grade.pessoas_livres(demanda, horario):
+            continue
+        for id_sala in ids[inicio:]:
+            outro = grade.dono.get((horario, id_sala))
+            if outro is None:
+                continue  # Livre (já teria sido escolhida) ou ocupada por aula existente
+            tentativas += 1
+            orcamento["restante"] -= 1
+            if tentativas > MAX_TENTATIVAS_REPARO or orcamento["restante"] < 0:
+                return False
+
+            grade.liberar(outro, demandas[outro])
+            grade.ocupar(i, demanda, horario, id_sala)
+            destino = _melhor_posicao(demandas[outro], grade, indice_salas[demandas[outro]["tipo_sala"]])
+            if destino:
+                grade.ocupar(outro, demandas[outro], *destino)
+                return True
+            # Não deu: desfaz a troca
+            grade.liberar(i, demanda)
+            grade.ocupar(outro, demandas[outro], horario, id_sala)
+    return False
+
+def resolver(demandas):
+    """
+    Distribui as demandas na grade sem gravar nada (dry-run).
+
+    Cada demanda: {"id_disciplina", "id_docente", "turmas": [ids],
+                   "tipo_sala": str ou None, "modalidade"}.
+    Retorna {"alocadas": [aula, ...], "pendentes": [(demanda, motivo), ...]},
+    onde cada aula já está no formato de db.criar_alocacoes_em_lote.
+    """
+    indice_salas = _carregar_salas()
+    alunos_por_turma = _carregar_alunos_por_turma()
+    grade = _Grade(ocupacao.retrato())
+
+    normalizadas = []
+    for d in demandas:
+        turmas = list(dict.fromkeys(int(t) for t in d["turmas"]))  # Sem repetição
+        normalizadas.append({
+            **d,
+            "id_docente": int(d["id_docente"]),
+            "turmas": turmas,
+            "tipo_sala": d.get("tipo_sala") or None,
+            "alunos": sum(alunos_por_turma.get(t, 0) for t in turmas),
+        })
+
+    pendentes = []
+    possiveis = {}
+    for i, d in enumerate(normalizadas):
+        if d["tipo_sala"] not in indice_salas:
+            pendentes.append((demandas[i], f"Nenhuma sala do tipo '{d['tipo_sala']}'"))
+            continue
+        capacidades, _ = indice_salas[d["tipo_sala"]]
+        possiveis[i] = len(capacidades) - bisect_left(capacidades, d["alunos"])
+        if possiveis[i] == 0:
+            pendentes.append((demandas[i], f"Nenhuma sala comporta {d['alunos']} alunos"))
+            del possiveis[i]
+
+    # Mais difíceis primeiro: menos salas possíveis, depois mais alunos
+    ordem = sorted(possiveis, key=lambda i: (possiveis[i], -normalizadas[i]["alunos"]))
+
+    sem_lugar = []
+    for i in ordem:
+        d = normalizadas[i]
+        posicao = _melhor_posicao(d, grade, indice_salas[d["tipo_sala"]])
+        if posicao:
+            grade.ocupar(i, d, *posicao)
+        else:
+            sem_lugar.append(i)
+
+    orcamento = {"restante": ORCAMENTO_REPARO}
+    for i in sem_lugar:
+        if not _reparar(i, normalizadas, grade, indice_salas, orcamento):
+            pendentes.append((demandas[i], "Sem horário livre para docente/turmas com sala adequada"))
+
+    alocadas = []
+    for i in sorted(grade.posicao):
+        (dia, turno), id_sala = grade.posicao[i]
+        d = normalizadas[i]
+        alocadas.append({
+            "dia": dia, "turno": turno, "modalidade": d.get("modalidade", "Presencial"),
+            "id_sala": id_sala, "id_docente": d["id_docente"],
+            "id_disciplina": int(d["id_disciplina"]), "turmas": d["turmas"],
+            "alunos": d["alunos"],
+        })
+    return {"alocadas": alocadas, "pendentes": pendentes}
+
+def gravar_plano(plano):
+    """Grava todas as aulas do plano numa única transação."""
+    return db.criar_alocacoes_em_lote(plano["alocadas"])
@@ -0,0 +1,288 @@
+"""
+API HTTP somente leitura das grades (JSON e iCal), ao lado dos portais.
+
+Alunos e docentes quase sempre só querem ver a grade no celular; cada visita ao
+portal do Streamlit abre uma sessão por websocket e roda a página inteira. Aqui
+é um GET simples, que celulares e proxies podem guardar em cache:
+
+    GET /api/cursos                       -> árvore curso/semestre/turma dos seletores
+    GET /api/cursos/<id>/turmas           -> turmas do curso
+    GET /api/docentes                     -> docentes
+    GET /api/turmas/<id>/grade[.ics]      -> grade da turma (JSON ou iCal)
+    GET /api/docentes/<id>/grade[.ics]    -> grade do docente (JSON ou iCal)
+    GET /saude                            -> health check (sem banco)
+
+O ETag é o hash do próprio corpo da resposta: só muda quando os dados do
+recurso mudam (uma aula de outra turma não invalida esta grade) e é o mesmo em
+todas as máquinas da API. As grades também têm Last-Modified, o maior
+atualizado_em das linhas do dono no banco (migração 0008). Os dados vêm do
+cache do db_connection, etiquetado por turma/docente e mantido em dia pelo
+ouvinte de avisos, que sobe junto com o servidor: uma requisição condicional
+(If-None-Match / If-Modified-Since) com dados inalterados recebe 304 sem
+consulta ao banco enquanto o recurso estiver no cache.
+
+Uso (a partir da raiz do projeto):
+    python -m database.api [--porta 8600] [--host 0.0.0.0]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Permite rodar como script a partir da raiz do projeto
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import avisos
+from database import db_connection as db
+from database import instrumentacao
+
+PORTA_PADRAO = int(db.carregar_config("SGA_API_PORTA", 8600))
+MAX_AGE = int(db.carregar_config("SGA_API_MAX_AGE", 30))   # Segundos que o cliente pode usar sem revalidar
+GZIP_MINIMO = 1024                                        # Bytes; respostas menores vão sem compressão
+
+# ==============================================================================
+# 1. RECURSOS
+# ==============================================================================
+
+# Cada recurso declara como carregar os dados. Os SQLs são os mesmos dos portais,
+# então API e páginas compartilham o cache.
+
+def _registros(df):
+    return df.to_dict(orient="records")
+
+def _grade_do_aluno(id_turma):
+    return _registros(db.consultar_cached(db.SQL_GRADE_DO_ALUNO, (id_turma,), rotulo="api/grade_do_aluno",
+                                          entidades={"tb_grade_turma": [id_turma]}))
+
+def _grade_do_professor(id_docente):
+    return _registros(db.consultar_cached(db.SQL_GRADE_DO_PROFESSOR, (id_docente,), rotulo="api/grade_do_professor",
+                                          entidades={"tb_grade_docente": [id_docente]}))
+
+def _turmas_por_curso(id_curso):
+    return _registros(db.consultar_cached(db.SQL_TURMAS_POR_CURSO, (id_curso,), rotulo="api/turmas_por_curso"))
+
+def _docentes():
+    return _registros(db.consultar_cached(db.SQL_DOCENTES, rotulo="api/docentes"))
+
+# (nome, padrão da rota, carregar(*ids)). As grades também saem em iCal (.ics).
+ROTAS = [
+    ("cursos", re.compile(r"^/api/cursos/?$"), db.get_hierarquia_cursos),
+    ("turmas_por_curso", re.compile(r"^/api/cursos/(\d+)/turmas/?$"), _turmas_por_curso),
+    ("docentes", re.compile(r"^/api/docentes/?$"), _docentes),
+    ("grade_do_aluno", re.compile(r"^/api/turmas/(\d+)/grade(\.ics)?$"), _grade_do_aluno),
+    ("grade_do_professor", re.compile(r"^/api/docentes/(\d+)/grade(\.ics)?$"), _grade_do_professor),
+]
+DONO_ICAL = {"grade_do_aluno": "turma", "grade_do_professor": "docente"}
+# Grade -> (tabela materializada, coluna do dono), de onde sai a data da última alteração
+GRADES = {"grade_do_aluno": ("tb_grade_turma", "id_turma"), "grade_do_professor": ("tb_grade_docente", "id_docente")}
+
+def alterado_em(nome, id_dono):
+    """Segundos (epoch) da última recomposição da grade no banco, ou None (lista ou grade vazia)."""
+    if nome not in GRADES:
+        return None
+    tabela, coluna = GRADES[nome]
+    df = db.consultar_cached(
+        f"SELECT EXTRACT(EPOCH FROM MAX(atualizado_em)) AS alterado_em FROM {tabela} WHERE {coluna} = %s",
+        (id_dono,), rotulo=f"api/{nome}/alterado_em", entidades={tabela: [id_dono]},
+    )
+    valor = df.iloc[0, 0] if not df.empty else None
+    return float(valor) if valor is not None and valor == valor else None  # NULL vira None/NaN
+
+def etag(corpo):
+    """Hash do corpo (antes do gzip): depende só dos dados, não de qual máquina respondeu."""
+    return '"' + hashlib.md5(corpo).hexdigest()[:20] + '"'
+
+def nao_modificado(cabecalhos, etag_atual, alterado):
+    """Regras do HTTP: If-None-Match tem precedência sobre If-Modified-Since."""
+    if_none_match = cabecalhos.get("If-None-Match")
+    if if_none_match:
+        candidatos = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+        return "*" in candidatos or etag_atual in candidatos
+    if_modified_since = cabecalhos.get("If-Modified-Since")
+    if if_modified_since and alterado is not None:
+        try:
+            desde = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(alterado) <= desde
+    return False
+
+# ==============================================================================
+# 2. ICAL
+# ==============================================================================
+
+def _escapar_ical(texto):
+    return (str(texto).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n"))
+
+def _dobrar_linha(linha):
+    """Linhas do iCal têm no máximo 75 octetos; as continuações começam com espaço."""
+    dados = linha.encode("utf-8")
+    if len(dados) <= 75:
+        return linha
+    partes, inicio = [], 0
+    while inicio < len(dados):
+        fim = min(inicio + (75 if not partes else 74), len(dados))
+        while fim < len(dados) and (dados[fim] & 0xC0) == 0x80:  # Não corta caractere UTF-8 ao meio
+            fim -= 1
+        partes.append(dados[inicio:fim].decode("utf-8"))
+        inicio = fim
+    return "\r\n ".join(partes)
+
+def montar_ical(grade, dono, id_dono, alterado):
+    """
+    Uma aula semanal recorrente (RRULE) por linha da grade. Datas em hora local
+    (sem fuso), ancoradas na semana da última alteração (alterado, em segundos,
+    vem do banco): o corpo só muda quando a grade muda, então o ETag continua valendo.
+    """
+    alterado = alterado or 0.0  # Grade vazia: nenhum evento usa as datas
+    local = datetime.fromtimestamp(alterado)
+    segunda = (local - timedelta(days=local.weekday())).date()
+    carimbo = datetime.fromtimestamp(alterado, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    linhas = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Anhanguera//SGA//PT-BR",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:Grade {'da turma' if dono == 'turma' else 'do docente'} {id_dono}",
+    ]
+    for i, aula in enumerate(grade):
+        dia = db.MAP_DIAS.get(aula["dia_semana"])
+        if dia is None or not aula.get("hora_inicio") or not aula.get("hora_fim"):
+            continue
+        data = (segunda + timedelta(days=dia)).strftime("%Y%m%d")
+        inicio = aula["hora_inicio"].replace(":", "") + "00"  # 'HH:MM' -> HHMMSS
+        fim = aula["hora_fim"].replace(":", "") + "00"
+        detalhe = aula.get("professor") or aula.get("turmas_unificadas") or ""
+        descricao = f"{detalhe} - {aula['modalidade']}"
+        linhas += [
+            "BEGIN:VEVENT",
+            f"UID:sga-{dono}-{id_dono}-{i}@anhanguera",
+            f"DTSTAMP:{carimbo}",
+            f"DTSTART:{data}T{inicio}",
+            f"DTEND:{data}T{fim}",
+            "RRULE:FREQ=WEEKLY",
+            f"SUMMARY:{_escapar_ical(aula['disciplina'])}",
+            f"LOCATION:{_escapar_ical(aula['sala'])}",
+            f"DESCRIPTION:{_escapar_ical(descricao)}",
+            "END:VEVENT",
+        ]
+    linhas.append("END:VCALENDAR")
+    return "\r\n".join(_dobrar_linha(l) for l in linhas) + "\r\n"
+
+# ==============================================================================
+# 3. SERVIDOR
+# ==============================================================================
+
+class Manipulador(BaseHTTPRequestHandler):
+    server_version = "SGA-API/1.0"
+    protocol_version = "HTTP/1.1"  # Keep-alive: o celular reaproveita a conexão
+    verbose = False
+
+    def do_GET(self):
+        self._responder(enviar_corpo=True)
+
+    def do_HEAD(self):
+        self._responder(enviar_corpo=False)
+
+    def log_message(self, formato, *args):
+        if self.verbose:
+            super().log_message(formato, *args)
+
+    def _responder(self, enviar_corpo):
+        caminho = urlsplit(self.path).path
+        if caminho == "/saude":
+            return self._enviar(HTTPStatus.OK, b"ok", "text/plain; charset=utf-8", enviar_corpo=enviar_corpo)
+
+        for nome, padrao, carregar in ROTAS:
+            casamento = padrao.match(caminho)
+            if casamento:
+                break
+        else:
+            return self._erro(HTTPStatus.NOT_FOUND, "Recurso não encontrado.", enviar_corpo)
+
+        ids = [int(g) for g in casamento.groups() if g and g.isdigit()]
+        ical = caminho.endswith(".ics") and nome in DONO_ICAL
+
+        # Dados do cache (sem banco enquanto o recurso não muda); o ETag é calculado sobre o corpo
+        instrumentacao.iniciar_pagina(f"api/{nome}")
+        try:
+            dados = carregar(*ids)
+            alterado = alterado_em(nome, ids[0]) if ids else None
+        except Exception as e:
+            return self._erro(HTTPStatus.SERVICE_UNAVAILABLE, f"Erro ao consultar o banco: {e}", enviar_corpo)
+        finally:
+            instrumentacao.finalizar_pagina()
+
+        if ical:
+            corpo = montar_ical(dados, DONO_ICAL[nome], ids[0], alterado).encode("utf-8")
+            tipo = "text/calendar; charset=utf-8"
+        else:
+            corpo = json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            tipo = "application/json; charset=utf-8"
+
+        tag = etag(corpo)
+        cabecalhos = {"ETag": tag, "Cache-Control": f"public, max-age={MAX_AGE}, must-revalidate"}
+        if alterado is not None:
+            cabecalhos["Last-Modified"] = formatdate(alterado, usegmt=True)
+        if nao_modificado(self.headers, tag, alterado):
+            return self._enviar(HTTPStatus.NOT_MODIFIED, b"", None, cabecalhos, enviar_corpo=False)
+        self._enviar(HTTPStatus.OK, corpo, tipo, cabecalhos, enviar_corpo=enviar_corpo)
+
+    def _erro(self, status, mensagem, enviar_corpo):
+        corpo = json.dumps({"erro": mensagem}, ensure_ascii=False).encode("utf-8")
+        self._enviar(status, corpo, "application/json; charset=utf-8", {"Cache-Control": "no-store"}, enviar_corpo)
+
+    def _enviar(self, status, corpo, tipo, cabecalhos=None, enviar_corpo=True):
+        cabecalhos = dict(cabecalhos or {})
+        cabecalhos["Access-Control-Allow-Origin"] = "*"
+        if tipo:
+            cabecalhos["Content-Type"] = tipo
+            cabecalhos["Vary"] = "Accept-Encoding"
+            if len(corpo) >= GZIP_MINIMO and "gzip" in self.headers.get("Accept-Encoding", ""):
+                corpo = gzip.compress(corpo, compresslevel=5)
+                cabecalhos["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        for nome, valor in cabecalhos.items():
+            self.send_header(nome, valor)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        if enviar_corpo and corpo:
+            self.wfile.write(corpo)
+
+def criar_servidor(host="0.0.0.0", porta=PORTA_PADRAO, verbose=False):
+    avisos.iniciar()  # Antes da primeira carga: o cache que alimenta o ETag depende dos avisos de outras máquinas
+    Manipulador.verbose = verbose
+    servidor = ThreadingHTTPServer((host, porta), Manipulador)
+    servidor.daemon_threads = True
+    return servidor
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP somente leitura das grades (JSON/iCal).")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--verbose", action="store_true", help="Registra cada requisição no stderr.")
+    args = parser.parse_args(argv)
+
+    db.garantir_esquema()
+    servidor = criar_servidor(args.host, args.porta, args.verbose)
+    print(f"🌐 API das grades em http://{args.host}:{args.porta}/api (Ctrl+C para encerrar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
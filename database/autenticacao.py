@@ -0,0 +1,359 @@
+"""
+Autenticação do painel administrativo.
+
+- Login: busca do usuário com um fetchone direto (sem pandas) e bcrypt num
+  pool de threads pequeno. O pool só limita quantos hashes rodam ao mesmo tempo
+  no processo (uma rajada de logins não ocupa todos os núcleos); a thread do
+  script continua esperando o resultado, então quem faz login fica bloqueado
+  pelo tempo do hash, como antes.
+- Limite de tentativas por usuário e por IP: depois de N falhas na janela, o
+  login é recusado antes de gastar CPU com bcrypt. As falhas ficam no banco
+  (tb_login_falhas, migração 0007), então o limite vale para todas as réplicas
+  e máquinas juntas e sobrevive a reinícios.
+- Sessão: token assinado (HMAC-SHA256) com usuário, nome, validade e geração
+  de sessão, guardado no estado da sessão e num cookie SameSite (nunca na URL,
+  que vaza por histórico, Referer e links copiados). O cookie é gravado por
+  script na página, então não é HttpOnly (ver COOKIE_SESSAO). F5 e reinícios do servidor
+  validam o token com CPU + a geração do usuário em cache; o logout incrementa
+  a geração no banco e revoga todos os tokens anteriores.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import bcrypt
+
+from database import db_connection as db
+from database import instrumentacao
+
+SESSAO_TTL = int(db.carregar_config("SGA_SESSAO_TTL", 12 * 3600))           # Segundos
+BCRYPT_WORKERS = int(db.carregar_config("SGA_BCRYPT_WORKERS", 2))             # Hashes simultâneos no processo
+MAX_FALHAS_USUARIO = int(db.carregar_config("SGA_LOGIN_MAX_FALHAS_USUARIO", 5))
+MAX_FALHAS_IP = int(db.carregar_config("SGA_LOGIN_MAX_FALHAS_IP", 20))
+JANELA_FALHAS = int(db.carregar_config("SGA_LOGIN_JANELA", 300))              # Segundos
+# O cookie é gravado por JavaScript injetado na página (o Streamlit não deixa o
+# script responder com Set-Cookie), então NÃO pode ser HttpOnly: qualquer script
+# que rode na página lê o token. SameSite=Strict e Secure (em HTTPS) continuam
+# valendo; a proteção contra roubo fica na revogação pelo logout e no TTL.
+COOKIE_SESSAO = "sga_sessao"
+# Proxies reversos confiáveis na frente do app: o IP do cliente é o que o mais
+# externo deles acrescentou ao X-Forwarded-For (0 = ignora o cabeçalho)
+PROXIES_CONFIAVEIS = int(db.carregar_config("SGA_PROXIES_CONFIAVEIS", 0))
+
+_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="sga-bcrypt")
+
+# ==============================================================================
+# 1. SEGREDO DE ASSINATURA
+# ==============================================================================
+
+def _conferir_privado(estado, caminho):
+    """O arquivo/pasta precisa ser deste usuário e inacessível aos outros (POSIX)."""
+    if not hasattr(os, "getuid"):
+        return  # Windows: sem dono/modo POSIX para conferir
+    if estado.st_uid != os.getuid() or estado.st_mode & 0o077:
+        raise RuntimeError(
+            f"{caminho} não é privado (dono/permissões). Apague-o ou defina SGA_SEGREDO_SESSAO."
+        )
+
+def _carregar_segredo():
+    """
+    SGA_SEGREDO_SESSAO da configuração (obrigatório com várias máquinas) ou um
+    segredo gerado uma vez numa pasta privada (0700) dentro de SGA_CACHE_DIR,
+    para que os tokens continuem válidos depois de reiniciar o servidor. Pasta ou
+    arquivo de outro usuário, ou legíveis por outros, são recusados: em /tmp
+    alguém poderia plantar um segredo conhecido e forjar sessões.
+    """
+    segredo = db.carregar_config("SGA_SEGREDO_SESSAO")
+    if segredo:
+        return str(segredo).encode("utf-8")
+
+    pasta = os.path.join(db.CACHE_DIR, "privado")
+    os.makedirs(db.CACHE_DIR, exist_ok=True)
+    try:
+        os.mkdir(pasta, 0o700)
+    except FileExistsError:
+        pass
+    if os.path.islink(pasta):
+        raise RuntimeError(f"{pasta} é um link simbólico. Apague-o ou defina SGA_SEGREDO_SESSAO.")
+    _conferir_privado(os.stat(pasta), pasta)
+
+    caminho = os.path.join(pasta, "segredo_sessao")
+    sem_link = getattr(os, "O_NOFOLLOW", 0)
+    try:
+        # O_EXCL: se outro processo criou primeiro, usamos o dele
+        fd = os.open(caminho, os.O_WRONLY | os.O_CREAT | os.O_EXCL | sem_link, 0o600)
+        segredo = secrets.token_hex(32).encode("ascii")
+        with os.fdopen(fd, "wb") as arquivo:
+            arquivo.write(segredo)
+        return segredo
+    except FileExistsError:
+        pass
+
+    fd = os.open(caminho, os.O_RDONLY | sem_link)
+    with os.fdopen(fd, "rb") as arquivo:
+        _conferir_privado(os.fstat(arquivo.fileno()), caminho)
+        segredo = arquivo.read().strip()
+    if not segredo:
+        raise RuntimeError(f"{caminho} está vazio. Apague-o ou defina SGA_SEGREDO_SESSAO.")
+    return segredo
+
+_SEGREDO = _carregar_segredo()
+
+# ==============================================================================
+# 2. TOKENS DE SESSÃO
+# ==============================================================================
+
+def _b64(dados):
+    return base64.urlsafe_b64encode(dados).rstrip(b"=").decode("ascii")
+
+def _de_b64(texto):
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+def _assinar(corpo):
+    return _b64(hmac.new(_SEGREDO, corpo.encode("ascii"), hashlib.sha256).digest())
+
+_SQL_GERACAO = "SELECT geracao_sessao FROM tb_usuarios WHERE usuario = %s"
+
+def _geracao(usuario):
+    """Geração de sessão atual do usuário (None se ele não existe). Em cache, invalidado por escritas em tb_usuarios."""
+    def carregar():
+        with instrumentacao.medir(_SQL_GERACAO, "geracao_sessao") as reg:
+            conn = db.get_connection()
+            if not conn:
+                raise RuntimeError("Sem conexão com o banco.")
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(_SQL_GERACAO, (usuario,))
+                    linha = cursor.fetchone()
+                conn.rollback()
+            finally:
+                conn.close()
+            reg["linhas"] = 1 if linha else 0
+        return linha[0] if linha else None
+    return db.memoizar(("geracao_sessao", usuario), ["tb_usuarios"], carregar)
+
+def emitir_token(usuario, nome, ttl=None):
+    """Token 'corpo.assinatura' válido por ttl segundos (padrão SGA_SESSAO_TTL) e até o próximo logout."""
+    carga = {"u": usuario, "n": nome, "g": _geracao(usuario) or 0,
+             "exp": int(time.time()) + (SESSAO_TTL if ttl is None else ttl)}
+    corpo = _b64(json.dumps(carga, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+    return f"{corpo}.{_assinar(corpo)}"
+
+def validar_token(token):
+    """Retorna {"usuario", "nome"} se o token é autêntico, não expirou e não foi revogado; senão None."""
+    try:
+        corpo, assinatura = str(token).split(".", 1)
+        if not hmac.compare_digest(assinatura, _assinar(corpo)):
+            return None
+        carga = json.loads(_de_b64(corpo))
+    except (ValueError, TypeError, UnicodeError):
+        return None
+    if carga.get("exp", 0) < time.time():
+        return None
+    try:
+        if carga.get("g") != _geracao(carga["u"]):
+            return None  # Logout posterior (ou usuário removido)
+    except Exception:
+        return None
+    return {"usuario": carga["u"], "nome": carga["n"]}
+
+# O Streamlit só é importado pelas funções de sessão: o login (autenticar) também
+# serve a ferramentas de linha de comando e benchmarks.
+
+def _gravar_cookie(valor, max_age):
+    """Grava (ou apaga, com max_age=0) o cookie da sessão no navegador (sem HttpOnly; ver COOKIE_SESSAO)."""
+    import streamlit as st
+    st.html(
+        f"<script>document.cookie = '{COOKIE_SESSAO}={valor}; path=/; max-age={int(max_age)}; SameSite=Strict'"
+        " + (location.protocol === 'https:' ? '; Secure' : '');</script>",
+        unsafe_allow_javascript=True,
+    )
+
+def restaurar_sessao():
+    """Sessão do estado da página ou do cookie (ou None). Não vai ao banco se a geração estiver em cache."""
+    import streamlit as st
+    if COOKIE_SESSAO in st.session_state:
+        token = st.session_state[COOKIE_SESSAO]  # None após logout nesta conexão
+    else:
+        token = st.context.cookies.get(COOKIE_SESSAO)
+    sessao = validar_token(token) if token else None
+    if sessao:
+        st.session_state[COOKIE_SESSAO] = token
+    return sessao
+
+def iniciar_sessao(usuario, nome):
+    import streamlit as st
+    st.session_state[COOKIE_SESSAO] = emitir_token(usuario, nome)
+
+def sincronizar_cookie():
+    """
+    Chamado a cada execução da página: mantém o cookie igual ao estado da
+    sessão (grava após o login, apaga após o logout). O cookie só é relido em
+    novas conexões (F5), então o script é reenviado enquanto estiver diferente.
+    """
+    import streamlit as st
+    if "sessao" in st.query_params:
+        del st.query_params["sessao"]  # Links antigos com o token na URL
+    token = st.session_state.get(COOKIE_SESSAO)
+    if token and st.context.cookies.get(COOKIE_SESSAO) != token:
+        _gravar_cookie(token, SESSAO_TTL)
+    elif not token and st.context.cookies.get(COOKIE_SESSAO):
+        _gravar_cookie("", 0)
+
+def encerrar_sessao():
+    """Logout: revoga no banco todos os tokens do usuário e apaga o da sessão."""
+    import streamlit as st
+    token = st.session_state.get(COOKIE_SESSAO) or st.context.cookies.get(COOKIE_SESSAO)
+    st.session_state[COOKIE_SESSAO] = None
+    sessao = validar_token(token) if token else None
+    if sessao:
+        db.run_command(
+            "UPDATE tb_usuarios SET geracao_sessao = geracao_sessao + 1 WHERE usuario = %s",
+            (sessao["usuario"],), rotulo="revogar_sessao",
+        )
+
+# ==============================================================================
+# 3. LIMITE DE TENTATIVAS
+# ==============================================================================
+
+def _chaves(usuario, ip):
+    chaves = [(f"usuario:{usuario.strip().lower()}", MAX_FALHAS_USUARIO)]
+    if ip:
+        chaves.append((f"ip:{ip}", MAX_FALHAS_IP))
+    return chaves
+
+# Relógio do banco (now()) nas três consultas: réplicas com relógios diferentes contam a mesma janela
+_SQL_FALHAS = """
+    SELECT chave, COUNT(*), EXTRACT(EPOCH FROM MIN(momento) + make_interval(secs => %(janela)s) - now())
+    FROM tb_login_falhas
+    WHERE chave = ANY(%(chaves)s) AND momento > now() - make_interval(secs => %(janela)s)
+    GROUP BY chave
+"""
+_SQL_REGISTRAR_FALHA = """
+    DELETE FROM tb_login_falhas WHERE momento <= now() - make_interval(secs => %(janela)s);
+    INSERT INTO tb_login_falhas (chave) SELECT unnest(%(chaves)s::text[]);
+"""
+
+def _executar_falhas(sql, params, rotulo, ler=False):
+    """Cursor direto, fora do cache e dos avisos: estas linhas não interessam a nenhuma tela."""
+    with instrumentacao.medir(sql, rotulo) as reg:
+        conn = db.get_connection()
+        if not conn:
+            raise RuntimeError("Sem conexão com o banco.")
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                linhas = cursor.fetchall() if ler else []
+            conn.commit()
+        finally:
+            conn.close()
+        reg["linhas"] = len(linhas)
+    return linhas
+
+def _espera_restante(usuario, ip):
+    """Segundos até poder tentar de novo (0 = liberado)."""
+    chaves = _chaves(usuario, ip)
+    limites = dict(chaves)
+    linhas = _executar_falhas(
+        _SQL_FALHAS, {"chaves": [c for c, _ in chaves], "janela": JANELA_FALHAS}, "login_falhas", ler=True
+    )
+    return max([float(resta) for chave, qtd, resta in linhas if qtd >= limites[chave]] + [0.0])
+
+def _registrar_falha(usuario, ip):
+    _executar_falhas(
+        _SQL_REGISTRAR_FALHA, {"chaves": [c for c, _ in _chaves(usuario, ip)], "janela": JANELA_FALHAS},
+        "registrar_falha_login",
+    )
+
+def _limpar_falhas(usuario):
+    _executar_falhas(
+        "DELETE FROM tb_login_falhas WHERE chave = %(chave)s",
+        {"chave": f"usuario:{usuario.strip().lower()}"}, "limpar_falhas_login",
+    )
+
+def ip_do_cliente():
+    """
+    IP de quem está na sessão do Streamlit, ou None. Atrás de SGA_PROXIES_CONFIAVEIS
+    proxies, vale o endereço que o mais externo deles acrescentou ao X-Forwarded-For;
+    os itens à esquerda vêm do cliente e podem ser forjados.
+    """
+    import streamlit as st
+    try:
+        if PROXIES_CONFIAVEIS > 0:
+            saltos = [ip.strip() for ip in st.context.headers.get("X-Forwarded-For", "").split(",") if ip.strip()]
+            if len(saltos) >= PROXIES_CONFIAVEIS:
+                return saltos[-PROXIES_CONFIAVEIS]
+        return getattr(st.context, "ip_address", None)
+    except Exception:
+        return None
+
+# ==============================================================================
+# 4. LOGIN
+# ==============================================================================
+
+_SQL_USUARIO = "SELECT senha_hash, nome FROM tb_usuarios WHERE usuario = %s"
+
+def _buscar_usuario(usuario):
+    """(senha_hash, nome) ou None - cursor direto, sem pandas."""
+    with instrumentacao.medir(_SQL_USUARIO, "buscar_usuario") as reg:
+        conn = db.get_connection()
+        if not conn:
+            raise RuntimeError("Sem conexão com o banco.")
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(_SQL_USUARIO, (usuario,))
+                linha = cursor.fetchone()
+            conn.rollback()  # Só leitura: encerra a transação antes de devolver ao pool
+        finally:
+            conn.close()
+        reg["linhas"] = 1 if linha else 0
+    return linha
+
+@lru_cache(maxsize=1)
+def _hash_falso():
+    # Usuário inexistente custa o mesmo que senha errada (não revela quem existe)
+    return bcrypt.hashpw(b"sga-usuario-inexistente", bcrypt.gensalt())
+
+def _conferir_senha(senha, hash_banco):
+    if isinstance(hash_banco, memoryview):
+        hash_banco = hash_banco.tobytes()
+    if isinstance(hash_banco, str):
+        hash_banco = hash_banco.encode("utf-8")
+    # Limite de concorrência, não assincronismo: .result() segura a thread do
+    # script até o hash terminar (a espera na fila entra na medição)
+    with instrumentacao.medir("bcrypt.checkpw", "bcrypt"):
+        return _executor.submit(bcrypt.checkpw, senha.encode("utf-8"), hash_banco).result()
+
+def autenticar(usuario, senha, ip=None):
+    """Retorna (sucesso, nome, mensagem_de_erro)."""
+    usuario = (usuario or "").strip()
+    try:
+        espera = _espera_restante(usuario, ip)
+        if espera > 0:
+            return False, None, f"Muitas tentativas. Tente novamente em {int(espera) + 1}s."
+        linha = _buscar_usuario(usuario) if usuario else None
+    except Exception as e:
+        return False, None, f"Erro ao consultar usuário: {e}"
+
+    if linha is None:
+        _conferir_senha(senha or "", _hash_falso())
+        ok, nome = False, None
+    else:
+        ok, nome = _conferir_senha(senha or "", linha[0]), linha[1]
+
+    try:
+        if not ok:
+            _registrar_falha(usuario, ip)
+        else:
+            _limpar_falhas(usuario)
+    except Exception as e:
+        return False, None, f"Erro ao registrar a tentativa: {e}"
+    if not ok:
+        return False, None, "Usuário ou senha incorretos."
+    return True, nome, None
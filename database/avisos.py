@@ -0,0 +1,166 @@
+"""
+Avisos de alteração entre processos (Postgres LISTEN/NOTIFY).
+
+Cada escrita do db_connection publica, dentro da própria transação, um aviso no
+canal 'sga_alteracoes' com as tabelas e as entidades tocadas (ex: as turmas e
+docentes cujas grades mudaram). O Postgres só entrega o aviso no commit, e a
+todos os processos conectados - inclusive em outras máquinas, onde os carimbos
+em arquivo do cache não chegam.
+
+Cada processo que usa o cache mantém uma thread ouvinte com uma conexão própria
+(fora do pool). Ao receber um aviso de outro processo, ela descarta só as
+entradas afetadas. Se o aviso veio de outra máquina (ou de outro SGA_CACHE_DIR),
+carimba também as tabelas localmente, sem republicar; escritas da mesma pasta de
+carimbos já foram carimbadas por quem escreveu, e carimbar de novo faria cada
+ouvinte da máquina invalidar o cache e o índice de ocupação dos outros outra
+vez. Se a conexão cair, o cache do processo é limpo (avisos podem ter se perdido) e o ouvinte reconecta com espera exponencial; enquanto isso o
+cache volta a depender só dos carimbos e do TTL curto.
+
+Configuração: SGA_AVISOS=0 desliga (ex: Postgres atrás de um pooler em modo
+transação, que não suporta LISTEN). Todos os processos devem usar o mesmo valor.
+"""
+import json
+import os
+import secrets
+import select
+import socket
+import threading
+import time
+
+from database import db_connection as db
+
+CANAL = "sga_alteracoes"
+ATIVADO = str(db.carregar_config("SGA_AVISOS", "1")).strip().lower() not in ("0", "false", "nao", "não")
+CACHE_TTL_AVISOS = float(db.carregar_config("SGA_CACHE_TTL_AVISOS", 3600))  # TTL com o ouvinte conectado
+INTERVALO_PING = 30.0       # Segundos sem avisos até testar a conexão (e mantê-la viva)
+ESPERA_MAXIMA = 60.0        # Teto da espera entre reconexões
+LIMITE_CARGA = 7900         # O NOTIFY aceita até 8000 bytes; acima disso o aviso vai sem as entidades
+
+# Identifica este processo: os avisos que ele mesmo publicou são ignorados
+ORIGEM = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+
+def _pasta_carimbos():
+    """Identifica onde este processo carimba as escritas (máquina + SGA_CACHE_DIR)."""
+    return f"{socket.gethostname()}:{os.path.realpath(db.CACHE_DIR)}"
+
+_ativo = threading.Event()      # LISTEN confirmado na conexão atual
+_estado = {"geracao": 0, "recebidos": 0, "reconexoes": 0, "thread": None}
+_lock = threading.Lock()
+_ouvintes = []
+
+# ==============================================================================
+# 1. PUBLICAÇÃO
+# ==============================================================================
+
+def _carga(tabelas, entidades):
+    carga = {"o": ORIGEM, "c": _pasta_carimbos(), "t": sorted(set(tabelas))}
+    if entidades:
+        carga["e"] = {t: sorted({int(i) for i in ids}) for t, ids in entidades.items()}
+    texto = json.dumps(carga, separators=(",", ":"))
+    if len(texto.encode("utf-8")) > LIMITE_CARGA:
+        # Muitas entidades (ex: importação grande): o aviso vale para as tabelas inteiras
+        carga.pop("e", None)
+        texto = json.dumps(carga, separators=(",", ":"))
+    return texto
+
+def publicar(cursor, tabelas, entidades=None):
+    """pg_notify na transação do cursor: entregue no commit, descartado no rollback."""
+    if not ATIVADO or not tabelas:
+        return
+    cursor.execute("SELECT pg_notify(%s, %s)", (CANAL, _carga(tabelas, entidades)))
+
+# ==============================================================================
+# 2. OUVINTE
+# ==============================================================================
+
+def ativo():
+    """True se o LISTEN está de pé: entradas etiquetadas por entidade são seguras."""
+    return _ativo.is_set()
+
+def geracao():
+    """Cresce a cada aviso recebido ou queda do ouvinte (o cache usa para detectar corridas)."""
+    return _estado["geracao"]
+
+def estatisticas():
+    return {"ativo": ativo(), "recebidos": _estado["recebidos"], "reconexoes": _estado["reconexoes"]}
+
+def registrar_ouvinte(funcao):
+    """Registra funcao(tabelas, entidades), chamada para cada aviso vindo de outro processo."""
+    if funcao not in _ouvintes:
+        _ouvintes.append(funcao)
+
+def _avancar_geracao():
+    with _lock:
+        _estado["geracao"] += 1
+
+def processar(texto):
+    """Aplica um aviso recebido (ignora os publicados por este processo)."""
+    try:
+        carga = json.loads(texto)
+    except ValueError:
+        return
+    if carga.get("o") == ORIGEM:
+        return
+    tabelas = carga.get("t", [])
+    entidades = carga.get("e")
+    _avancar_geracao()
+    _estado["recebidos"] += 1
+    if carga.get("c") == _pasta_carimbos():
+        db.descartar_do_cache(tabelas, entidades)  # Quem escreveu já carimbou esta pasta
+    else:
+        # Carimbos locais: a escrita veio de outra máquina, fora deste CACHE_DIR
+        db.invalidar_tabelas(tabelas, entidades)
+    for funcao in _ouvintes:
+        try:
+            funcao(tabelas, entidades)
+        except Exception as e:
+            print(f"⚠️  Ouvinte de avisos falhou: {e}")
+
+def _escutar():
+    """Abre uma conexão dedicada (desligada do pool) e fica ouvindo até ela cair."""
+    conexao = db.get_engine().raw_connection()
+    conexao.detach()  # Conexão longa: não ocupa nem volta para o pool
+    bruta = conexao.dbapi_connection
+    try:
+        bruta.autocommit = True
+        with bruta.cursor() as cursor:
+            cursor.execute(f"LISTEN {CANAL}")
+        _ativo.set()
+        while True:
+            prontos, _, _ = select.select([bruta], [], [], INTERVALO_PING)
+            if not prontos:
+                with bruta.cursor() as cursor:
+                    cursor.execute("SELECT 1")  # Detecta conexão morta e evita o corte por ociosidade
+            bruta.poll()
+            while bruta.notifies:
+                processar(bruta.notifies.pop(0).payload)
+    finally:
+        _ativo.clear()
+        conexao.invalidate()  # Fecha sem o rollback de devolução ao pool (a conexão pode já estar morta)
+
+def _laco():
+    espera = 1.0
+    while True:
+        inicio = time.monotonic()
+        try:
+            _escutar()
+        except Exception as e:
+            print(f"⚠️  Ouvinte de avisos desconectado: {e}")
+        # Avisos podem ter se perdido: nada do que foi etiquetado por entidade é confiável
+        _avancar_geracao()
+        db.limpar_cache()
+        _estado["reconexoes"] += 1
+        if time.monotonic() - inicio > ESPERA_MAXIMA:
+            espera = 1.0
+        time.sleep(espera)
+        espera = min(espera * 2, ESPERA_MAXIMA)
+
+def iniciar():
+    """Sobe a thread ouvinte deste processo (uma vez; chamado pelo cache no primeiro uso)."""
+    if not ATIVADO or _estado["thread"] is not None:
+        return
+    with _lock:
+        if _estado["thread"] is not None:
+            return
+        _estado["thread"] = threading.Thread(target=_laco, name="sga-avisos", daemon=True)
+        _estado["thread"].start()
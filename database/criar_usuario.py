@@ -1,5 +1,12 @@
+import os
+import sys
+
 import bcrypt
-import db_connection # Certifique-se que este arquivo está na mesma pasta
+
+# Permite rodar como script (python database/criar_usuario.py) a partir de qualquer pasta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_connection
 
 def criar_usuario_admin(usuario, senha_plana, nome):
     conn = db_connection.get_connection()
@@ -1,11 +1,17 @@
-import psycopg2
-import pandas as pd
-import streamlit as st
-import bcrypt
-from sqlalchemy import create_engine
+# Só stdlib no import: pandas, streamlit, sqlalchemy e psycopg2 são importados
+# no primeiro uso. Ferramentas de linha de comando (criar_usuario, migrar) e
+# processos novos dos portais não pagam por dependências que não usam.
 from datetime import datetime, timedelta
+from functools import lru_cache
+from collections import OrderedDict
 import os
-import toml
+import re
+import sys
+import tempfile
+import threading
+import time
+
+from database import instrumentacao
 
 # ==============================================================================
 # 1. CONFIGURAÇÃO E CONEXÃO
@@ -21,133 +27,605 @@ DB_CONFIG = {
     "port": "5432"
 }
 
-def carregar_url_banco():
-    """
-    Tenta encontrar a URL de conexão (Neon) em 2 lugares:
-    1. Segredos do Streamlit (Cloud).
-    2. Arquivo secrets.toml local (VS Code).
-    """
-    url = None
-    
-    # Tentativa A: Streamlit Cloud
+_AUSENTE = object()
+_config = {}  # chave -> valor resolvido (ou _AUSENTE), lido uma vez por processo
+_config_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _secrets_locais():
+    """Conteúdo do .streamlit/secrets.toml local (VS Code), lido uma única vez."""
+    base_path = os.path.dirname(os.path.dirname(__file__))
+    secrets_path = os.path.join(base_path, ".streamlit", "secrets.toml")
+    if not os.path.exists(secrets_path):
+        return {}
     try:
-        if "POSTGRES_URL" in st.secrets:
-            url = st.secrets["POSTGRES_URL"]
-    except:
-        pass 
+        import toml
+        return toml.load(secrets_path)
+    except Exception:
+        return {}  # Falha silenciosa se o arquivo não puder ser lido
 
-    # Tentativa B: Arquivo local secrets.toml
-    if not url:
+def _resolver_config(chave):
+    if chave in os.environ:
+        return os.environ[chave]
+
+    # Tentativa A: Streamlit Cloud (só se o processo já usa o Streamlit;
+    # fora dele os segredos são o mesmo secrets.toml lido abaixo)
+    st = sys.modules.get("streamlit")
+    if st is not None:
         try:
-            base_path = os.path.dirname(os.path.dirname(__file__))
-            secrets_path = os.path.join(base_path, ".streamlit", "secrets.toml")
-            if os.path.exists(secrets_path):
-                data = toml.load(secrets_path)
-                if "POSTGRES_URL" in data:
-                    url = data["POSTGRES_URL"]
+            if chave in st.secrets:
+                return st.secrets[chave]
         except Exception:
-            pass # Falha silenciosa se não achar arquivo local
+            pass
 
-    return url
+    # Tentativa B: Arquivo local secrets.toml
+    return _secrets_locais().get(chave, _AUSENTE)
+
+def carregar_config(chave, padrao=None):
+    """
+    Busca um parâmetro de configuração em 3 lugares (nesta ordem):
+    1. Variáveis de ambiente.
+    2. Segredos do Streamlit (Cloud).
+    3. Arquivo secrets.toml local (VS Code).
+    O valor é resolvido na primeira chamada e guardado para o resto do processo.
+    """
+    valor = _config.get(chave)
+    if valor is None:
+        with _config_lock:
+            valor = _config.get(chave)
+            if valor is None:
+                valor = _config[chave] = _resolver_config(chave)
+    return padrao if valor is _AUSENTE else valor
+
+def carregar_url_banco():
+    """Retorna a URL de conexão (Neon) ou None para usar o banco local."""
+    return carregar_config("POSTGRES_URL")
 
-# Lógica de Inicialização da Engine
 DATABASE_URL_RAW = carregar_url_banco()
 
 if DATABASE_URL_RAW:
-    # Ajuste para SQLAlchemy (postgres:// -> postgresql://)
-    SQLALCHEMY_URL = DATABASE_URL_RAW.replace("postgres://", "postgresql://", 1)
+    # Ajuste para SQLAlchemy (postgres:// -> postgresql+psycopg2://)
+    # O driver é fixado porque as escritas usam a conexão crua do psycopg2
+    # (execute_values, COPY) e versões novas do SQLAlchemy preferem o psycopg 3.
+    SQLALCHEMY_URL = re.sub(r"^postgres(ql)?://", "postgresql+psycopg2://", DATABASE_URL_RAW, count=1)
 else:
     # URL Local
     SQLALCHEMY_URL = f"postgresql+psycopg2://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['dbname']}"
 
-# Cria a Engine Global (Pandas)
-engine = create_engine(SQLALCHEMY_URL)
+# --- POOL DE CONEXÕES ---
+# Um único pool por processo, usado tanto pelas leituras (pandas) quanto
+# pelas escritas (psycopg2 cru). Evita um handshake TLS + autenticação por clique.
+POOL_MIN = int(carregar_config("DB_POOL_MIN", 4))        # Conexões mantidas abertas
+POOL_MAX = int(carregar_config("DB_POOL_MAX", 10))       # Limite total (min + overflow)
+POOL_TIMEOUT = float(carregar_config("DB_POOL_TIMEOUT", 30))   # Segundos esperando uma conexão livre
+POOL_RECYCLE = int(carregar_config("DB_POOL_RECYCLE", 1800))   # Recicla conexões antigas (Neon derruba ociosas)
 
-def get_connection():
-    """Retorna uma conexão crua (psycopg2) para INSERT/UPDATE."""
+# Engine Global (Pandas + Escritas), criada no primeiro acesso ao banco.
+# Continua disponível como db_connection.engine (ver __getattr__ abaixo).
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from sqlalchemy import create_engine
+                _engine = create_engine(
+                    SQLALCHEMY_URL,
+                    pool_size=POOL_MIN,
+                    max_overflow=max(POOL_MAX - POOL_MIN, 0),
+                    pool_timeout=POOL_TIMEOUT,
+                    pool_recycle=POOL_RECYCLE,
+                    pool_pre_ping=True,  # Health check a cada checkout (descarta conexões mortas)
+                )
+    return _engine
+
+def __getattr__(nome):
+    if nome == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+# --- INSTRUMENTAÇÃO ---
+# Toda chamada ao banco é medida (ver database/instrumentacao.py). Limites em ms;
+# SGA_LENTA_POR_ROTULO aceita "rotulo=ms;rotulo=ms" e SGA_TRACE_ARQUIVO grava cada
+# registro em JSON lines para análise offline.
+instrumentacao.configurar(
+    limite_lenta_ms=carregar_config("SGA_LENTA_MS", 500),
+    limites_por_rotulo=carregar_config("SGA_LENTA_POR_ROTULO"),
+    max_registros=carregar_config("SGA_INSTRUMENTACAO_MAX", 5000),
+    arquivo_trace=carregar_config("SGA_TRACE_ARQUIVO"),
+)
+
+# Estatísticas do pool (para dimensionamento sob carga)
+_stats_pool = {
+    "checkouts": 0,
+    "esperas": 0,
+    "timeouts": 0,
+    "latencia_total_ms": 0.0,
+    "latencia_max_ms": 0.0,
+}
+_stats_lock = threading.Lock()
+
+def _emprestar(abrir):
+    """Pega uma conexão do pool medindo a latência do checkout."""
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+    # Se todas as conexões já estão em uso, este checkout vai esperar na fila
+    vai_esperar = get_engine().pool.checkedout() >= POOL_MAX
+    inicio = time.perf_counter()
     try:
-        if DATABASE_URL_RAW:
-            return psycopg2.connect(DATABASE_URL_RAW)
-        else:
-            return psycopg2.connect(**DB_CONFIG)
+        conn = abrir()
+    except PoolTimeoutError:
+        with _stats_lock:
+            _stats_pool["esperas"] += 1
+            _stats_pool["timeouts"] += 1
+        raise
+    ms = (time.perf_counter() - inicio) * 1000
+
+    with _stats_lock:
+        _stats_pool["checkouts"] += 1
+        _stats_pool["latencia_total_ms"] += ms
+        _stats_pool["latencia_max_ms"] = max(_stats_pool["latencia_max_ms"], ms)
+        if vai_esperar:
+            _stats_pool["esperas"] += 1
+    instrumentacao.registrar_checkout(ms)
+    return conn
+
+def get_stats_pool():
+    """Retorna um retrato do pool: conexões em uso, esperas e latência de checkout."""
+    pool = get_engine().pool
+    with _stats_lock:
+        stats = dict(_stats_pool)
+    checkouts = stats["checkouts"]
+    return {
+        "tamanho_min": POOL_MIN,
+        "tamanho_max": POOL_MAX,
+        "em_uso": pool.checkedout(),
+        "ociosas": pool.checkedin(),
+        "checkouts": checkouts,
+        "esperas": stats["esperas"],
+        "timeouts": stats["timeouts"],
+        "latencia_media_ms": round(stats["latencia_total_ms"] / checkouts, 2) if checkouts else 0.0,
+        "latencia_max_ms": round(stats["latencia_max_ms"], 2),
+    }
+
+def _conectar():
+    try:
+        return _emprestar(get_engine().raw_connection)
     except Exception as e:
         print(f"❌ Erro de Conexão: {e}")
         return None
 
+def get_connection():
+    """
+    Retorna uma conexão crua (psycopg2) emprestada do pool para INSERT/UPDATE.
+    Chamar conn.close() devolve a conexão ao pool em vez de fechá-la.
+    """
+    try:
+        garantir_esquema()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return None
+    return _conectar()
+
+# --- ESQUEMA (MIGRAÇÕES) ---
+# As tabelas, índices e restrições vêm de database/migracoes/. As pendentes são
+# aplicadas no primeiro acesso ao banco de cada processo (o Streamlit Cloud não
+# tem etapa de deploy); SGA_MIGRAR_AO_INICIAR=0 desliga e deixa para o
+# "python -m database.migrar".
+MIGRAR_AO_INICIAR = str(carregar_config("SGA_MIGRAR_AO_INICIAR", "1")).strip().lower() not in ("0", "false", "nao", "não")
+
+# Após uma falha, nova tentativa só depois deste intervalo (evita migrar a cada rerun)
+MIGRAR_RETENTAR_S = float(carregar_config("SGA_MIGRAR_RETENTAR_S", 30))
+
+_esquema_pronto = threading.Event()
+_esquema_lock = threading.Lock()
+_falha_esquema = {"erro": None, "em": 0.0}
+
+def garantir_esquema():
+    """
+    Aplica as migrações pendentes, uma vez por processo. Se falharem, levanta
+    RuntimeError e tenta de novo no próximo acesso após MIGRAR_RETENTAR_S: o
+    processo não segue com um esquema pela metade.
+    """
+    if _esquema_pronto.is_set():
+        return
+    with _esquema_lock:
+        if _esquema_pronto.is_set():
+            return
+        if not MIGRAR_AO_INICIAR:
+            _esquema_pronto.set()
+            return
+        if _falha_esquema["erro"] and time.monotonic() - _falha_esquema["em"] < MIGRAR_RETENTAR_S:
+            raise RuntimeError(f"Esquema do banco desatualizado: {_falha_esquema['erro']}")
+        try:
+            from database import migrar  # Import tardio: o migrar importa este módulo
+            migrar.aplicar()
+        except Exception as e:
+            _falha_esquema.update(erro=str(e), em=time.monotonic())
+            print(f"⚠️  Não foi possível aplicar as migrações: {e}")
+            raise RuntimeError(f"Esquema do banco desatualizado: {e}") from e
+        _falha_esquema["erro"] = None
+        _esquema_pronto.set()
+
 # ==============================================================================
 # 2. FUNÇÕES BASE (LEITURA E ESCRITA)
 # ==============================================================================
 
-def run_query(query, params=None):
+def _executar_consulta(query, params=None, rotulo=None):
+    """Executa SELECT e retorna DataFrame (propaga erros). A chamada é medida pela instrumentação."""
+    import pandas as pd
+    garantir_esquema()
+    with instrumentacao.medir(query, rotulo) as reg:
+        with _emprestar(get_engine().connect) as conn:
+            df = pd.read_sql(query, conn, params=params)
+        reg["linhas"] = len(df)
+    return df
+
+def _falha_consulta(erro):
+    """Mostra o erro na página e devolve um DataFrame vazio (run_query/run_query_cached)."""
+    import pandas as pd
+    import streamlit as st
+    st.error(f"Erro na consulta SQL: {erro}")
+    return pd.DataFrame()
+
+def run_query(query, params=None, rotulo=None):
     """Executa SELECT e retorna DataFrame."""
     try:
-        with engine.connect() as conn:
-            return pd.read_sql(query, conn, params=params)
+        return _executar_consulta(query, params, rotulo)
     except Exception as e:
-        st.error(f"Erro na consulta SQL: {e}")
-        return pd.DataFrame()
+        return _falha_consulta(e)
 
-def run_command(command, params=None):
+def run_command(command, params=None, rotulo=None):
     """Executa INSERT, UPDATE, DELETE."""
-    conn = get_connection()
-    if not conn:
-        return False, "Sem conexão com o banco."
-    
+    with instrumentacao.medir(command, rotulo) as reg:
+        conn = get_connection()
+        if not conn:
+            reg["erro"] = "Sem conexão com o banco."
+            return False, "Sem conexão com o banco."
+
+        try:
+            cur = conn.cursor()
+            cur.execute(command, params)
+            reg["linhas"] = cur.rowcount
+            tabelas = tabelas_escritas(command)
+            if _afeta_grades(command, tabelas):
+                # Escrita fora dos caminhos incrementais: reconstrói as grades na mesma transação
+                reconstruir_grades_materializadas(cur)
+                tabelas += TABELAS_GRADE
+            if tabelas:
+                publicar_alteracao(cur, tabelas)
+            conn.commit()
+            cur.close()
+            invalidar_tabelas(tabelas)
+            return True, "Sucesso!"
+        except Exception as e:
+            conn.rollback()
+            reg["erro"] = str(e)
+            return False, str(e)
+        finally:
+            if conn: conn.close()
+
+# ==============================================================================
+# 3. CACHE DE CONSULTAS (TABELAS DE REFERÊNCIA)
+# ==============================================================================
+
+# Salas, docentes, cursos e turmas mudam poucas vezes por semestre, mas cada
+# rerun do Streamlit consultava tudo de novo. O cache abaixo guarda os resultados
+# por processo, com TTL e limite de itens, e é invalidado a cada escrita.
+#
+# Consistência entre os portais (processos separados do index.py): cada escrita
+# "carimba" um arquivo por tabela em CACHE_DIR. Antes de servir uma entrada,
+# comparamos o carimbo atual com o do momento da carga (um os.stat, sem SQL).
+#
+# Além disso, cada escrita publica um aviso (LISTEN/NOTIFY, ver database/avisos.py)
+# com as tabelas e as entidades tocadas (ex: turmas e docentes cujas grades
+# mudaram). Com o ouvinte conectado, as entradas vivem SGA_CACHE_TTL_AVISOS e as
+# grades são descartadas por entidade: gravar uma aula da turma 5 não derruba o
+# cache da turma 9, nem em outra máquina.
+
+CACHE_TTL = float(carregar_config("SGA_CACHE_TTL", 300))           # Segundos
+CACHE_MAX_ITENS = int(carregar_config("SGA_CACHE_MAX_ITENS", 256))
+CACHE_DIR = carregar_config("SGA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sga_cache"))
+
+# Tabelas apagadas em cascata junto com a tabela principal
+_CASCATAS = {
+    "tb_alocacoes": ["tb_alocacao_turmas"],
+    "tb_alocacoes_arquivo": ["tb_alocacao_turmas_arquivo"],
+}
+
+_RE_TABELAS_LEITURA = re.compile(r"\b(?:FROM|JOIN)\s+(tb_\w+)", re.IGNORECASE)
+_RE_TABELA_ESCRITA = re.compile(r"^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+(tb_\w+)", re.IGNORECASE)
+
+_cache = OrderedDict()  # chave -> (valor, expira_em, {tabela: carimbo}, {tabela: ids das entidades})
+_cache_lock = threading.Lock()
+
+def tabelas_lidas(query):
+    """Extrai as tabelas (tb_*) citadas em FROM/JOIN de um SELECT."""
+    return sorted({t.lower() for t in _RE_TABELAS_LEITURA.findall(query)})
+
+def tabelas_escritas(command):
+    """Extrai a tabela alvo de um INSERT/UPDATE/DELETE (e suas cascatas)."""
+    m = _RE_TABELA_ESCRITA.match(command)
+    if not m:
+        return []
+    tabela = m.group(1).lower()
+    return [tabela] + _CASCATAS.get(tabela, [])
+
+def _arquivo_carimbo(tabela):
+    return os.path.join(CACHE_DIR, tabela)
+
+def versao_tabela(tabela):
+    """Carimbo (ns) da última escrita conhecida na tabela, visível por todos os processos."""
     try:
-        cur = conn.cursor()
-        cur.execute(command, params)
-        conn.commit()
-        cur.close()
-        return True, "Sucesso!"
+        return os.stat(_arquivo_carimbo(tabela)).st_mtime_ns
+    except OSError:
+        return 0
+
+def _carimbar(tabela):
+    """Avança o carimbo da tabela. Retorna (carimbo anterior, novo), ou None se falhar."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        caminho = _arquivo_carimbo(tabela)
+        # Garante um carimbo estritamente maior, mesmo com relógio de baixa resolução
+        anterior = versao_tabela(tabela)
+        agora = max(time.time_ns(), anterior + 1)
+        with open(caminho, "a"):
+            pass
+        os.utime(caminho, ns=(agora, agora))
+        return anterior, agora
+    except OSError as e:
+        print(f"⚠️  Não foi possível carimbar {tabela}: {e}")
+        return None
+
+def _normalizar_entidades(entidades):
+    return {t: frozenset(int(i) for i in ids) for t, ids in (entidades or {}).items()}
+
+def descartar_do_cache(tabelas, entidades=None):
+    """
+    Descarta deste processo as entradas afetadas por uma escrita (sem carimbar).
+    entidades: {tabela: ids}; nessas tabelas só caem as entradas etiquetadas com
+    algum dos ids (e as que dependem da tabela inteira).
+    """
+    tabelas = set(tabelas)
+    entidades = _normalizar_entidades(entidades)
+
+    def afetada(carimbos, etiquetas):
+        if tabelas & carimbos.keys():
+            return True
+        return any(t in tabelas and (t not in entidades or ids & entidades[t]) for t, ids in etiquetas.items())
+
+    with _cache_lock:
+        for chave in [c for c, (_, _, carimbos, etiquetas) in _cache.items() if afetada(carimbos, etiquetas)]:
+            del _cache[chave]
+
+def invalidar_tabelas(tabelas, entidades=None):
+    """
+    Descarta do cache tudo que depende das tabelas informadas (neste e nos outros processos).
+    Retorna {tabela: (carimbo anterior, novo)}: quem mantém estado derivado (ex: o índice
+    de ocupação) sabe se havia escrita de outro processo antes desta.
+    """
+    tabelas = set(tabelas)
+    carimbos = {}
+    for tabela in tabelas:
+        carimbo = _carimbar(tabela)
+        if carimbo:
+            carimbos[tabela] = carimbo
+    if tabelas:
+        descartar_do_cache(tabelas, entidades)
+    return carimbos
+
+def publicar_alteracao(cursor, tabelas, entidades=None):
+    """Publica o aviso da escrita na transação do cursor: os outros processos só o recebem no commit."""
+    from database import avisos  # Import tardio: avisos importa este módulo
+    avisos.publicar(cursor, tabelas, entidades)
+
+def limpar_cache():
+    with _cache_lock:
+        _cache.clear()
+
+def _buscar_no_cache(chave, agora):
+    """Valor válido (dentro do TTL e com carimbos atuais) para a chave, ou _AUSENTE."""
+    with _cache_lock:
+        item = _cache.get(chave)
+        if item is None:
+            return _AUSENTE
+        valor, expira_em, carimbos, _ = item
+        if expira_em > agora and all(versao_tabela(t) == v for t, v in carimbos.items()):
+            _cache.move_to_end(chave)
+            return valor
+        del _cache[chave]
+        return _AUSENTE
+
+def memoizar(chave, tabelas, carregar, ttl=None, entidades=None):
+    """
+    Retorna o valor em cache para 'chave' ou chama carregar() e guarda o resultado.
+    A entrada expira após o TTL ou quando alguma das 'tabelas' for escrita.
+    entidades ({tabela: ids}) restringe a invalidação dessas tabelas aos avisos
+    que citam os ids - só vale com o ouvinte de avisos conectado.
+    """
+    agora = time.monotonic()
+    valor = _buscar_no_cache(chave, agora)
+    if valor is not _AUSENTE:
+        return valor
+
+    from database import avisos  # Import tardio: avisos importa este módulo
+    avisos.iniciar()
+
+    # Carimbos lidos ANTES da carga: uma escrita concorrente invalida a entrada
+    carimbos = {t: versao_tabela(t) for t in tabelas}
+    ouvindo, geracao = avisos.ativo(), avisos.geracao()
+    valor = carregar()
+
+    etiquetas = {t: ids for t, ids in _normalizar_entidades(entidades).items() if t in carimbos}
+    if ttl is None:
+        ttl = avisos.CACHE_TTL_AVISOS if ouvindo else CACHE_TTL
+
+    with _cache_lock:
+        # Um aviso chegou durante a carga? A entrada fica só com os carimbos (conservador).
+        # Conferido sob o lock: o ouvinte avança a geração antes de descartar (também
+        # sob o lock), então um aviso que chegue depois daqui derruba a entrada.
+        if not (ouvindo and avisos.ativo() and avisos.geracao() == geracao):
+            etiquetas = {}
+        for tabela in etiquetas:
+            del carimbos[tabela]
+        _cache[chave] = (valor, agora + ttl, carimbos, etiquetas)
+        _cache.move_to_end(chave)
+        while len(_cache) > CACHE_MAX_ITENS:
+            _cache.popitem(last=False)  # Remove o menos usado (LRU)
+    return valor
+
+def _chave_sql(query, params):
+    return ("sql", query, tuple(params) if params else None)
+
+def consultar_cached(query, params=None, ttl=None, rotulo=None, entidades=None):
+    """Como run_query_cached, mas propaga os erros (para quem não é uma página do Streamlit)."""
+    return memoizar(
+        _chave_sql(query, params), tabelas_lidas(query), lambda: _executar_consulta(query, params, rotulo), ttl, entidades
+    ).copy()
+
+def run_query_cached(query, params=None, ttl=None, rotulo=None, entidades=None):
+    """Executa SELECT com cache, invalidado quando as tabelas lidas mudam (ou, com entidades, só os ids lidos)."""
+    try:
+        return consultar_cached(query, params, ttl, rotulo, entidades)
     except Exception as e:
-        return False, str(e)
-    finally:
-        if conn: conn.close()
+        return _falha_consulta(e)
+
+# --- CONSULTAS EM PARALELO ---
+# Páginas que precisam de várias listas independentes (ex: Nova Alocação) pagavam
+# a latência do banco uma vez por consulta. run_queries_cached dispara as que não
+# estão em cache ao mesmo tempo, num pool pequeno compartilhado pelo processo
+# (cada uma ocupa uma conexão do pool do SQLAlchemy enquanto roda). O limite fica
+# em POOL_MIN: acima disso o pool abre conexões de overflow, que são descartadas
+# na devolução - e cada lote pagaria um handshake novo por consulta.
+CONSULTAS_PARALELAS = max(1, min(int(carregar_config("SGA_CONSULTAS_PARALELAS", 4)), POOL_MIN))
+
+_executor_consultas = None
+_executor_lock = threading.Lock()
+
+def _executor():
+    global _executor_consultas
+    if _executor_consultas is None:
+        with _executor_lock:
+            if _executor_consultas is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _executor_consultas = ThreadPoolExecutor(max_workers=CONSULTAS_PARALELAS, thread_name_prefix="sga-consulta")
+    return _executor_consultas
+
+def run_queries_cached(consultas, ttl=None):
+    """
+    Executa vários SELECTs independentes de uma vez, com o mesmo cache do run_query_cached.
+    consultas: {nome: sql} ou {nome: (sql, params)}. Retorna {nome: DataFrame}, na mesma ordem.
+    O nome vira o rótulo da instrumentação. Só as consultas fora do cache vão para o pool;
+    as threads não chamam o Streamlit (erros são mostrados aqui, na thread da página).
+    """
+    pedidos = {}
+    for nome, consulta in consultas.items():
+        query, params = (consulta, None) if isinstance(consulta, str) else consulta
+        pedidos[nome] = (query, params)
+
+    resultados, pendentes = {}, []
+    agora = time.monotonic()
+    for nome, (query, params) in pedidos.items():
+        valor = _buscar_no_cache(_chave_sql(query, params), agora)
+        if valor is _AUSENTE:
+            pendentes.append(nome)
+        else:
+            resultados[nome] = valor.copy()
+
+    if len(pendentes) == 1:
+        nome = pendentes[0]
+        resultados[nome] = run_query_cached(*pedidos[nome], ttl=ttl, rotulo=nome)
+    elif pendentes:
+        contexto = instrumentacao.contexto_atual()
+
+        def buscar(nome):
+            with instrumentacao.no_contexto(contexto):
+                return consultar_cached(*pedidos[nome], ttl=ttl, rotulo=nome)
+
+        futuros = {nome: _executor().submit(buscar, nome) for nome in pendentes}
+        for nome, futuro in futuros.items():
+            try:
+                resultados[nome] = futuro.result()
+            except Exception as e:
+                resultados[nome] = _falha_consulta(e)
+
+    return {nome: resultados[nome] for nome in pedidos}
 
 # ==============================================================================
-# 3. AUTENTICAÇÃO (LOGIN)
+# 4. AUTENTICAÇÃO (LOGIN)
 # ==============================================================================
 
 def verificar_login(usuario, senha_digitada):
-    sql = "SELECT senha_hash, nome FROM tb_usuarios WHERE usuario = %s"
-    df = run_query(sql, params=(usuario,))
-    
-    if df.empty:
-        return False, None
-    
-    hash_banco = df.iloc[0]['senha_hash']
-    nome_usuario = df.iloc[0]['nome']
-    
-    senha_bytes = senha_digitada.encode('utf-8')
-    
-    if isinstance(hash_banco, str):
-        hash_bytes = hash_banco.encode('utf-8')
-    else:
-        hash_bytes = hash_banco
-    
-    if bcrypt.checkpw(senha_bytes, hash_bytes):
-        return True, nome_usuario
-    else:
-        return False, None
+    """Compatibilidade: (sucesso, nome). O login em si está em database/autenticacao.py."""
+    from database import autenticacao  # Import tardio: autenticacao importa este módulo
+    sucesso, nome, _ = autenticacao.autenticar(usuario, senha_digitada)
+    return sucesso, nome
 
 # ==============================================================================
-# 4. GESTÃO DE ALOCAÇÕES (TRANSAÇÕES)
+# 5. GESTÃO DE ALOCAÇÕES (TRANSAÇÕES)
 # ==============================================================================
 
+TABELAS_GRADE = ["tb_grade_turma", "tb_grade_docente"]
+TABELAS_ALOCACAO = ["tb_alocacoes", "tb_alocacao_turmas"] + TABELAS_GRADE
+
+def entidades_das_grades(ids_turmas=(), ids_docentes=()):
+    """Entidades tocadas por uma escrita de alocação: as grades dessas turmas e docentes mudaram."""
+    return {"tb_grade_turma": {int(t) for t in ids_turmas}, "tb_grade_docente": {int(d) for d in ids_docentes}}
+
+# Funções chamadas após cada escrita de alocação confirmada (ex: índice de ocupação)
+_ouvintes_escrita = []
+
+def registrar_ouvinte_escrita(funcao):
+    """
+    Registra funcao(evento), chamada após o commit de cada inserção/exclusão de alocação.
+    evento["carimbos"] traz o retorno de invalidar_tabelas para essa escrita.
+    """
+    if funcao not in _ouvintes_escrita:
+        _ouvintes_escrita.append(funcao)
+
+# Restrições da migração 0003 -> motivo mostrado ao usuário
+_CONFLITOS = {
+    "ex_alocacoes_sala": "a sala já está ocupada neste dia e horário",
+    "ex_alocacoes_docente": "o docente já tem aula neste dia e horário",
+}
+
+def mensagem_conflito(erro):
+    """Traduz uma violação de unicidade/exclusão da grade numa mensagem clara (None se o erro for outro)."""
+    from psycopg2 import errors as pg_errors
+    restricao = getattr(getattr(erro, "diag", None), "constraint_name", None)
+    if isinstance(erro, pg_errors.ExclusionViolation):
+        # O detalhe traz as faixas em minutos da semana: ilegível para quem usa a tela
+        return f"Conflito: {_CONFLITOS.get(restricao, f'horário sobreposto ({restricao})')}."
+    if not isinstance(erro, pg_errors.UniqueViolation):
+        return None
+    motivo = _CONFLITOS.get(restricao, f"registro duplicado ({restricao})")
+    chave = re.search(r"=\((.*)\)", erro.diag.message_detail or "")
+    return f"Conflito: {motivo}" + (f" [{chave.group(1)}]." if chave else ".")
+
+def _notificar_escrita(evento):
+    for funcao in _ouvintes_escrita:
+        try:
+            funcao(evento)
+        except Exception as e:
+            print(f"⚠️  Ouvinte de escrita falhou: {e}")
+
+@instrumentacao.medido("criar_alocacao_completa")
 def criar_alocacao_completa(dados_aula, lista_ids_turmas):
     conn = get_connection()
     if not conn: return False, "Erro de conexão"
     
     cursor = conn.cursor()
     try:
-        # 1. Inserir Aula Principal
+        # 1. Inserir Aula Principal (horário explícito ou o atalho do turno)
+        turno, inicio, fim = horario_da_aula(dados_aula)
         sql_aula = """
-            INSERT INTO tb_alocacoes (dia_semana, turno, modalidade, id_sala, id_docente, id_disciplina)
-            VALUES (%s, %s, %s, %s, %s, %s)
+            INSERT INTO tb_alocacoes (dia_semana, turno, hora_inicio, hora_fim, modalidade, id_sala, id_docente, id_disciplina)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             RETURNING id_alocacao;
         """
         cursor.execute(sql_aula, (
-            dados_aula['dia'], dados_aula['turno'], dados_aula['modalidade'],
+            dados_aula['dia'], turno, hora_texto(inicio), hora_texto(fim), dados_aula['modalidade'],
             dados_aula['id_sala'], dados_aula['id_docente'], dados_aula['id_disciplina']
         ))
         id_gerado = cursor.fetchone()[0]
@@ -156,28 +634,244 @@ def criar_alocacao_completa(dados_aula, lista_ids_turmas):
         sql_vinculo = "INSERT INTO tb_alocacao_turmas (id_alocacao, id_turma) VALUES (%s, %s)"
         for id_turma in lista_ids_turmas:
             cursor.execute(sql_vinculo, (id_gerado, id_turma))
+        
+        # 3. Atualizar as grades materializadas só das turmas/docente tocados
+        atualizar_grades_materializadas(cursor, lista_ids_turmas, [dados_aula['id_docente']])
+        entidades = entidades_das_grades(lista_ids_turmas, [dados_aula['id_docente']])
+        publicar_alteracao(cursor, TABELAS_ALOCACAO, entidades)
             
         conn.commit()
+        carimbos = invalidar_tabelas(TABELAS_ALOCACAO, entidades)
+        _notificar_escrita({
+            "acao": "inserir", "id_alocacao": id_gerado, "carimbos": carimbos,
+            "dia": dados_aula['dia'], "inicio": inicio, "fim": fim,
+            "id_sala": int(dados_aula['id_sala']), "id_docente": int(dados_aula['id_docente']),
+            "turmas": [int(t) for t in lista_ids_turmas],
+        })
         return True, "Alocação realizada com sucesso!"
     except Exception as e:
         conn.rollback()
-        return False, f"Erro na transação: {str(e)}"
+        return False, mensagem_conflito(e) or f"Erro na transação: {str(e)}"
     finally:
         cursor.close()
         conn.close()
 
+@instrumentacao.medido("criar_alocacoes_em_lote")
+def criar_alocacoes_em_lote(aulas):
+    """
+    Insere várias alocações numa única transação (tudo ou nada).
+    Cada aula é um dicionário como o de criar_alocacao_completa, mais a chave 'turmas'.
+    Retorna (sucesso, mensagem, lista de ids gerados).
+    """
+    if not aulas:
+        return True, "Nada a gravar.", []
+    from psycopg2.extras import execute_values
+
+    conn = get_connection()
+    if not conn: return False, "Erro de conexão", []
+
+    cursor = conn.cursor()
+    try:
+        # 1. Inserir todas as aulas num único INSERT multi-linha
+        sql_aula = """
+            INSERT INTO tb_alocacoes (dia_semana, turno, hora_inicio, hora_fim, modalidade, id_sala, id_docente, id_disciplina)
+            VALUES %s
+            RETURNING id_alocacao
+        """
+        horarios = [horario_da_aula(a) for a in aulas]
+        valores = [
+            (a['dia'], turno, hora_texto(inicio), hora_texto(fim), a['modalidade'],
+             int(a['id_sala']), int(a['id_docente']), int(a['id_disciplina']))
+            for a, (turno, inicio, fim) in zip(aulas, horarios)
+        ]
+        ids_gerados = [linha[0] for linha in execute_values(cursor, sql_aula, valores, page_size=1000, fetch=True)]
+
+        # 2. Inserir todos os vínculos com turmas
+        vinculos = [(id_gerado, int(t)) for id_gerado, a in zip(ids_gerados, aulas) for t in a['turmas']]
+        execute_values(cursor, "INSERT INTO tb_alocacao_turmas (id_alocacao, id_turma) VALUES %s", vinculos, page_size=1000)
+
+        # 3. Atualizar as grades materializadas das turmas/docentes tocados
+        atualizar_grades_materializadas(cursor, [t for _, t in vinculos], [a['id_docente'] for a in aulas])
+        entidades = entidades_das_grades([t for _, t in vinculos], [a['id_docente'] for a in aulas])
+        publicar_alteracao(cursor, TABELAS_ALOCACAO, entidades)
+
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return False, mensagem_conflito(e) or f"Erro na transação: {str(e)}", []
+    finally:
+        cursor.close()
+        conn.close()
+
+    carimbos = invalidar_tabelas(TABELAS_ALOCACAO, entidades)
+    for id_gerado, a, (_, inicio, fim) in zip(ids_gerados, aulas, horarios):
+        _notificar_escrita({
+            "acao": "inserir", "id_alocacao": id_gerado, "carimbos": carimbos,
+            "dia": a['dia'], "inicio": inicio, "fim": fim,
+            "id_sala": int(a['id_sala']), "id_docente": int(a['id_docente']),
+            "turmas": [int(t) for t in a['turmas']],
+        })
+    return True, f"{len(ids_gerados)} alocações gravadas com sucesso!", ids_gerados
+
+@instrumentacao.medido("deletar_alocacao")
 def deletar_alocacao(id_alocacao):
-    sql = "DELETE FROM tb_alocacoes WHERE id_alocacao = %s"
-    return run_command(sql, (id_alocacao,))
+    id_alocacao = int(id_alocacao)
+    conn = get_connection()
+    if not conn:
+        return False, "Sem conexão com o banco."
+
+    cursor = conn.cursor()
+    try:
+        # Guarda turmas e docente antes do DELETE (os vínculos caem em cascata)
+        cursor.execute("SELECT id_turma FROM tb_alocacao_turmas WHERE id_alocacao = %s", (id_alocacao,))
+        turmas = [linha[0] for linha in cursor.fetchall()]
+        cursor.execute("DELETE FROM tb_alocacoes WHERE id_alocacao = %s RETURNING id_docente", (id_alocacao,))
+        linha = cursor.fetchone()
+        entidades = entidades_das_grades(turmas, [linha[0]] if linha else [])
+        if linha:
+            atualizar_grades_materializadas(cursor, turmas, [linha[0]])
+            publicar_alteracao(cursor, TABELAS_ALOCACAO, entidades)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return False, str(e)
+    finally:
+        cursor.close()
+        conn.close()
+
+    carimbos = invalidar_tabelas(TABELAS_ALOCACAO, entidades)
+    _notificar_escrita({"acao": "excluir", "id_alocacao": id_alocacao, "carimbos": carimbos})
+    return True, "Sucesso!"
+
+def get_grade_geral(dia=None):
+    """Grade Horária Geral do painel admin (uma linha por aula), opcionalmente de um só dia."""
+    sql = """
+        SELECT 
+            a.dia_semana,
+            to_char(a.hora_inicio, 'HH24:MI') || '-' || to_char(a.hora_fim, 'HH24:MI') AS horario,
+            s.nome AS sala,
+            prof.nome AS professor,
+            d.nome AS disciplina,
+            STRING_AGG(t.identificacao, ' + ' ORDER BY t.identificacao) AS turmas,
+            CASE 
+                WHEN SUM(t.qtd_alunos) > s.capacidade THEN '🔴 LOTADO'
+                ELSE '🟢 OK'
+            END AS status
+        FROM tb_alocacoes a
+        JOIN tb_salas s ON a.id_sala = s.id_sala
+        JOIN tb_docentes prof ON a.id_docente = prof.id_docente
+        JOIN tb_disciplinas d ON a.id_disciplina = d.id_disciplina
+        JOIN tb_alocacao_turmas atur ON a.id_alocacao = atur.id_alocacao
+        JOIN tb_turmas t ON atur.id_turma = t.id_turma
+        {filtro}
+        GROUP BY a.id_alocacao, a.dia_semana, a.hora_inicio, a.hora_fim, s.nome, s.capacidade, prof.nome, d.nome
+        ORDER BY s.nome, a.hora_inicio
+    """
+    if dia:
+        return run_query_cached(sql.format(filtro="WHERE a.dia_semana = %s"), params=(dia,), rotulo="grade_geral")
+    return run_query_cached(sql.format(filtro=""), rotulo="grade_geral")
 
 # ==============================================================================
-# 5. CALENDÁRIO VISUAL
+# 6. CALENDÁRIO VISUAL
 # ==============================================================================
 
+MAP_DIAS = {'Segunda': 0, 'Terca': 1, 'Quarta': 2, 'Quinta': 3, 'Sexta': 4, 'Sabado': 5}
+# Atalhos de horário: cada aula guarda o horário real (hora_inicio/hora_fim, migração 0004)
+# e o turno fica como preset na tela e como agrupamento nos relatórios.
+MAP_HORARIOS = {
+    'Matutino': {'start': '08:00:00', 'end': '11:30:00'},
+    'Vespertino': {'start': '14:00:00', 'end': '17:30:00'},
+    'Noturno': {'start': '19:00:00', 'end': '22:00:00'}
+}
+CORES_TURNO = {'Matutino': "#3DD56D", 'Vespertino': "#FFC107", 'Noturno': "#FF4B4B"}
+
+def minutos(hora):
+    """Minutos desde 00:00 de '08:00', '08:00:00', datetime.time ou um número (já em minutos)."""
+    if hasattr(hora, "hour"):
+        return hora.hour * 60 + hora.minute
+    if isinstance(hora, str):
+        horas, mins = hora.split(":")[:2]
+        return int(horas) * 60 + int(mins)
+    return int(hora)
+
+def hora_texto(total):
+    """Minutos desde 00:00 -> 'HH:MM'."""
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+def horario_do_turno(turno):
+    """(inicio, fim) em minutos do atalho do turno."""
+    hrs = MAP_HORARIOS[turno]
+    return minutos(hrs['start']), minutos(hrs['end'])
+
+def turno_do_horario(inicio):
+    """Turno (agrupamento dos relatórios) de uma aula que começa em 'inicio'."""
+    inicio = minutos(inicio)
+    if inicio < 12 * 60:
+        return 'Matutino'
+    return 'Vespertino' if inicio < 18 * 60 else 'Noturno'
+
+def horario_da_aula(aula):
+    """
+    (turno, inicio, fim) em minutos de uma aula {'turno', 'inicio', 'fim'}: sem
+    horário explícito vale o atalho do turno; sem turno, ele sai do início.
+    Levanta ValueError se o horário for inválido.
+    """
+    if aula.get('inicio') is not None and aula.get('fim') is not None:
+        inicio, fim = minutos(aula['inicio']), minutos(aula['fim'])
+        turno = aula.get('turno') or turno_do_horario(inicio)
+    elif aula.get('turno') in MAP_HORARIOS:
+        turno = aula['turno']
+        inicio, fim = horario_do_turno(turno)
+    else:
+        raise ValueError(f"Horário inválido: turno '{aula.get('turno')}' sem hora de início e fim.")
+    if not 0 <= inicio < fim < 24 * 60:
+        raise ValueError(f"Horário inválido: {hora_texto(inicio)} a {hora_texto(fim)}.")
+    return turno, inicio, fim
+
+@lru_cache(maxsize=8)
+def _datas_semana(inicio_semana):
+    """Data ("AAAA-MM-DD") de cada dia da semana que começa em inicio_semana."""
+    return {dia: (inicio_semana + timedelta(days=delta)).strftime('%Y-%m-%d') for dia, delta in MAP_DIAS.items()}
+
+def montar_eventos_calendario(df, hoje=None):
+    """Converte as alocações em eventos do calendário, coluna a coluna (sem iterrows)."""
+    if df.empty:
+        return []
+
+    hoje = hoje or datetime.now()
+    inicio_semana = (hoje - timedelta(days=hoje.weekday())).date()
+    datas = df['dia_semana'].map(_datas_semana(inicio_semana))
+    validos = datas.notna()
+    if not validos.all():
+        df, datas = df[validos], datas[validos]
+
+    # Cada coluna é montada de uma vez; só a criação dos dicionários é por linha
+    titulos = (df['sala'].astype(str) + " | " + df['professor'].astype(str)).tolist()
+    inicios = (datas + "T" + df['hora_inicio'].astype(str)).tolist()
+    fins = (datas + "T" + df['hora_fim'].astype(str)).tolist()
+    cores = df['turno'].map(CORES_TURNO).tolist()
+    salas = df['sala'].tolist()
+    disciplinas = df['disciplina'].tolist()
+    capacidades = df['capacidade'].tolist()
+
+    return [
+        {
+            "title": titulo,
+            "start": inicio,
+            "end": fim,
+            "resourceId": sala,
+            "extendedProps": {"disciplina": disciplina, "capacidade": capacidade},
+            "backgroundColor": cor,
+        }
+        for titulo, inicio, fim, sala, disciplina, capacidade, cor
+        in zip(titulos, inicios, fins, salas, disciplinas, capacidades, cores)
+    ]
+
 def get_dados_calendario():
     sql = """
         SELECT 
             a.id_alocacao, a.dia_semana, a.turno,
+            to_char(a.hora_inicio, 'HH24:MI:SS') AS hora_inicio, to_char(a.hora_fim, 'HH24:MI:SS') AS hora_fim,
             s.nome AS sala, prof.nome AS professor,
             d.nome AS disciplina, s.capacidade
         FROM tb_alocacoes a
@@ -185,94 +879,159 @@ def get_dados_calendario():
         JOIN tb_docentes prof ON a.id_docente = prof.id_docente
         JOIN tb_disciplinas d ON a.id_disciplina = d.id_disciplina
     """
-    df = run_query(sql)
-    
-    events = []
-    map_dias = {'Segunda': 0, 'Terca': 1, 'Quarta': 2, 'Quinta': 3, 'Sexta': 4, 'Sabado': 5}
-    map_horarios = {
-        'Matutino': {'start': '08:00:00', 'end': '11:30:00'},
-        'Vespertino': {'start': '14:00:00', 'end': '17:30:00'},
-        'Noturno': {'start': '19:00:00', 'end': '22:00:00'}
-    }
-    
-    hoje = datetime.now()
-    inicio_semana = hoje - timedelta(days=hoje.weekday()) 
-    
-    if not df.empty:
-        for _, row in df.iterrows():
-            if row['dia_semana'] in map_dias and row['turno'] in map_horarios:
-                delta = map_dias[row['dia_semana']]
-                data_ev = (inicio_semana + timedelta(days=delta)).strftime('%Y-%m-%d')
-                hrs = map_horarios[row['turno']]
-                
-                event = {
-                    "title": f"{row['sala']} | {row['professor']}",
-                    "start": f"{data_ev}T{hrs['start']}",
-                    "end": f"{data_ev}T{hrs['end']}",
-                    "resourceId": row['sala'],
-                    "extendedProps": {
-                        "disciplina": row['disciplina'],
-                        "capacidade": row['capacidade']
-                    },
-                    "backgroundColor": "#FF4B4B" if row['turno'] == 'Noturno' else "#3DD56D" if row['turno'] == 'Matutino' else "#FFC107"
-                }
-                events.append(event)
-    return events
+    df = run_query(sql, rotulo="dados_calendario")
+    return montar_eventos_calendario(df)
 
 # ==============================================================================
-# 6. PORTAIS (ALUNO E DOCENTE)
+# 7. PORTAIS (ALUNO E DOCENTE)
 # ==============================================================================
 
+# Consultas dos portais, compartilhadas com a API HTTP (database/api.py): o mesmo
+# texto gera a mesma chave no cache.
+SQL_TURMAS_POR_CURSO = "SELECT id_turma, identificacao FROM tb_turmas WHERE id_curso = %s ORDER BY identificacao"
+SQL_DOCENTES = "SELECT id_docente, nome FROM tb_docentes ORDER BY nome"
+
+SQL_GRADE_DO_ALUNO = """
+    SELECT dia_semana, turno, to_char(hora_inicio, 'HH24:MI') AS hora_inicio, to_char(hora_fim, 'HH24:MI') AS hora_fim,
+           modalidade, sala, tipo_sala, disciplina, professor
+    FROM tb_grade_turma
+    WHERE id_turma = %s
+    ORDER BY ordem_dia, hora_inicio, id_alocacao
+"""
+
+SQL_GRADE_DO_PROFESSOR = """
+    SELECT dia_semana, turno, to_char(hora_inicio, 'HH24:MI') AS hora_inicio, to_char(hora_fim, 'HH24:MI') AS hora_fim,
+           modalidade, sala, tipo_sala, disciplina, turmas_unificadas
+    FROM tb_grade_docente
+    WHERE id_docente = %s
+    ORDER BY ordem_dia, hora_inicio, id_alocacao
+"""
+
 def get_turmas_por_curso(id_curso):
-    sql = "SELECT id_turma, identificacao FROM tb_turmas WHERE id_curso = %s ORDER BY identificacao"
-    return run_query(sql, params=(id_curso,))
+    return run_query_cached(SQL_TURMAS_POR_CURSO, params=(id_curso,), rotulo="turmas_por_curso")
 
-def get_grade_do_aluno(id_turma):
+def get_docentes():
+    return run_query_cached(SQL_DOCENTES, rotulo="docentes")
+
+def get_hierarquia_cursos():
+    """
+    Árvore curso -> semestres -> turmas dos seletores do Portal do Aluno, montada
+    numa única consulta e compartilhada por todas as sessões do processo:
+    {curso: {"id_curso": int, "semestres": {descricao: {"id_semestre": int, "turmas": {identificacao: id_turma}}}}}
+    """
     sql = """
-        SELECT 
-            a.dia_semana, a.turno, a.modalidade,
-            s.nome AS sala, s.tipo AS tipo_sala,
-            d.nome AS disciplina, prof.nome AS professor
-        FROM tb_alocacoes a
-        JOIN tb_alocacao_turmas atur ON a.id_alocacao = atur.id_alocacao
-        JOIN tb_salas s ON a.id_sala = s.id_sala
-        JOIN tb_disciplinas d ON a.id_disciplina = d.id_disciplina
-        JOIN tb_docentes prof ON a.id_docente = prof.id_docente
-        WHERE atur.id_turma = %s
-        ORDER BY 
-            CASE 
-                WHEN a.dia_semana = 'Segunda' THEN 1
-                WHEN a.dia_semana = 'Terca' THEN 2
-                WHEN a.dia_semana = 'Quarta' THEN 3
-                WHEN a.dia_semana = 'Quinta' THEN 4
-                WHEN a.dia_semana = 'Sexta' THEN 5
-                WHEN a.dia_semana = 'Sabado' THEN 6
-            END, a.turno
+        SELECT c.id_curso, c.nome AS curso, s.id_semestre, s.descricao, t.id_turma, t.identificacao
+        FROM tb_cursos c
+        LEFT JOIN tb_turmas t ON t.id_curso = c.id_curso
+        LEFT JOIN tb_semestres s ON t.id_semestre = s.id_semestre
+        ORDER BY c.nome, s.id_semestre, t.identificacao
     """
-    return run_query(sql, params=(id_turma,))
+    def carregar():
+        import pandas as pd
+        arvore = {}
+        for id_curso, curso, id_semestre, descricao, id_turma, identificacao in _executar_consulta(sql, rotulo="hierarquia_cursos").itertuples(index=False, name=None):
+            no_curso = arvore.setdefault(curso, {"id_curso": int(id_curso), "semestres": {}})
+            if pd.isna(id_turma) or pd.isna(id_semestre):
+                continue  # Curso ainda sem turmas
+            no_semestre = no_curso["semestres"].setdefault(descricao, {"id_semestre": int(id_semestre), "turmas": {}})
+            no_semestre["turmas"][identificacao] = int(id_turma)
+        return arvore
+
+    return memoizar(("hierarquia_cursos",), ["tb_cursos", "tb_turmas", "tb_semestres"], carregar)
+
+def get_grade_do_aluno(id_turma):
+    """Grade da turma: leitura indexada na tabela materializada tb_grade_turma."""
+    id_turma = int(id_turma)
+    return run_query_cached(SQL_GRADE_DO_ALUNO, params=(id_turma,), rotulo="grade_do_aluno",
+                            entidades={"tb_grade_turma": [id_turma]})
 
 def get_grade_do_professor(id_docente):
-    sql = """
-        SELECT 
-            a.dia_semana, a.turno, a.modalidade,
-            s.nome AS sala, s.tipo AS tipo_sala,
-            d.nome AS disciplina,
-            STRING_AGG(t.identificacao, ' + ') AS turmas_unificadas
-        FROM tb_alocacoes a
-        JOIN tb_salas s ON a.id_sala = s.id_sala
-        JOIN tb_disciplinas d ON a.id_disciplina = d.id_disciplina
-        JOIN tb_alocacao_turmas atur ON a.id_alocacao = atur.id_alocacao
-        JOIN tb_turmas t ON atur.id_turma = t.id_turma
-        WHERE a.id_docente = %s
-        GROUP BY a.id_alocacao, a.dia_semana, a.turno, a.modalidade, s.nome, s.tipo, d.nome
-        ORDER BY 
-            CASE 
-                WHEN a.dia_semana = 'Segunda' THEN 1
-                WHEN a.dia_semana = 'Terca' THEN 2
-                WHEN a.dia_semana = 'Quarta' THEN 3
-                WHEN a.dia_semana = 'Quinta' THEN 4
-                WHEN a.dia_semana = 'Sexta' THEN 5
-                WHEN a.dia_semana = 'Sabado' THEN 6
-            END, a.turno
-    """
-    return run_query(sql, params=(id_docente,))
\ No newline at end of file
+    """Grade do docente: leitura indexada na tabela materializada tb_grade_docente."""
+    id_docente = int(id_docente)
+    return run_query_cached(SQL_GRADE_DO_PROFESSOR, params=(id_docente,), rotulo="grade_do_professor",
+                            entidades={"tb_grade_docente": [id_docente]})
+
+# ==============================================================================
+# 8. GRADES MATERIALIZADAS (PORTAIS)
+# ==============================================================================
+
+# As grades dos portais só mudam quando uma alocação é criada ou apagada. Em vez
+# de refazer o JOIN de 4-5 tabelas com STRING_AGG a cada visualização, mantemos
+# tabelas desnormalizadas por turma e por docente (criadas pela migração 0002),
+# atualizadas na mesma transação da escrita e apenas para as turmas/docentes tocados.
+
+_SQL_ORDEM_DIA = """
+    CASE a.dia_semana
+        WHEN 'Segunda' THEN 1 WHEN 'Terca' THEN 2 WHEN 'Quarta' THEN 3
+        WHEN 'Quinta' THEN 4 WHEN 'Sexta' THEN 5 WHEN 'Sabado' THEN 6
+    END
+"""
+
+_SQL_GRADE_TURMA = f"""
+    INSERT INTO tb_grade_turma
+    SELECT
+        atur.id_turma, a.id_alocacao, {_SQL_ORDEM_DIA}, a.dia_semana, a.turno, a.modalidade,
+        s.nome, s.tipo, d.nome, prof.nome, a.hora_inicio, a.hora_fim
+    FROM tb_alocacoes a
+    JOIN tb_alocacao_turmas atur ON a.id_alocacao = atur.id_alocacao
+    JOIN tb_salas s ON a.id_sala = s.id_sala
+    JOIN tb_disciplinas d ON a.id_disciplina = d.id_disciplina
+    JOIN tb_docentes prof ON a.id_docente = prof.id_docente
+"""
+
+_SQL_GRADE_DOCENTE = f"""
+    INSERT INTO tb_grade_docente
+    SELECT
+        a.id_docente, a.id_alocacao, {_SQL_ORDEM_DIA}, a.dia_semana, a.turno, a.modalidade,
+        s.nome, s.tipo, d.nome, STRING_AGG(t.identificacao, ' + ' ORDER BY t.identificacao),
+        a.hora_inicio, a.hora_fim
+    FROM tb_alocacoes a
+    JOIN tb_salas s ON a.id_sala = s.id_sala
+    JOIN tb_disciplinas d ON a.id_disciplina = d.id_disciplina
+    JOIN tb_alocacao_turmas atur ON a.id_alocacao = atur.id_alocacao
+    JOIN tb_turmas t ON atur.id_turma = t.id_turma
+    {{filtro}}
+    GROUP BY a.id_alocacao, a.id_docente, a.dia_semana, a.turno, a.modalidade, s.nome, s.tipo, d.nome,
+             a.hora_inicio, a.hora_fim
+"""
+
+# Tabelas cujas edições (UPDATE/DELETE) mudam textos já copiados para as grades
+_TABELAS_CADASTRO_GRADE = {"tb_salas", "tb_docentes", "tb_disciplinas", "tb_turmas"}
+
+def _afeta_grades(command, tabelas):
+    if not tabelas:
+        return False
+    if tabelas[0] in ("tb_alocacoes", "tb_alocacao_turmas"):
+        return True
+    return tabelas[0] in _TABELAS_CADASTRO_GRADE and not command.lstrip().upper().startswith("INSERT")
+
+# Duas transações recalculando a mesma turma (ou docente) ao mesmo tempo: o
+# DELETE da segunda não enxerga as linhas que a primeira inseriu e ainda não
+# confirmou, e o INSERT dela violaria a chave primária da grade. Cada recálculo
+# segura um advisory lock por turma/docente até o fim da transação, sempre em
+# ordem crescente de id (turmas antes de docentes) para não haver deadlock; a
+# reconstrução completa trava as duas tabelas contra escritas concorrentes.
+_SQL_TRAVAR_GRADE = "SELECT pg_advisory_xact_lock(hashtext(%s), id) FROM unnest(%s::int[]) AS id"
+
+def reconstruir_grades_materializadas(cursor):
+    """Recalcula as grades de todas as turmas e docentes (usado na criação e em edições de cadastro)."""
+    cursor.execute("LOCK TABLE tb_grade_turma, tb_grade_docente IN SHARE ROW EXCLUSIVE MODE")
+    cursor.execute("DELETE FROM tb_grade_turma")
+    cursor.execute("DELETE FROM tb_grade_docente")
+    cursor.execute(_SQL_GRADE_TURMA)
+    cursor.execute(_SQL_GRADE_DOCENTE.format(filtro=""))
+
+def atualizar_grades_materializadas(cursor, ids_turmas=(), ids_docentes=()):
+    """Recalcula, dentro da transação do cursor, só as grades das turmas e docentes informados."""
+    turmas = sorted({int(t) for t in ids_turmas})
+    docentes = sorted({int(d) for d in ids_docentes})
+    if turmas:
+        cursor.execute(_SQL_TRAVAR_GRADE, ("sga_grade_turma", turmas))  # unnest preserva a ordem da lista
+    if docentes:
+        cursor.execute(_SQL_TRAVAR_GRADE, ("sga_grade_docente", docentes))
+    if turmas:
+        cursor.execute("DELETE FROM tb_grade_turma WHERE id_turma = ANY(%s)", (turmas,))
+        cursor.execute(_SQL_GRADE_TURMA + " WHERE atur.id_turma = ANY(%s)", (turmas,))
+    if docentes:
+        cursor.execute("DELETE FROM tb_grade_docente WHERE id_docente = ANY(%s)", (docentes,))
+        cursor.execute(_SQL_GRADE_DOCENTE.format(filtro="WHERE a.id_docente = ANY(%s)"), (docentes,))
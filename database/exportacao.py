@@ -0,0 +1,199 @@
+"""
+Exportação da grade completa (CSV, Parquet ou XLSX) em streaming.
+
+A grade já vem "montada" do banco (sala, docente, disciplina, turmas e status
+de lotação) e é lida por um cursor do lado do servidor, em lotes. Cada lote é
+escrito direto no arquivo de saída, então a memória usada não depende do
+tamanho da grade.
+
+Uso pela linha de comando:
+    python -m database.exportacao grade.parquet [--dia Segunda] [--turno Noturno] [--curso 3] [--docente 7]
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import tempfile
+
+# Permite rodar como script a partir da raiz do projeto
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_connection as db
+
+FORMATOS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+TAMANHO_LOTE = 5000
+
+COLUNAS = [
+    "id_alocacao", "dia_semana", "turno", "hora_inicio", "hora_fim", "modalidade", "sala", "tipo_sala", "capacidade",
+    "professor", "disciplina", "turmas", "alunos", "status",
+]
+
+_SQL_GRADE = """
+    SELECT
+        a.id_alocacao, a.dia_semana, a.turno,
+        to_char(a.hora_inicio, 'HH24:MI') AS hora_inicio, to_char(a.hora_fim, 'HH24:MI') AS hora_fim, a.modalidade,
+        s.nome AS sala, s.tipo AS tipo_sala, s.capacidade,
+        prof.nome AS professor, d.nome AS disciplina,
+        STRING_AGG(t.identificacao, ' + ' ORDER BY t.identificacao) AS turmas,
+        COALESCE(SUM(t.qtd_alunos), 0) AS alunos,
+        CASE WHEN SUM(t.qtd_alunos) > s.capacidade THEN 'LOTADO' ELSE 'OK' END AS status
+    FROM tb_alocacoes a
+    JOIN tb_salas s ON a.id_sala = s.id_sala
+    JOIN tb_docentes prof ON a.id_docente = prof.id_docente
+    JOIN tb_disciplinas d ON a.id_disciplina = d.id_disciplina
+    JOIN tb_alocacao_turmas atur ON a.id_alocacao = atur.id_alocacao
+    JOIN tb_turmas t ON atur.id_turma = t.id_turma
+    {filtros}
+    GROUP BY a.id_alocacao, a.dia_semana, a.turno, a.hora_inicio, a.hora_fim, a.modalidade,
+             s.nome, s.tipo, s.capacidade, prof.nome, d.nome
+    ORDER BY {ordem_dia}, a.hora_inicio, s.nome
+"""
+
+# ==============================================================================
+# 1. LEITURA EM LOTES (CURSOR DO LADO DO SERVIDOR)
+# ==============================================================================
+
+def _montar_sql(dia=None, turno=None, id_curso=None, id_docente=None):
+    condicoes, params = [], []
+    if dia:
+        condicoes.append("a.dia_semana = %s")
+        params.append(dia)
+    if turno:
+        condicoes.append("a.turno = %s")
+        params.append(turno)
+    if id_docente:
+        condicoes.append("a.id_docente = %s")
+        params.append(int(id_docente))
+    if id_curso:
+        condicoes.append("""EXISTS (
+            SELECT 1 FROM tb_alocacao_turmas x JOIN tb_turmas y ON x.id_turma = y.id_turma
+            WHERE x.id_alocacao = a.id_alocacao AND y.id_curso = %s)""")
+        params.append(int(id_curso))
+    filtros = ("WHERE " + " AND ".join(condicoes)) if condicoes else ""
+    # Dias na ordem da semana (como nas grades materializadas), não em ordem alfabética
+    return _SQL_GRADE.format(filtros=filtros, ordem_dia=db._SQL_ORDEM_DIA.strip()), params
+
+def ler_lotes(**filtros):
+    """Gera listas de tuplas (no máximo TAMANHO_LOTE por vez) na ordem de COLUNAS."""
+    sql, params = _montar_sql(**filtros)
+    conn = db.get_connection()
+    if not conn:
+        raise RuntimeError("Sem conexão com o banco.")
+    try:
+        # Cursor nomeado = cursor do lado do servidor: o banco entrega aos poucos
+        cursor = conn.cursor(name="sga_exportacao")
+        cursor.itersize = TAMANHO_LOTE
+        cursor.execute(sql, params)
+        while True:
+            lote = cursor.fetchmany(TAMANHO_LOTE)
+            if not lote:
+                break
+            yield lote
+    finally:
+        conn.rollback()  # Só leitura: encerra a transação e o cursor nomeado
+        conn.close()
+
+# ==============================================================================
+# 2. ESCRITORES POR FORMATO
+# ==============================================================================
+
+def _escrever_csv(lotes, saida):
+    texto = io.TextIOWrapper(saida, encoding="utf-8", newline="", write_through=True)
+    escritor = csv.writer(texto)
+    escritor.writerow(COLUNAS)
+    total = 0
+    for lote in lotes:
+        escritor.writerows(lote)
+        total += len(lote)
+    texto.detach()  # Não fecha o arquivo de saída
+    return total
+
+def _escrever_parquet(lotes, saida):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Para exportar Parquet instale o pyarrow (pip install pyarrow).")
+    esquema = pa.schema([
+        ("id_alocacao", pa.int64()), ("dia_semana", pa.string()), ("turno", pa.string()),
+        ("hora_inicio", pa.string()), ("hora_fim", pa.string()), ("modalidade", pa.string()),
+        ("sala", pa.string()), ("tipo_sala", pa.string()),
+        ("capacidade", pa.int64()), ("professor", pa.string()), ("disciplina", pa.string()),
+        ("turmas", pa.string()), ("alunos", pa.int64()), ("status", pa.string()),
+    ])
+    total = 0
+    with pq.ParquetWriter(saida, esquema) as escritor:
+        for lote in lotes:
+            colunas = list(zip(*lote))
+            escritor.write_table(pa.table([list(c) for c in colunas], schema=esquema))
+            total += len(lote)
+    return total
+
+def _escrever_xlsx(lotes, saida):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("Para exportar XLSX instale o openpyxl (pip install openpyxl).")
+    livro = Workbook(write_only=True)  # Modo streaming: linhas não ficam em memória
+    planilha = livro.create_sheet("Grade")
+    planilha.append(COLUNAS)
+    total = 0
+    for lote in lotes:
+        for linha in lote:
+            planilha.append(list(linha))
+        total += len(lote)
+    livro.save(saida)
+    return total
+
+_ESCRITORES = {"csv": _escrever_csv, "parquet": _escrever_parquet, "xlsx": _escrever_xlsx}
+
+def exportar(saida, formato="csv", **filtros):
+    """
+    Escreve a grade filtrada em 'saida' (caminho ou arquivo binário).
+    Filtros aceitos: dia, turno, id_curso, id_docente. Retorna o nº de linhas.
+    """
+    if formato not in _ESCRITORES:
+        raise ValueError(f"Formato inválido: {formato}. Use: {', '.join(FORMATOS)}")
+    if isinstance(saida, (str, os.PathLike)):
+        with open(saida, "wb") as arquivo:
+            return _ESCRITORES[formato](ler_lotes(**filtros), arquivo)
+    return _ESCRITORES[formato](ler_lotes(**filtros), saida)
+
+def gerar_arquivo(formato="csv", **filtros):
+    """
+    Exporta para um arquivo temporário (vai para o disco se passar de 16 MB). Retorna (arquivo, linhas).
+    Atenção: o st.download_button lê o arquivo inteiro para a memória do servidor
+    ao enviá-lo ao navegador. Para grades muito grandes use a linha de comando.
+    """
+    arquivo = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+    linhas = exportar(arquivo, formato, **filtros)
+    arquivo.seek(0)
+    return arquivo, linhas
+
+# ==============================================================================
+# 3. LINHA DE COMANDO
+# ==============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta a grade completa em CSV, Parquet ou XLSX.")
+    parser.add_argument("saida", help="Arquivo de saída (o formato vem da extensão se --formato for omitido).")
+    parser.add_argument("--formato", choices=list(FORMATOS))
+    parser.add_argument("--dia")
+    parser.add_argument("--turno")
+    parser.add_argument("--curso", type=int, help="id_curso")
+    parser.add_argument("--docente", type=int, help="id_docente")
+    args = parser.parse_args(argv)
+
+    formato = args.formato or os.path.splitext(args.saida)[1].lstrip(".").lower() or "csv"
+    linhas = exportar(args.saida, formato, dia=args.dia, turno=args.turno,
+                      id_curso=args.curso, id_docente=args.docente)
+    print(f"✅ {linhas} aulas exportadas para {args.saida}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""
+Importação em massa da grade a partir de CSV ou XLSX.
+
+O arquivo é lido em streaming (linha a linha, sem pandas), os nomes são
+resolvidos para ids com uma consulta por tabela, os conflitos são validados
+contra o arquivo inteiro + a grade existente numa única passada, e as linhas
+válidas são carregadas com COPY numa única transação.
+
+Colunas esperadas (cabeçalho na primeira linha):
+    dia_semana, turno, modalidade, sala, docente, disciplina, turmas
+Opcionais: hora_inicio, hora_fim ('HH:MM'). Sem elas vale o horário do turno;
+com elas o turno pode ficar em branco (sai da hora de início).
+Turmas unificadas vão na mesma célula separadas por '+'.
+
+Uso pela linha de comando:
+    python -m database.importacao grade.csv [--dry-run] [--tudo-ou-nada]
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import unicodedata
+
+# Permite rodar como script a partir da raiz do projeto
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_connection as db
+from database import ocupacao
+from database.agendador import DIAS_SEMANA, TURNOS
+
+COLUNAS = ["dia_semana", "turno", "modalidade", "sala", "docente", "disciplina", "turmas"]
+COLUNAS_OPCIONAIS = ["hora_inicio", "hora_fim"]
+MODALIDADES = ["Presencial", "Hibrido", "Semipresencial", "EAD"]
+TAMANHO_LOTE = 5000  # Linhas válidas enviadas por COPY
+
+# ==============================================================================
+# 1. LEITURA EM STREAMING
+# ==============================================================================
+
+def _sem_acento(texto):
+    texto = unicodedata.normalize("NFKD", str(texto))
+    return "".join(c for c in texto if not unicodedata.combining(c)).strip()
+
+def _linhas_csv(arquivo):
+    if isinstance(arquivo, (str, os.PathLike)):
+        arquivo = open(arquivo, newline="", encoding="utf-8-sig")
+    elif not isinstance(arquivo, io.TextIOBase):
+        arquivo = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    with arquivo:
+        amostra = arquivo.read(4096)
+        arquivo.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t") if amostra else csv.excel
+        except csv.Error:
+            dialeto = csv.excel  # Uma coluna só (ou separador estranho): o cabeçalho acusa o problema
+        leitor = csv.reader(arquivo, dialeto)
+        yield from leitor
+
+def _linhas_xlsx(arquivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("Para importar XLSX instale o openpyxl (pip install openpyxl).")
+    livro = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        for linha in livro.active.iter_rows(values_only=True):
+            yield ["" if v is None else v for v in linha]
+    finally:
+        livro.close()
+
+def ler_linhas(arquivo, formato=None):
+    """
+    Lê o cabeçalho e retorna um gerador de (numero_linha, dicionario) das linhas de dados.
+    Levanta ValueError na hora (antes de qualquer linha de dados) se faltar coluna obrigatória.
+    """
+    if formato is None:
+        nome = getattr(arquivo, "name", str(arquivo))
+        formato = "xlsx" if nome.lower().endswith(".xlsx") else "csv"
+    linhas = _linhas_xlsx(arquivo) if formato == "xlsx" else _linhas_csv(arquivo)
+
+    cabecalho = [_sem_acento(c).lower() for c in next(linhas, [])]
+    faltando = [c for c in COLUNAS if c not in cabecalho]
+    if faltando:
+        linhas.close()
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+    return _dados(linhas, cabecalho)
+
+def _dados(linhas, cabecalho):
+    for numero, valores in enumerate(linhas, start=2):
+        if not any(str(v).strip() for v in valores):
+            continue  # Linha em branco
+        yield numero, dict(zip(cabecalho, (str(v).strip() for v in valores)))
+
+# ==============================================================================
+# 2. RESOLUÇÃO DE NOMES (UMA CONSULTA POR TABELA)
+# ==============================================================================
+
+def _mapa(sql, chave="nome"):
+    """{nome normalizado: id} - nomes repetidos ficam marcados como ambíguos (None)."""
+    df = db.run_query_cached(sql)
+    mapa = {}
+    for nome, id_ in zip(df[chave], df.iloc[:, 0]):
+        nome = _sem_acento(nome).lower()
+        mapa[nome] = None if nome in mapa else int(id_)
+    return mapa
+
+def carregar_mapas():
+    return {
+        "sala": _mapa("SELECT id_sala, nome FROM tb_salas"),
+        "docente": _mapa("SELECT id_docente, nome FROM tb_docentes"),
+        "disciplina": _mapa("SELECT id_disciplina, nome FROM tb_disciplinas"),
+        "turma": _mapa("SELECT id_turma, identificacao FROM tb_turmas", chave="identificacao"),
+    }
+
+def _resolver(mapas, tipo, nome, erros):
+    id_ = mapas[tipo].get(_sem_acento(nome).lower(), -1)
+    if id_ == -1:
+        erros.append(f"{tipo} '{nome}' não encontrado(a)")
+    elif id_ is None:
+        erros.append(f"{tipo} '{nome}' é ambíguo(a) (nome repetido no cadastro)")
+    return id_ if id_ not in (-1, None) else None
+
+# ==============================================================================
+# 3. VALIDAÇÃO + CARGA (UMA PASSADA)
+# ==============================================================================
+
+_DIAS = {_sem_acento(d).lower(): d for d in DIAS_SEMANA}
+_TURNOS = {_sem_acento(t).lower(): t for t in TURNOS}
+_MODALIDADES = {_sem_acento(m).lower(): m for m in MODALIDADES}
+
+def _horario(linha, erros):
+    """(turno, inicio, fim) em minutos: horas explícitas ou o atalho do turno."""
+    turno = _TURNOS.get(_sem_acento(linha.get("turno", "")).lower())
+    inicio, fim = linha.get("hora_inicio") or None, linha.get("hora_fim") or None
+    if (inicio is None) != (fim is None):
+        erros.append("informe hora_inicio e hora_fim juntas")
+        return None
+    if inicio is None and not turno:
+        erros.append(f"turno inválido: '{linha.get('turno')}'")
+        return None
+    try:
+        return db.horario_da_aula({"turno": turno, "inicio": inicio, "fim": fim})
+    except ValueError:
+        erros.append(f"horário inválido: '{inicio}' a '{fim}'")
+        return None
+
+def _validar_linha(linha, mapas, agenda, id_provisorio):
+    """Retorna (aula, erros). 'agenda' acumula grade existente + linhas já aceitas."""
+    erros = []
+    dia = _DIAS.get(_sem_acento(linha.get("dia_semana", "")).lower())
+    horario = _horario(linha, erros)
+    modalidade = _MODALIDADES.get(_sem_acento(linha.get("modalidade", "") or "Presencial").lower())
+    if not dia:
+        erros.append(f"dia_semana inválido: '{linha.get('dia_semana')}'")
+    if not modalidade:
+        erros.append(f"modalidade inválida: '{linha.get('modalidade')}'")
+
+    id_sala = _resolver(mapas, "sala", linha.get("sala", ""), erros)
+    id_docente = _resolver(mapas, "docente", linha.get("docente", ""), erros)
+    id_disciplina = _resolver(mapas, "disciplina", linha.get("disciplina", ""), erros)
+    nomes_turmas = [t.strip() for t in linha.get("turmas", "").split("+") if t.strip()]
+    if not nomes_turmas:
+        erros.append("nenhuma turma informada")
+    ids_turmas = {_resolver(mapas, "turma", t, erros): t for t in nomes_turmas}
+    turmas = list(ids_turmas)
+    if erros:
+        return None, erros
+
+    turno, inicio, fim = horario
+    quando = f"{dia} {db.hora_texto(inicio)}-{db.hora_texto(fim)}"
+    conflitos = agenda.conflitos(dia, inicio, fim, id_sala, id_docente, turmas)
+    if conflitos["sala"]:
+        erros.append(f"sala '{linha['sala']}' já ocupada em {quando}")
+    if conflitos["docente"]:
+        erros.append(f"docente '{linha['docente']}' já tem aula em {quando}")
+    if conflitos["turmas"]:
+        erros.append(f"turma(s) já com aula em {quando}: {', '.join(ids_turmas[t] for t in conflitos['turmas'])}")
+    if erros:
+        return None, erros
+
+    # Linhas aceitas entram na agenda com id provisório (negativo) para barrar as próximas
+    agenda.adicionar(id_provisorio, dia, inicio, fim, id_sala, id_docente, turmas)
+    return {
+        "dia": dia, "turno": turno, "inicio": inicio, "fim": fim, "modalidade": modalidade,
+        "id_sala": id_sala, "id_docente": id_docente, "id_disciplina": id_disciplina, "turmas": turmas,
+    }, []
+
+def _copiar_lote(cursor, lote):
+    """Grava um lote com COPY (ids reservados antes na sequence)."""
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence('tb_alocacoes', 'id_alocacao')) FROM generate_series(1, %s)",
+        (len(lote),)
+    )
+    ids = [linha[0] for linha in cursor.fetchall()]
+
+    buf_aulas, buf_vinculos = io.StringIO(), io.StringIO()
+    w_aulas, w_vinculos = csv.writer(buf_aulas), csv.writer(buf_vinculos)
+    for id_alocacao, a in zip(ids, lote):
+        w_aulas.writerow([id_alocacao, a["dia"], a["turno"], db.hora_texto(a["inicio"]), db.hora_texto(a["fim"]),
+                          a["modalidade"], a["id_sala"], a["id_docente"], a["id_disciplina"]])
+        for id_turma in a["turmas"]:
+            w_vinculos.writerow([id_alocacao, id_turma])
+
+    buf_aulas.seek(0)
+    buf_vinculos.seek(0)
+    cursor.copy_expert(
+        "COPY tb_alocacoes (id_alocacao, dia_semana, turno, hora_inicio, hora_fim, modalidade, id_sala, id_docente, id_disciplina) "
+        "FROM STDIN WITH (FORMAT csv)",
+        buf_aulas
+    )
+    cursor.copy_expert("COPY tb_alocacao_turmas (id_alocacao, id_turma) FROM STDIN WITH (FORMAT csv)", buf_vinculos)
+
+def importar(arquivo, formato=None, dry_run=False, tudo_ou_nada=False):
+    """
+    Importa a grade do arquivo. Retorna um relatório:
+    {"lidas", "validas", "gravadas", "erros": [(linha, mensagem)], "dry_run"}.
+    Com tudo_ou_nada=True, qualquer erro cancela a importação inteira.
+    Arquivo sem as colunas obrigatórias levanta ValueError antes de abrir a transação;
+    erros de linha e do banco vão para o relatório.
+    """
+    dados = ler_linhas(arquivo, formato)
+    relatorio = {"lidas": 0, "validas": 0, "gravadas": 0, "erros": [], "dry_run": dry_run}
+    mapas = carregar_mapas()
+
+    agenda = ocupacao.agenda()
+
+    conn = cursor = None
+    if not dry_run:
+        conn = db.get_connection()
+        if not conn:
+            relatorio["erros"].append((0, "Sem conexão com o banco."))
+            return relatorio
+        cursor = conn.cursor()
+
+    turmas_tocadas, docentes_tocados = set(), set()
+    try:
+        lote = []
+        for numero, linha in dados:
+            relatorio["lidas"] += 1
+            aula, erros = _validar_linha(linha, mapas, agenda, -numero)
+            if erros:
+                relatorio["erros"].append((numero, "; ".join(erros)))
+                continue
+            relatorio["validas"] += 1
+            if cursor is None:
+                continue
+            lote.append(aula)
+            turmas_tocadas.update(aula["turmas"])
+            docentes_tocados.add(aula["id_docente"])
+            if len(lote) >= TAMANHO_LOTE:
+                _copiar_lote(cursor, lote)
+                relatorio["gravadas"] += len(lote)
+                lote = []
+
+        if cursor is not None:
+            if lote:
+                _copiar_lote(cursor, lote)
+                relatorio["gravadas"] += len(lote)
+            if tudo_ou_nada and relatorio["erros"]:
+                conn.rollback()
+                relatorio["gravadas"] = 0
+            else:
+                db.atualizar_grades_materializadas(cursor, turmas_tocadas, docentes_tocados)
+                entidades = db.entidades_das_grades(turmas_tocadas, docentes_tocados)
+                if relatorio["gravadas"]:
+                    db.publicar_alteracao(cursor, db.TABELAS_ALOCACAO, entidades)
+                conn.commit()
+                if relatorio["gravadas"]:
+                    db.invalidar_tabelas(db.TABELAS_ALOCACAO, entidades)
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        relatorio["gravadas"] = 0
+        relatorio["erros"].append((0, db.mensagem_conflito(e) or f"Erro na transação: {e}"))
+    finally:
+        if cursor is not None:
+            cursor.close()
+        if conn:
+            conn.close()
+    return relatorio
+
+# ==============================================================================
+# 4. LINHA DE COMANDO
+# ==============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa a grade de alocações de um CSV/XLSX.")
+    parser.add_argument("arquivo")
+    parser.add_argument("--dry-run", action="store_true", help="Só valida, não grava nada.")
+    parser.add_argument("--tudo-ou-nada", action="store_true", help="Qualquer erro cancela a importação.")
+    args = parser.parse_args(argv)
+
+    try:
+        relatorio = importar(args.arquivo, dry_run=args.dry_run, tudo_ou_nada=args.tudo_ou_nada)
+    except (ValueError, RuntimeError, OSError) as e:  # OSError: caminho inexistente ou ilegível
+        print(f"❌ {e}")
+        return 1
+    for numero, msg in relatorio["erros"]:
+        print(f"❌ Linha {numero}: {msg}")
+    print(f"📄 Lidas: {relatorio['lidas']} | ✅ Válidas: {relatorio['validas']} | 💾 Gravadas: {relatorio['gravadas']}")
+    return 1 if relatorio["erros"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
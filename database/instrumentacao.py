@@ -0,0 +1,290 @@
+"""
+Instrumentação da camada de dados.
+
+Cada chamada ao banco feita pelo db_connection gera um registro com: rótulo,
+impressão digital do SQL (texto normalizado, sem literais), duração, linhas
+retornadas, tempo esperando conexão do pool e a página do Streamlit que fez a
+chamada. Os registros ficam num buffer circular em memória (por processo),
+consultas acima do limite vão para o log de lentas e cada registro pode ser
+repassado a exportadores (ex: arquivo JSON lines para análise offline).
+
+Este módulo não depende do banco: o db_connection o configura ao ser importado.
+O pandas só é importado pelas funções de resumo.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache, wraps
+
+# Padrões (sobrescritos por configurar())
+LIMITE_LENTA_MS = 500.0     # Consulta acima disso vai para o log de lentas
+LIMITES_POR_ROTULO = {}     # {rotulo: ms} - limites específicos
+MAX_REGISTROS = 5000        # Tamanho do buffer circular de consultas
+MAX_LENTAS = 200
+MAX_EXECUCOES = 2000        # Reruns de página guardados
+
+_registros = deque(maxlen=MAX_REGISTROS)
+_lentas = deque(maxlen=MAX_LENTAS)
+_execucoes = deque(maxlen=MAX_EXECUCOES)
+_lock = threading.Lock()
+
+# Cada thread do Streamlit roda um rerun por vez: página e medições ativas ficam por thread
+_local = threading.local()
+
+# Funções chamadas com cada registro (ex: gravação em JSON lines)
+_exportadores = []
+
+# ==============================================================================
+# 1. CONFIGURAÇÃO E EXPORTAÇÃO
+# ==============================================================================
+
+def configurar(limite_lenta_ms=None, limites_por_rotulo=None, max_registros=None, arquivo_trace=None):
+    """Ajusta limites e buffers. 'arquivo_trace' liga a gravação contínua em JSON lines."""
+    global LIMITE_LENTA_MS, MAX_REGISTROS, _registros
+    if limite_lenta_ms is not None:
+        LIMITE_LENTA_MS = float(limite_lenta_ms)
+    if isinstance(limites_por_rotulo, str):
+        # Formato "rotulo=ms;rotulo=ms" (vindo de variável de ambiente/secrets)
+        pares = (item.rsplit("=", 1) for item in limites_por_rotulo.split(";") if "=" in item)
+        limites_por_rotulo = {r.strip(): ms for r, ms in pares}
+    if limites_por_rotulo:
+        LIMITES_POR_ROTULO.update({r: float(ms) for r, ms in limites_por_rotulo.items()})
+    if max_registros is not None and int(max_registros) != MAX_REGISTROS:
+        MAX_REGISTROS = int(max_registros)
+        with _lock:
+            _registros = deque(_registros, maxlen=MAX_REGISTROS)
+    if arquivo_trace:
+        registrar_exportador(exportador_jsonl(arquivo_trace))
+
+def registrar_exportador(funcao):
+    """Registra funcao(registro), chamada a cada consulta medida."""
+    if funcao not in _exportadores:
+        _exportadores.append(funcao)
+
+def exportador_jsonl(caminho):
+    """Cria um exportador que acrescenta cada registro como uma linha JSON em 'caminho'."""
+    trava = threading.Lock()
+
+    def exportar(registro):
+        linha = json.dumps(registro, ensure_ascii=False, default=str)
+        with trava, open(caminho, "a", encoding="utf-8") as arquivo:
+            arquivo.write(linha + "\n")
+
+    exportar.caminho = caminho
+    return exportar
+
+def exportar_jsonl(destino):
+    """Escreve o buffer atual (consultas e reruns) em JSON lines. 'destino' é um arquivo texto aberto."""
+    with _lock:
+        itens = list(_registros) + list(_execucoes)
+    for item in sorted(itens, key=lambda r: r["ts"]):
+        destino.write(json.dumps(item, ensure_ascii=False, default=str) + "\n")
+    return len(itens)
+
+def limpar():
+    with _lock:
+        _registros.clear()
+        _lentas.clear()
+        _execucoes.clear()
+
+# ==============================================================================
+# 2. MEDIÇÃO
+# ==============================================================================
+
+_RE_COMENTARIOS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_RE_LITERAIS = re.compile(r"'(?:[^']|'')*'|%\(\w+\)s|%s|\b\d+(?:\.\d+)?\b")
+_RE_ESPACOS = re.compile(r"\s+")
+_RE_TABELA = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
+def impressao_digital(sql):
+    """(hash curto, SQL normalizado): literais e parâmetros viram '?' e espaços são colapsados."""
+    texto = _RE_COMENTARIOS.sub(" ", sql)
+    texto = _RE_LITERAIS.sub("?", texto)
+    texto = _RE_ESPACOS.sub(" ", texto).strip()
+    return hashlib.md5(texto.encode("utf-8")).hexdigest()[:12], texto
+
+def _rotulo_padrao(texto):
+    verbo = texto.split(" ", 1)[0].upper() if texto else "SQL"
+    tabela = _RE_TABELA.search(texto)
+    return f"{verbo} {tabela.group(1)}" if tabela else verbo
+
+def pagina_atual():
+    return getattr(_local, "pagina", None)
+
+def iniciar_pagina(pagina):
+    """Marca o início de um rerun da página (chamar no topo do script do Streamlit)."""
+    _local.pagina = pagina
+    _local.rerun = {"inicio": time.perf_counter(), "consultas": 0, "banco_ms": 0.0}
+
+def definir_pagina(pagina):
+    """Renomeia a página do rerun atual (ex: depois de saber o item escolhido no menu)."""
+    _local.pagina = pagina
+
+def finalizar_pagina():
+    """Fecha o rerun iniciado por iniciar_pagina(). Reruns interrompidos por st.stop() não são contados."""
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return
+    _local.rerun = None
+    registro = {
+        "tipo": "rerun",
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "pagina": pagina_atual(),
+        "duracao_ms": round((time.perf_counter() - rerun["inicio"]) * 1000, 3),
+        "consultas": rerun["consultas"],
+        "banco_ms": round(rerun["banco_ms"], 3),
+    }
+    with _lock:
+        _execucoes.append(registro)
+    _exportar(registro)
+
+def contexto_atual():
+    """Página e rerun da thread atual, para repassar a threads auxiliares (ver no_contexto)."""
+    return getattr(_local, "pagina", None), getattr(_local, "rerun", None)
+
+@contextmanager
+def no_contexto(contexto):
+    """Roda o bloco (ex: numa thread do pool) como parte da página/rerun de outra thread."""
+    anterior = contexto_atual()
+    _local.pagina, _local.rerun = contexto
+    try:
+        yield
+    finally:
+        _local.pagina, _local.rerun = anterior
+
+def registrar_checkout(ms):
+    """Chamado pelo pool a cada conexão emprestada: soma a espera à medição ativa da thread."""
+    pilha = getattr(_local, "pilha", None)
+    if pilha:
+        pilha[-1]["checkout_ms"] += ms
+
+@contextmanager
+def medir(sql, rotulo=None):
+    """
+    Mede o bloco como uma chamada ao banco. O bloco pode preencher reg["linhas"].
+    Erros são registrados e propagados.
+    """
+    digital, texto = impressao_digital(sql)
+    reg = {
+        "tipo": "consulta",
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "rotulo": rotulo or _rotulo_padrao(texto),
+        "fingerprint": digital,
+        "sql": texto,
+        "pagina": pagina_atual(),
+        "duracao_ms": 0.0,
+        "linhas": None,
+        "checkout_ms": 0.0,
+        "erro": None,
+    }
+    pilha = getattr(_local, "pilha", None)
+    if pilha is None:
+        pilha = _local.pilha = []
+    pilha.append(reg)
+    inicio = time.perf_counter()
+    try:
+        yield reg
+    except Exception as e:
+        reg["erro"] = str(e)
+        raise
+    finally:
+        reg["duracao_ms"] = round((time.perf_counter() - inicio) * 1000, 3)
+        reg["checkout_ms"] = round(reg["checkout_ms"], 3)
+        pilha.pop()
+        _guardar(reg, aninhada=bool(pilha))
+
+def medido(rotulo):
+    """Decorador: mede a função inteira (checkout + transação) como uma chamada com este rótulo."""
+    def decorar(funcao):
+        @wraps(funcao)
+        def medida(*args, **kwargs):
+            with medir(rotulo, rotulo) as reg:
+                resultado = funcao(*args, **kwargs)
+                # Convenção do db_connection: (False, mensagem, ...) indica falha
+                if isinstance(resultado, tuple) and resultado and resultado[0] is False:
+                    reg["erro"] = resultado[1]
+                return resultado
+        return medida
+    return decorar
+
+def _guardar(reg, aninhada):
+    limite = LIMITES_POR_ROTULO.get(reg["rotulo"], LIMITE_LENTA_MS)
+    lenta = reg["duracao_ms"] >= limite
+    with _lock:
+        _registros.append(reg)
+        if lenta:
+            _lentas.append(reg)
+    if lenta:
+        print(f"🐢 Consulta lenta ({reg['duracao_ms']:.0f} ms) [{reg['rotulo']}] {reg['sql'][:160]}")
+
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None and not aninhada:
+        with _lock:  # O rerun pode estar sendo somado por várias threads (consultas em paralelo)
+            rerun["consultas"] += 1
+            rerun["banco_ms"] += reg["duracao_ms"]
+    _exportar(reg)
+
+def _exportar(registro):
+    for funcao in _exportadores:
+        try:
+            funcao(registro)
+        except Exception as e:
+            print(f"⚠️  Exportador de instrumentação falhou: {e}")
+
+# ==============================================================================
+# 3. RELATÓRIOS
+# ==============================================================================
+
+def _percentis(df, chaves, coluna):
+    grupos = df.groupby(chaves, dropna=False)[coluna]
+    resumo = grupos.agg(chamadas="count", media_ms="mean", max_ms="max")
+    for p in (50, 95, 99):
+        resumo[f"p{p}_ms"] = grupos.quantile(p / 100)
+    return resumo
+
+def resumo_consultas():
+    """p50/p95/p99 por consulta (rótulo + impressão digital), das mais caras para as mais baratas."""
+    import pandas as pd
+    with _lock:
+        df = pd.DataFrame(list(_registros))
+    if df.empty:
+        return df
+    df["linhas"] = pd.to_numeric(df["linhas"], errors="coerce")
+    resumo = _percentis(df, ["rotulo", "fingerprint"], "duracao_ms")
+    grupos = df.groupby(["rotulo", "fingerprint"], dropna=False)
+    resumo["linhas_media"] = grupos["linhas"].mean()
+    resumo["checkout_p95_ms"] = grupos["checkout_ms"].quantile(0.95)
+    resumo["erros"] = grupos["erro"].count()
+    resumo["total_ms"] = grupos["duracao_ms"].sum()
+    resumo["sql"] = grupos["sql"].first()
+    colunas = ["chamadas", "p50_ms", "p95_ms", "p99_ms", "max_ms", "media_ms", "total_ms",
+               "linhas_media", "checkout_p95_ms", "erros", "sql"]
+    return resumo[colunas].sort_values("total_ms", ascending=False).round(2).reset_index()
+
+def resumo_paginas():
+    """p50/p95/p99 da duração de cada rerun por página, com nº de consultas e tempo no banco."""
+    import pandas as pd
+    with _lock:
+        df = pd.DataFrame(list(_execucoes))
+    if df.empty:
+        return df
+    resumo = _percentis(df, ["pagina"], "duracao_ms")
+    grupos = df.groupby(["pagina"], dropna=False)
+    resumo["consultas_media"] = grupos["consultas"].mean()
+    resumo["banco_p95_ms"] = grupos["banco_ms"].quantile(0.95)
+    colunas = ["chamadas", "p50_ms", "p95_ms", "p99_ms", "max_ms", "media_ms", "consultas_media", "banco_p95_ms"]
+    return resumo[colunas].rename(columns={"chamadas": "reruns"}).sort_values("p95_ms", ascending=False).round(2).reset_index()
+
+def consultas_lentas():
+    """Log de consultas lentas, da mais recente para a mais antiga."""
+    import pandas as pd
+    with _lock:
+        lentas = list(_lentas)
+    colunas = ["ts", "rotulo", "pagina", "duracao_ms", "checkout_ms", "linhas", "erro", "sql"]
+    return pd.DataFrame(reversed(lentas), columns=colunas)
@@ -0,0 +1,97 @@
+"""
+Métricas do dashboard (Visão Geral) numa única ida ao banco.
+
+Todos os números - contagens, ocupação por turno, salas lotadas e carga dos
+docentes - saem de uma só consulta com CTE + json_agg. A ocupação usa os
+horários reais: minutos cobertos por aulas dentro da janela de cada turno
+(união por sala e dia, então aulas sobrepostas não contam em dobro). O resultado fica no
+cache do db_connection e é invalidado por qualquer escrita nas tabelas lidas.
+"""
+from database import db_connection as db
+
+TOP_N = 10
+
+_TABELAS = ["tb_salas", "tb_docentes", "tb_turmas", "tb_alocacoes", "tb_alocacao_turmas"]
+
+_SQL_METRICAS = """
+    WITH aulas AS (
+        SELECT
+            a.id_alocacao, a.dia_semana, a.turno, a.id_sala, a.id_docente,
+            s.nome AS sala, s.capacidade,
+            COALESCE(SUM(t.qtd_alunos), 0) AS alunos
+        FROM tb_alocacoes a
+        JOIN tb_salas s ON a.id_sala = s.id_sala
+        LEFT JOIN tb_alocacao_turmas atur ON a.id_alocacao = atur.id_alocacao
+        LEFT JOIN tb_turmas t ON atur.id_turma = t.id_turma
+        GROUP BY a.id_alocacao, a.dia_semana, a.turno, a.id_sala, a.id_docente, s.nome, s.capacidade
+    ),
+    -- União dos horários por sala e dia: cada aula entra só com o trecho que passa
+    -- do maior fim das anteriores (gaps and islands com MAX() OVER)
+    trechos AS (
+        SELECT GREATEST(inicio, COALESCE(antes, inicio)) AS inicio, fim
+        FROM (
+            SELECT inicio, fim, MAX(fim) OVER (
+                PARTITION BY id_sala, dia_semana ORDER BY inicio, fim, id_alocacao
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) AS antes
+            FROM (
+                SELECT id_alocacao, id_sala, dia_semana,
+                       (EXTRACT(EPOCH FROM hora_inicio) / 60)::int AS inicio,
+                       (EXTRACT(EPOCH FROM hora_fim) / 60)::int AS fim
+                FROM tb_alocacoes
+            ) h
+        ) x
+        WHERE antes IS NULL OR fim > antes
+    ),
+    janelas AS (
+        SELECT * FROM unnest(%(turnos)s::text[], %(inicios)s::int[], %(fins)s::int[]) AS j (turno, inicio, fim)
+    ),
+    carga AS (
+        SELECT prof.nome AS professor, COUNT(*) AS aulas
+        FROM aulas JOIN tb_docentes prof ON aulas.id_docente = prof.id_docente
+        GROUP BY prof.id_docente, prof.nome
+    )
+    SELECT
+        (SELECT COUNT(*) FROM tb_salas) AS qtd_salas,
+        (SELECT COUNT(*) FROM tb_docentes) AS qtd_docentes,
+        (SELECT COUNT(*) FROM tb_turmas) AS qtd_turmas,
+        (SELECT COUNT(*) FROM aulas) AS qtd_aulas,
+        (SELECT COUNT(*) FROM aulas WHERE alunos > capacidade) AS qtd_lotadas,
+        (SELECT COALESCE(json_object_agg(turno, n), '{}') FROM (
+            SELECT turno, COUNT(*) AS n FROM aulas GROUP BY turno
+        ) x) AS aulas_por_turno,
+        (SELECT COALESCE(json_object_agg(turno, minutos), '{}') FROM (
+            SELECT j.turno, COALESCE(SUM(LEAST(t.fim, j.fim) - GREATEST(t.inicio, j.inicio)), 0) AS minutos
+            FROM janelas j LEFT JOIN trechos t ON t.inicio < j.fim AND t.fim > j.inicio
+            GROUP BY j.turno
+        ) x) AS minutos_por_turno,
+        (SELECT COALESCE(json_agg(x ORDER BY x.excesso DESC), '[]') FROM (
+            SELECT sala, dia_semana, turno, alunos, capacidade, alunos - capacidade AS excesso
+            FROM aulas WHERE alunos > capacidade
+            ORDER BY alunos - capacidade DESC LIMIT %(top)s
+        ) x) AS salas_lotadas,
+        (SELECT COALESCE(json_agg(x ORDER BY x.aulas DESC), '[]') FROM (
+            SELECT professor, aulas FROM carga ORDER BY aulas DESC LIMIT %(top)s
+        ) x) AS carga_docentes,
+        (SELECT COALESCE(ROUND(AVG(aulas), 1), 0) FROM carga) AS media_aulas_docente,
+        (SELECT COALESCE(MAX(aulas), 0) FROM carga) AS max_aulas_docente
+"""
+
+def _carregar():
+    turnos = list(db.MAP_HORARIOS)
+    janelas = [db.horario_do_turno(turno) for turno in turnos]
+    params = {"top": TOP_N, "turnos": turnos, "inicios": [j[0] for j in janelas], "fins": [j[1] for j in janelas]}
+    df = db._executar_consulta(_SQL_METRICAS, params=params, rotulo="metricas_dashboard")
+    m = df.iloc[0].to_dict()
+
+    # Taxa de ocupação: minutos com aula na janela / (salas x dias da semana x minutos da janela)
+    salas_dias = int(m["qtd_salas"]) * len(db.MAP_DIAS)
+    m["ocupacao_por_turno"] = {
+        turno: round(100 * m["minutos_por_turno"].get(turno, 0) / (salas_dias * (fim - inicio)), 1) if salas_dias else 0.0
+        for turno, (inicio, fim) in zip(turnos, janelas)
+    }
+    return m
+
+def get_metricas_dashboard():
+    """Todas as métricas da Visão Geral (uma consulta, com cache)."""
+    return db.memoizar(("metricas_dashboard",), _TABELAS, _carregar)
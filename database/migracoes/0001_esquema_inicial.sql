@@ -0,0 +1,61 @@
+-- Esquema base do SGA. Usa IF NOT EXISTS para adotar bancos criados antes das migrações.
+
+CREATE TABLE IF NOT EXISTS tb_salas (
+    id_sala     SERIAL PRIMARY KEY,
+    nome        VARCHAR(100) NOT NULL,
+    capacidade  INTEGER NOT NULL,
+    tipo        VARCHAR(30) NOT NULL DEFAULT 'Teorica'
+);
+
+CREATE TABLE IF NOT EXISTS tb_docentes (
+    id_docente  SERIAL PRIMARY KEY,
+    nome        VARCHAR(150) NOT NULL,
+    email       VARCHAR(150)
+);
+
+CREATE TABLE IF NOT EXISTS tb_cursos (
+    id_curso    SERIAL PRIMARY KEY,
+    nome        VARCHAR(150) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tb_semestres (
+    id_semestre SERIAL PRIMARY KEY,
+    descricao   VARCHAR(50) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tb_turmas (
+    id_turma      SERIAL PRIMARY KEY,
+    identificacao VARCHAR(50) NOT NULL,
+    qtd_alunos    INTEGER NOT NULL DEFAULT 0,
+    id_curso      INTEGER NOT NULL REFERENCES tb_cursos (id_curso),
+    id_semestre   INTEGER REFERENCES tb_semestres (id_semestre)
+);
+
+CREATE TABLE IF NOT EXISTS tb_disciplinas (
+    id_disciplina SERIAL PRIMARY KEY,
+    nome          VARCHAR(150) NOT NULL,
+    id_curso      INTEGER REFERENCES tb_cursos (id_curso)
+);
+
+CREATE TABLE IF NOT EXISTS tb_alocacoes (
+    id_alocacao   SERIAL PRIMARY KEY,
+    dia_semana    VARCHAR(10) NOT NULL,
+    turno         VARCHAR(12) NOT NULL,
+    modalidade    VARCHAR(20) NOT NULL DEFAULT 'Presencial',
+    id_sala       INTEGER NOT NULL REFERENCES tb_salas (id_sala),
+    id_docente    INTEGER NOT NULL REFERENCES tb_docentes (id_docente),
+    id_disciplina INTEGER NOT NULL REFERENCES tb_disciplinas (id_disciplina)
+);
+
+CREATE TABLE IF NOT EXISTS tb_alocacao_turmas (
+    id_alocacao INTEGER NOT NULL REFERENCES tb_alocacoes (id_alocacao) ON DELETE CASCADE,
+    id_turma    INTEGER NOT NULL REFERENCES tb_turmas (id_turma),
+    PRIMARY KEY (id_alocacao, id_turma)
+);
+
+CREATE TABLE IF NOT EXISTS tb_usuarios (
+    id_usuario  SERIAL PRIMARY KEY,
+    usuario     VARCHAR(50) NOT NULL UNIQUE,
+    senha_hash  VARCHAR(100) NOT NULL,
+    nome        VARCHAR(150)
+);
@@ -0,0 +1,64 @@
+-- Grades desnormalizadas dos portais (por turma e por docente).
+-- Mantidas pelo db_connection na mesma transação de cada escrita de alocação.
+
+CREATE TABLE IF NOT EXISTS tb_grade_turma (
+    id_turma      INTEGER NOT NULL,
+    id_alocacao   INTEGER NOT NULL,
+    ordem_dia     SMALLINT,
+    dia_semana    VARCHAR(10),
+    turno         VARCHAR(12),
+    modalidade    VARCHAR(20),
+    sala          VARCHAR(100),
+    tipo_sala     VARCHAR(30),
+    disciplina    VARCHAR(150),
+    professor     VARCHAR(150),
+    PRIMARY KEY (id_turma, id_alocacao)
+);
+
+CREATE TABLE IF NOT EXISTS tb_grade_docente (
+    id_docente        INTEGER NOT NULL,
+    id_alocacao       INTEGER NOT NULL,
+    ordem_dia         SMALLINT,
+    dia_semana        VARCHAR(10),
+    turno             VARCHAR(12),
+    modalidade        VARCHAR(20),
+    sala              VARCHAR(100),
+    tipo_sala         VARCHAR(30),
+    disciplina        VARCHAR(150),
+    turmas_unificadas TEXT,
+    PRIMARY KEY (id_docente, id_alocacao)
+);
+
+-- Preenche a partir da grade existente (as tabelas podem ter sido criadas antes, sob demanda)
+DELETE FROM tb_grade_turma;
+DELETE FROM tb_grade_docente;
+
+INSERT INTO tb_grade_turma
+SELECT
+    atur.id_turma, a.id_alocacao,
+    CASE a.dia_semana
+        WHEN 'Segunda' THEN 1 WHEN 'Terca' THEN 2 WHEN 'Quarta' THEN 3
+        WHEN 'Quinta' THEN 4 WHEN 'Sexta' THEN 5 WHEN 'Sabado' THEN 6
+    END,
+    a.dia_semana, a.turno, a.modalidade, s.nome, s.tipo, d.nome, prof.nome
+FROM tb_alocacoes a
+JOIN tb_alocacao_turmas atur ON a.id_alocacao = atur.id_alocacao
+JOIN tb_salas s ON a.id_sala = s.id_sala
+JOIN tb_disciplinas d ON a.id_disciplina = d.id_disciplina
+JOIN tb_docentes prof ON a.id_docente = prof.id_docente;
+
+INSERT INTO tb_grade_docente
+SELECT
+    a.id_docente, a.id_alocacao,
+    CASE a.dia_semana
+        WHEN 'Segunda' THEN 1 WHEN 'Terca' THEN 2 WHEN 'Quarta' THEN 3
+        WHEN 'Quinta' THEN 4 WHEN 'Sexta' THEN 5 WHEN 'Sabado' THEN 6
+    END,
+    a.dia_semana, a.turno, a.modalidade, s.nome, s.tipo, d.nome,
+    STRING_AGG(t.identificacao, ' + ' ORDER BY t.identificacao)
+FROM tb_alocacoes a
+JOIN tb_salas s ON a.id_sala = s.id_sala
+JOIN tb_disciplinas d ON a.id_disciplina = d.id_disciplina
+JOIN tb_alocacao_turmas atur ON a.id_alocacao = atur.id_alocacao
+JOIN tb_turmas t ON atur.id_turma = t.id_turma
+GROUP BY a.id_alocacao, a.id_docente, a.dia_semana, a.turno, a.modalidade, s.nome, s.tipo, d.nome;
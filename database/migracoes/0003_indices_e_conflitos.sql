@@ -0,0 +1,35 @@
+-- Índices dos filtros quentes + restrições que impedem choques de sala e de docente.
+--
+-- As restrições UNIQUE fazem o banco recusar a segunda aula no mesmo horário
+-- mesmo quando dois administradores gravam ao mesmo tempo (a checagem da tela
+-- é só uma prévia). O índice único de (dia_semana, turno, id_sala) também
+-- atende as buscas por horário e por sala ocupada.
+--
+-- Uma grade antiga que já tenha choques não impede a migração: as restrições
+-- ficam de fora (com um aviso) e os choques aparecem em "python -m database.validacao".
+-- A migração 0004 troca estas restrições pelas de intervalo.
+
+DO $$
+DECLARE
+    choques_sala INTEGER;
+    choques_docente INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO choques_sala FROM (
+        SELECT 1 FROM tb_alocacoes GROUP BY dia_semana, turno, id_sala HAVING COUNT(*) > 1
+    ) x;
+    SELECT COUNT(*) INTO choques_docente FROM (
+        SELECT 1 FROM tb_alocacoes GROUP BY dia_semana, turno, id_docente HAVING COUNT(*) > 1
+    ) x;
+    IF choques_sala > 0 OR choques_docente > 0 THEN
+        RAISE WARNING 'A grade atual tem % choque(s) de sala e % de docente: restrições de conflito não criadas. '
+            'Veja os choques com "python -m database.validacao".', choques_sala, choques_docente;
+    ELSE
+        ALTER TABLE tb_alocacoes
+            ADD CONSTRAINT uq_alocacoes_sala UNIQUE (dia_semana, turno, id_sala),
+            ADD CONSTRAINT uq_alocacoes_docente UNIQUE (dia_semana, turno, id_docente);
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_alocacoes_docente ON tb_alocacoes (id_docente);
+CREATE INDEX IF NOT EXISTS idx_alocacao_turmas_turma ON tb_alocacao_turmas (id_turma);
+CREATE INDEX IF NOT EXISTS idx_turmas_curso_semestre ON tb_turmas (id_curso, id_semestre);
@@ -0,0 +1,110 @@
+-- Horários reais das aulas: hora_inicio/hora_fim em tb_alocacoes.
+--
+-- Os turnos continuam existindo como atalhos (Matutino 08:00-11:30, Vespertino
+-- 14:00-17:30, Noturno 19:00-22:00) e como agrupamento nos relatórios, mas o
+-- choque passa a ser de intervalo: duas aulas de 50 minutos na mesma sala e no
+-- mesmo turno podem coexistir; 08:00-09:40 e 09:00-10:00 não.
+--
+-- As restrições UNIQUE por (dia, turno) viram restrições de exclusão sobre
+-- intervalos: cada aula ocupa a faixa [inicio, fim) em "minutos da semana" do
+-- recurso (id * 10080 + dia * 1440 + minuto do dia), e o índice GiST de ranges
+-- recusa faixas sobrepostas. Como o id e o dia fazem parte da faixa, não é
+-- preciso o btree_gist (nem sempre disponível) para combinar igualdade e sobreposição.
+
+ALTER TABLE tb_alocacoes
+    ADD COLUMN IF NOT EXISTS hora_inicio TIME,
+    ADD COLUMN IF NOT EXISTS hora_fim    TIME;
+
+UPDATE tb_alocacoes SET
+    hora_inicio = CASE turno
+        WHEN 'Matutino' THEN TIME '08:00' WHEN 'Vespertino' THEN TIME '14:00' WHEN 'Noturno' THEN TIME '19:00'
+    END,
+    hora_fim = CASE turno
+        WHEN 'Matutino' THEN TIME '11:30' WHEN 'Vespertino' THEN TIME '17:30' WHEN 'Noturno' THEN TIME '22:00'
+    END
+WHERE hora_inicio IS NULL;
+
+DO $$
+DECLARE
+    sem_horario INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO sem_horario FROM tb_alocacoes WHERE hora_inicio IS NULL OR hora_fim IS NULL;
+    IF sem_horario > 0 THEN
+        RAISE EXCEPTION 'Há % alocação(ões) com turno desconhecido. Corrija o turno antes de aplicar esta migração.',
+            sem_horario;
+    END IF;
+END $$;
+
+ALTER TABLE tb_alocacoes
+    ALTER COLUMN hora_inicio SET NOT NULL,
+    ALTER COLUMN hora_fim SET NOT NULL,
+    ADD CONSTRAINT ck_alocacoes_horario CHECK (hora_fim > hora_inicio);
+
+-- Faixa [inicio, fim) do recurso na semana; NULL para dia desconhecido (fica fora da restrição)
+CREATE OR REPLACE FUNCTION sga_faixa_semanal(id_recurso INTEGER, dia VARCHAR, inicio TIME, fim TIME)
+RETURNS int8range LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE WHEN ordem IS NULL THEN NULL ELSE int8range(
+        id_recurso::bigint * 10080 + ordem * 1440 + (EXTRACT(EPOCH FROM inicio) / 60)::int,
+        id_recurso::bigint * 10080 + ordem * 1440 + (EXTRACT(EPOCH FROM fim) / 60)::int
+    ) END
+    FROM (SELECT CASE dia
+        WHEN 'Segunda' THEN 0 WHEN 'Terca' THEN 1 WHEN 'Quarta' THEN 2
+        WHEN 'Quinta' THEN 3 WHEN 'Sexta' THEN 4 WHEN 'Sabado' THEN 5
+    END AS ordem) x
+$$;
+
+ALTER TABLE tb_alocacoes
+    DROP CONSTRAINT IF EXISTS uq_alocacoes_sala,
+    DROP CONSTRAINT IF EXISTS uq_alocacoes_docente;
+
+-- Cria as restrições de intervalo se a grade não tiver choques de sala/docente.
+-- Com choques antigos só avisa (a migração segue): resolva-os com a auditoria
+-- ("python -m database.validacao") e rode-a com --criar-restricoes.
+CREATE OR REPLACE FUNCTION sga_criar_restricoes_grade() RETURNS BOOLEAN LANGUAGE plpgsql AS $$
+DECLARE
+    choques INTEGER;
+BEGIN
+    IF (SELECT COUNT(*) FROM pg_constraint
+        WHERE conrelid = 'tb_alocacoes'::regclass AND conname IN ('ex_alocacoes_sala', 'ex_alocacoes_docente')) = 2 THEN
+        RETURN TRUE;
+    END IF;
+
+    SELECT COUNT(*) INTO choques
+    FROM tb_alocacoes a
+    JOIN tb_alocacoes b ON a.id_alocacao < b.id_alocacao AND a.dia_semana = b.dia_semana
+                       AND (a.id_sala = b.id_sala OR a.id_docente = b.id_docente)
+                       AND a.hora_inicio < b.hora_fim AND b.hora_inicio < a.hora_fim;
+    IF choques > 0 THEN
+        RAISE WARNING 'A grade tem % par(es) de aulas com choque de sala ou docente: restrições de intervalo não criadas. '
+            'Veja os choques com "python -m database.validacao".', choques;
+        RETURN FALSE;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'tb_alocacoes'::regclass AND conname = 'ex_alocacoes_sala') THEN
+        ALTER TABLE tb_alocacoes ADD CONSTRAINT ex_alocacoes_sala
+            EXCLUDE USING gist (sga_faixa_semanal(id_sala, dia_semana, hora_inicio, hora_fim) WITH &&);
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'tb_alocacoes'::regclass AND conname = 'ex_alocacoes_docente') THEN
+        ALTER TABLE tb_alocacoes ADD CONSTRAINT ex_alocacoes_docente
+            EXCLUDE USING gist (sga_faixa_semanal(id_docente, dia_semana, hora_inicio, hora_fim) WITH &&);
+    END IF;
+    RETURN TRUE;
+END $$;
+
+SELECT sga_criar_restricoes_grade();
+
+-- O índice único de (dia_semana, turno, id_sala) atendia as buscas por horário e sala
+CREATE INDEX IF NOT EXISTS idx_alocacoes_dia_sala ON tb_alocacoes (dia_semana, id_sala);
+
+-- Grades materializadas dos portais: mesmas colunas de horário
+ALTER TABLE tb_grade_turma
+    ADD COLUMN IF NOT EXISTS hora_inicio TIME,
+    ADD COLUMN IF NOT EXISTS hora_fim    TIME;
+ALTER TABLE tb_grade_docente
+    ADD COLUMN IF NOT EXISTS hora_inicio TIME,
+    ADD COLUMN IF NOT EXISTS hora_fim    TIME;
+
+UPDATE tb_grade_turma g SET hora_inicio = a.hora_inicio, hora_fim = a.hora_fim
+FROM tb_alocacoes a WHERE a.id_alocacao = g.id_alocacao;
+UPDATE tb_grade_docente g SET hora_inicio = a.hora_inicio, hora_fim = a.hora_fim
+FROM tb_alocacoes a WHERE a.id_alocacao = g.id_alocacao;
@@ -0,0 +1,64 @@
+-- Períodos letivos e arquivo das grades de outros períodos.
+--
+-- tb_alocacoes (e tb_alocacao_turmas) guardam só o período ATIVO: todas as
+-- leituras quentes (portais, grade, calendário, índice de ocupação, auditoria)
+-- continuam sem filtro e sem crescer semestre a semestre. As aulas dos demais
+-- períodos ficam em tb_alocacoes_arquivo / tb_alocacao_turmas_arquivo, com
+-- chaves iniciadas por id_periodo. Trocar o período ativo move as linhas entre
+-- as duas (database/periodos.py); as chaves por período fazem dessa troca e da
+-- virada de semestre uma varredura de intervalo do índice.
+--
+-- Particionamento declarativo por id_periodo não serve aqui: o PostgreSQL 16
+-- não aceita as restrições de exclusão da 0004 numa tabela particionada e a FK
+-- de tb_alocacao_turmas exigiria id_periodo na chave primária.
+
+CREATE TABLE IF NOT EXISTS tb_periodos (
+    id_periodo  SERIAL PRIMARY KEY,
+    descricao   VARCHAR(50) NOT NULL UNIQUE,
+    data_inicio DATE,
+    data_fim    DATE,
+    ativo       BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+-- No máximo um período ativo
+CREATE UNIQUE INDEX IF NOT EXISTS uq_periodos_ativo ON tb_periodos (ativo) WHERE ativo;
+
+-- Período inicial ('AAAA.S' da data atual) para adotar a grade existente
+INSERT INTO tb_periodos (descricao, ativo)
+SELECT to_char(CURRENT_DATE, 'YYYY') || '.' || CASE WHEN EXTRACT(MONTH FROM CURRENT_DATE) <= 6 THEN '1' ELSE '2' END, TRUE
+WHERE NOT EXISTS (SELECT 1 FROM tb_periodos WHERE ativo);
+
+CREATE OR REPLACE FUNCTION sga_periodo_ativo() RETURNS INTEGER LANGUAGE sql STABLE AS $$
+    SELECT id_periodo FROM tb_periodos WHERE ativo
+$$;
+
+-- Quem grava na grade (tela, importação, agendador) não precisa informar o período
+ALTER TABLE tb_alocacoes
+    ADD COLUMN IF NOT EXISTS id_periodo INTEGER REFERENCES tb_periodos (id_periodo);
+UPDATE tb_alocacoes SET id_periodo = sga_periodo_ativo() WHERE id_periodo IS NULL;
+ALTER TABLE tb_alocacoes
+    ALTER COLUMN id_periodo SET DEFAULT sga_periodo_ativo(),
+    ALTER COLUMN id_periodo SET NOT NULL;
+
+CREATE TABLE IF NOT EXISTS tb_alocacoes_arquivo (
+    id_periodo    INTEGER NOT NULL REFERENCES tb_periodos (id_periodo),
+    id_alocacao   INTEGER NOT NULL,
+    dia_semana    VARCHAR(10) NOT NULL,
+    turno         VARCHAR(12) NOT NULL,
+    hora_inicio   TIME NOT NULL,
+    hora_fim      TIME NOT NULL,
+    modalidade    VARCHAR(20) NOT NULL,
+    id_sala       INTEGER NOT NULL REFERENCES tb_salas (id_sala),
+    id_docente    INTEGER NOT NULL REFERENCES tb_docentes (id_docente),
+    id_disciplina INTEGER NOT NULL REFERENCES tb_disciplinas (id_disciplina),
+    PRIMARY KEY (id_periodo, id_alocacao)
+);
+
+CREATE TABLE IF NOT EXISTS tb_alocacao_turmas_arquivo (
+    id_periodo  INTEGER NOT NULL,
+    id_alocacao INTEGER NOT NULL,
+    id_turma    INTEGER NOT NULL REFERENCES tb_turmas (id_turma),
+    PRIMARY KEY (id_periodo, id_alocacao, id_turma),
+    FOREIGN KEY (id_periodo, id_alocacao) REFERENCES tb_alocacoes_arquivo (id_periodo, id_alocacao) ON DELETE CASCADE
+);
+
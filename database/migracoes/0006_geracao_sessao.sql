@@ -0,0 +1,5 @@
+-- Revogação de sessões do painel: o token assinado carrega a geração de sessão
+-- do usuário; o logout incrementa a geração e invalida todos os tokens emitidos
+-- antes (inclusive cópias do token em outro navegador).
+
+ALTER TABLE tb_usuarios ADD COLUMN IF NOT EXISTS geracao_sessao INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,12 @@
+-- Limite de tentativas de login compartilhado entre processos e máquinas: cada
+-- falha vira uma linha (chave 'usuario:<nome>' ou 'ip:<endereço>'). Contar as
+-- falhas de uma chave na janela é uma varredura curta do índice; as antigas são
+-- apagadas a cada nova falha registrada.
+
+CREATE TABLE IF NOT EXISTS tb_login_falhas (
+    chave   VARCHAR(300) NOT NULL,
+    momento TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_login_falhas_chave ON tb_login_falhas (chave, momento);
+CREATE INDEX IF NOT EXISTS idx_login_falhas_momento ON tb_login_falhas (momento);
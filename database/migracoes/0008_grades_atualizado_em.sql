@@ -0,0 +1,9 @@
+-- Momento em que cada linha das grades materializadas foi recomposta. As linhas
+-- de uma turma (ou docente) são sempre apagadas e reinseridas juntas, então o
+-- maior atualizado_em do dono é a última alteração da grade dele, igual para
+-- todas as máquinas: é o Last-Modified da API e a âncora do iCal.
+-- Os INSERT ... SELECT do db_connection não listam colunas: esta, a última,
+-- recebe o DEFAULT.
+
+ALTER TABLE tb_grade_turma ADD COLUMN IF NOT EXISTS atualizado_em TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE tb_grade_docente ADD COLUMN IF NOT EXISTS atualizado_em TIMESTAMPTZ NOT NULL DEFAULT now();
@@ -0,0 +1,142 @@
+"""
+Migrações versionadas do esquema.
+
+Cada arquivo em database/migracoes/ se chama NNNN_descricao.sql e é aplicado
+uma única vez, em ordem, numa transação própria. As versões aplicadas ficam em
+tb_migracoes (com o hash do arquivo, para detectar edições posteriores) e um
+advisory lock impede que duas réplicas migrem ao mesmo tempo.
+
+O db_connection chama aplicar() uma vez por processo (desligável com
+SGA_MIGRAR_AO_INICIAR=0). Também dá para rodar pela linha de comando:
+    python -m database.migrar [--status]
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+
+# Permite rodar como script a partir da raiz do projeto
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_connection as db
+
+PASTA_MIGRACOES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migracoes")
+
+_RE_ARQUIVO = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+_DDL_VERSOES = """
+    CREATE TABLE IF NOT EXISTS tb_migracoes (
+        versao      INTEGER PRIMARY KEY,
+        nome        VARCHAR(150) NOT NULL,
+        hash        CHAR(32) NOT NULL,
+        aplicada_em TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+
+def listar():
+    """[(versao, nome, caminho)] das migrações no disco, em ordem."""
+    migracoes = []
+    for arquivo in sorted(os.listdir(PASTA_MIGRACOES)):
+        casamento = _RE_ARQUIVO.match(arquivo)
+        if casamento:
+            migracoes.append((int(casamento.group(1)), casamento.group(2), os.path.join(PASTA_MIGRACOES, arquivo)))
+    return migracoes
+
+def _hash(caminho):
+    with open(caminho, "rb") as arquivo:
+        return hashlib.md5(arquivo.read()).hexdigest()
+
+def _aplicadas(cursor):
+    cursor.execute("SELECT versao, hash FROM tb_migracoes")
+    return dict(cursor.fetchall())
+
+def _travar(cursor):
+    # Lock da transação: outra réplica migrando espera aqui
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext('sga_migracoes'))")
+
+def aplicar(ate=None, verbose=False):
+    """Aplica as migrações pendentes (até a versão 'ate', se informada). Retorna as versões aplicadas."""
+    conn = db._conectar()  # Sem garantir_esquema(): é ele quem chama aplicar()
+    if not conn:
+        raise RuntimeError("Sem conexão com o banco.")
+    cursor = conn.cursor()
+    aplicadas_agora = []
+    try:
+        _travar(cursor)
+        cursor.execute(_DDL_VERSOES)
+        conn.commit()
+
+        for versao, nome, caminho in listar():
+            if ate is not None and versao > ate:
+                break
+            _travar(cursor)
+            if versao in _aplicadas(cursor):  # Relido sob o lock: outra réplica pode ter aplicado
+                conn.rollback()
+                continue
+            with open(caminho, encoding="utf-8") as arquivo:
+                sql = arquivo.read()
+            try:
+                cursor.execute(sql)
+                cursor.execute(
+                    "INSERT INTO tb_migracoes (versao, nome, hash) VALUES (%s, %s, %s)",
+                    (versao, nome, _hash(caminho))
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                raise RuntimeError(f"Migração {versao:04d}_{nome} falhou: {e}") from e
+            aplicadas_agora.append(versao)
+            if verbose:
+                print(f"✅ {versao:04d}_{nome}")
+    finally:
+        cursor.close()
+        conn.close()
+
+    if aplicadas_agora:
+        db.limpar_cache()
+    return aplicadas_agora
+
+def status():
+    """[(versao, nome, situacao)] com situacao em 'aplicada', 'pendente' ou 'alterada' (arquivo editado depois)."""
+    conn = db._conectar()  # Sem garantir_esquema(): é ele quem chama aplicar()
+    if not conn:
+        raise RuntimeError("Sem conexão com o banco.")
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT to_regclass('tb_migracoes') IS NOT NULL")
+        aplicadas = _aplicadas(cursor) if cursor.fetchone()[0] else {}
+    finally:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+
+    situacoes = []
+    for versao, nome, caminho in listar():
+        if versao not in aplicadas:
+            situacao = "pendente"
+        elif aplicadas[versao].strip() != _hash(caminho):
+            situacao = "alterada"
+        else:
+            situacao = "aplicada"
+        situacoes.append((versao, nome, situacao))
+    return situacoes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aplica as migrações pendentes do banco.")
+    parser.add_argument("--status", action="store_true", help="Só mostra a situação de cada migração.")
+    parser.add_argument("--ate", type=int, help="Aplica só até esta versão.")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        icones = {"aplicada": "✅", "pendente": "⏳", "alterada": "⚠️ "}
+        for versao, nome, situacao in status():
+            print(f"{icones[situacao]} {versao:04d}_{nome} ({situacao})")
+        return 0
+
+    aplicadas = aplicar(args.ate, verbose=True)
+    print(f"📦 {len(aplicadas)} migração(ões) aplicada(s)." if aplicadas else "📦 Banco já está atualizado.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
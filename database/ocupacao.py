@@ -0,0 +1,268 @@
+"""
+Índice de ocupação em memória para detecção de conflitos.
+
+Cada aula ocupa um intervalo [inicio, fim) em minutos num dia da semana. Para
+cada sala, docente e turma guardamos, por dia, a lista dos seus intervalos
+ordenada pelo início; uma lista a mais por dia reúne todas as aulas (para
+perguntas do tipo "quais salas estão ocupadas das 9h às 10h?"). Uma busca de
+sobreposição é um bisect nessa lista - O(log n + k) - e não toca no banco.
+
+O índice é montado uma única vez a partir de tb_alocacoes + tb_alocacao_turmas
+e depois atualizado incrementalmente a cada inserção ou exclusão feita por
+db_connection. Os horários podem vir em minutos, 'HH:MM' ou datetime.time
+(db.minutos); os turnos são só atalhos (db.horario_do_turno).
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+
+from database import avisos
+from database import db_connection as db
+
+# Reconstrução completa periódica (segurança contra escritas fora do db_connection)
+OCUPACAO_TTL = float(db.carregar_config("SGA_OCUPACAO_TTL", 900))
+
+_TABELAS = ("tb_alocacoes", "tb_alocacao_turmas")
+
+RECURSOS = ("salas", "docentes", "turmas")
+
+# ==============================================================================
+# 1. ESTRUTURAS
+# ==============================================================================
+
+class _Intervalos:
+    """Intervalos [inicio, fim) de um recurso num dia, ordenados pelo início."""
+
+    __slots__ = ("itens", "maior")
+
+    def __init__(self):
+        self.itens = []   # (inicio, fim, id_alocacao), ordenado
+        self.maior = 0    # Maior duração já vista: limita quanto voltar na busca
+
+    def adicionar(self, inicio, fim, id_alocacao):
+        insort(self.itens, (inicio, fim, id_alocacao))
+        self.maior = max(self.maior, fim - inicio)
+
+    def remover(self, inicio, fim, id_alocacao):
+        i = bisect_left(self.itens, (inicio, fim, id_alocacao))
+        if i < len(self.itens) and self.itens[i] == (inicio, fim, id_alocacao):
+            del self.itens[i]
+        if not self.itens:
+            self.maior = 0
+
+    def sobrepostos(self, inicio, fim):
+        """ids das aulas que cruzam [inicio, fim)."""
+        # Só pode cruzar quem começa antes de 'fim' e depois de 'inicio - maior duração'
+        de = bisect_right(self.itens, (inicio - self.maior, float("inf")))
+        ate = bisect_left(self.itens, (fim,))
+        return [id_aloc for comeco, termino, id_aloc in self.itens[de:ate] if termino > inicio]
+
+class Agenda:
+    """Ocupação da semana: aulas -> intervalos por (recurso, id, dia) e por dia."""
+
+    def __init__(self):
+        self.alocacoes = {}                    # id_alocacao -> (dia, inicio, fim, id_sala, id_docente, turmas)
+        self._por_recurso = defaultdict(_Intervalos)   # (recurso, id, dia) -> intervalos
+        self._por_dia = defaultdict(_Intervalos)       # dia -> intervalos de todas as aulas
+        self.geracoes = Counter()              # dia -> alterações (chave de caches derivados)
+
+    def _chaves(self, dia, id_sala, id_docente, turmas):
+        yield ("salas", id_sala, dia)
+        yield ("docentes", id_docente, dia)
+        for id_turma in turmas:
+            yield ("turmas", id_turma, dia)
+
+    def adicionar(self, id_alocacao, dia, inicio, fim, id_sala, id_docente, turmas):
+        turmas = tuple(turmas)
+        self.alocacoes[id_alocacao] = (dia, inicio, fim, id_sala, id_docente, turmas)
+        self._por_dia[dia].adicionar(inicio, fim, id_alocacao)
+        for chave in self._chaves(dia, id_sala, id_docente, turmas):
+            self._por_recurso[chave].adicionar(inicio, fim, id_alocacao)
+        self.geracoes[dia] += 1
+
+    def remover(self, id_alocacao):
+        registro = self.alocacoes.pop(id_alocacao, None)
+        if registro is None:
+            return
+        dia, inicio, fim, id_sala, id_docente, turmas = registro
+        self._por_dia[dia].remover(inicio, fim, id_alocacao)
+        for chave in self._chaves(dia, id_sala, id_docente, turmas):
+            intervalos = self._por_recurso[chave]
+            intervalos.remover(inicio, fim, id_alocacao)
+            if not intervalos.itens:
+                del self._por_recurso[chave]
+        self.geracoes[dia] += 1
+
+    def ocupado(self, recurso, id_recurso, dia, inicio, fim):
+        intervalos = self._por_recurso.get((recurso, int(id_recurso), dia))
+        return bool(intervalos and intervalos.sobrepostos(inicio, fim))
+
+    def ocupados(self, recurso, dia, inicio, fim):
+        """Conjunto dos ids do recurso ('salas', 'docentes' ou 'turmas') em uso em [inicio, fim)."""
+        intervalos = self._por_dia.get(dia)
+        if not intervalos:
+            return set()
+        posicao = RECURSOS.index(recurso) + 3
+        ids = set()
+        for id_aloc in intervalos.sobrepostos(inicio, fim):
+            registro = self.alocacoes[id_aloc]
+            if recurso == "turmas":
+                ids.update(registro[posicao])
+            else:
+                ids.add(registro[posicao])
+        return ids
+
+    def conflitos(self, dia, inicio, fim, id_sala=None, id_docente=None, ids_turmas=()):
+        return {
+            "sala": id_sala is not None and self.ocupado("salas", id_sala, dia, inicio, fim),
+            "docente": id_docente is not None and self.ocupado("docentes", id_docente, dia, inicio, fim),
+            "turmas": [int(t) for t in ids_turmas if self.ocupado("turmas", t, dia, inicio, fim)],
+        }
+
+    def copia(self):
+        """Agenda independente com as mesmas aulas (simulações: importação, agendador)."""
+        nova = Agenda()
+        for id_alocacao, registro in self.alocacoes.items():
+            nova.adicionar(id_alocacao, *registro)
+        return nova
+
+# ==============================================================================
+# 2. CONSTRUÇÃO E MANUTENÇÃO
+# ==============================================================================
+
+_agenda = Agenda()
+_estado = {"versao": None, "montado_em": 0.0, "reconstrucoes": 0}
+_lock = threading.RLock()
+
+def _versao_atual():
+    return tuple(db.versao_tabela(t) for t in _TABELAS)
+
+def reconstruir():
+    """Monta o índice do zero com uma única consulta."""
+    global _agenda
+    sql = """
+        SELECT a.id_alocacao, a.dia_semana,
+               (EXTRACT(EPOCH FROM a.hora_inicio) / 60)::int AS inicio,
+               (EXTRACT(EPOCH FROM a.hora_fim) / 60)::int AS fim,
+               a.id_sala, a.id_docente, atur.id_turma
+        FROM tb_alocacoes a
+        LEFT JOIN tb_alocacao_turmas atur ON a.id_alocacao = atur.id_alocacao
+        ORDER BY a.id_alocacao
+    """
+    with _lock:
+        # Versão lida ANTES da consulta: uma escrita concorrente força nova reconstrução
+        versao = _versao_atual()
+        df = db._executar_consulta(sql, rotulo="indice_ocupacao")
+
+        turmas_por_aula = defaultdict(list)
+        dados_aula = {}
+        for id_aloc, dia, inicio, fim, id_sala, id_docente, id_turma in df.itertuples(index=False, name=None):
+            id_aloc = int(id_aloc)
+            if id_aloc not in dados_aula:
+                dados_aula[id_aloc] = (dia, int(inicio), int(fim), int(id_sala), int(id_docente))
+            if id_turma == id_turma and id_turma is not None:  # Ignora NaN do LEFT JOIN
+                turmas_por_aula[id_aloc].append(int(id_turma))
+
+        agenda = Agenda()
+        for id_aloc, (dia, inicio, fim, id_sala, id_docente) in dados_aula.items():
+            agenda.adicionar(id_aloc, dia, inicio, fim, id_sala, id_docente, turmas_por_aula[id_aloc])
+        _agenda = agenda
+
+        _estado["versao"] = versao
+        _estado["montado_em"] = time.monotonic()
+        _estado["reconstrucoes"] += 1
+
+def _garantir_indice():
+    with _lock:
+        expirado = time.monotonic() - _estado["montado_em"] > OCUPACAO_TTL
+        if _estado["versao"] is None or expirado or _estado["versao"] != _versao_atual():
+            reconstruir()
+        return _agenda
+
+def _ao_escrever(evento):
+    """Aplica incrementalmente as escritas feitas por db_connection neste processo."""
+    carimbos = evento.get("carimbos") or {}
+    if not all(t in carimbos for t in _TABELAS):
+        antes = depois = None
+    else:
+        antes = tuple(carimbos[t][0] for t in _TABELAS)
+        depois = tuple(carimbos[t][1] for t in _TABELAS)
+    with _lock:
+        if _estado["versao"] is None:
+            return  # Índice ainda não montado: será construído no primeiro uso
+        # O índice só pode avançar para os carimbos desta escrita se estava em dia com os
+        # anteriores a ela (ou já nos dela: lote com vários eventos). Senão houve escrita
+        # de outro processo no meio, que estes carimbos encobririam: remonta no próximo uso.
+        if antes is None or _estado["versao"] not in (antes, depois):
+            _estado["versao"] = None
+            return
+        if evento["acao"] == "inserir":
+            _agenda.adicionar(evento["id_alocacao"], evento["dia"], evento["inicio"], evento["fim"],
+                              evento["id_sala"], evento["id_docente"], evento["turmas"])
+        elif evento["acao"] == "excluir":
+            _agenda.remover(evento["id_alocacao"])
+        _estado["versao"] = depois
+
+def _ao_receber_aviso(tabelas, entidades):
+    """Escrita de outro processo (inclusive em outra máquina): remonta no próximo uso."""
+    if set(tabelas) & set(_TABELAS):
+        with _lock:
+            _estado["versao"] = None
+
+db.registrar_ouvinte_escrita(_ao_escrever)
+avisos.registrar_ouvinte(_ao_receber_aviso)
+
+# ==============================================================================
+# 3. CONSULTAS (O(log n), SEM SQL)
+# ==============================================================================
+
+def salas_ocupadas(dia, inicio, fim):
+    with _lock:
+        return _garantir_indice().ocupados("salas", dia, db.minutos(inicio), db.minutos(fim))
+
+def sala_ocupada(dia, inicio, fim, id_sala):
+    with _lock:
+        return _garantir_indice().ocupado("salas", id_sala, dia, db.minutos(inicio), db.minutos(fim))
+
+def docente_ocupado(dia, inicio, fim, id_docente):
+    with _lock:
+        return _garantir_indice().ocupado("docentes", id_docente, dia, db.minutos(inicio), db.minutos(fim))
+
+def turma_ocupada(dia, inicio, fim, id_turma):
+    with _lock:
+        return _garantir_indice().ocupado("turmas", id_turma, dia, db.minutos(inicio), db.minutos(fim))
+
+def versao_dia(dia):
+    """Muda sempre que a ocupação do dia muda (chave para caches derivados, ex: salas livres)."""
+    with _lock:
+        return (_estado["reconstrucoes"], _garantir_indice().geracoes[dia])
+
+def agenda():
+    """Cópia da agenda inteira, para simular novas aulas sem mexer no índice do processo."""
+    with _lock:
+        return _garantir_indice().copia()
+
+def retrato():
+    """
+    Ocupação por atalho de turno: {(dia, turno): {"salas": set, "docentes": set, "turmas": set}}.
+    Um recurso conta como ocupado no turno se qualquer aula dele cruzar o horário do turno.
+    """
+    with _lock:
+        agenda_atual = _garantir_indice()
+        resultado = {}
+        for dia in db.MAP_DIAS:
+            for turno in db.MAP_HORARIOS:
+                inicio, fim = db.horario_do_turno(turno)
+                slot = {recurso: agenda_atual.ocupados(recurso, dia, inicio, fim) for recurso in RECURSOS}
+                if any(slot.values()):
+                    resultado[(dia, turno)] = slot
+        return resultado
+
+def verificar_conflitos(dia, inicio, fim, id_sala=None, id_docente=None, ids_turmas=()):
+    """
+    Retorna um dicionário com os recursos em conflito no intervalo [inicio, fim) do dia:
+    {"sala": bool, "docente": bool, "turmas": [ids ocupados]}.
+    """
+    with _lock:
+        return _garantir_indice().conflitos(dia, db.minutos(inicio), db.minutos(fim), id_sala, id_docente, ids_turmas)
@@ -0,0 +1,263 @@
+"""
+Períodos letivos: período ativo, arquivo e virada de semestre.
+
+tb_alocacoes guarda só a grade do período ativo; as dos outros períodos ficam
+em tb_alocacoes_arquivo (migração 0005). Assim portais, calendário, índice de
+ocupação e auditoria leem apenas o período corrente, sem filtro por período em
+cada consulta, e as tabelas quentes não crescem a cada semestre.
+
+- ativar(): arquiva a grade atual e traz a do período escolhido, numa transação.
+- virar(): cria o próximo período com uma cópia da grade de outro (ids novos) e,
+  se pedido, já o ativa. É a virada de semestre em um comando.
+
+As trocas travam as tabelas da grade para escrita (leituras seguem normalmente),
+reconstroem as grades materializadas dos portais e avisam os outros processos.
+
+Uso pela linha de comando:
+    python -m database.periodos listar
+    python -m database.periodos ativar 2026.1
+    python -m database.periodos virar [--de 2026.1] [--para 2026.2] [--ativar]
+"""
+import argparse
+import os
+import re
+import sys
+
+# Permite rodar como script a partir da raiz do projeto
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_connection as db
+
+TABELAS_ARQUIVO = ["tb_alocacoes_arquivo", "tb_alocacao_turmas_arquivo"]
+TABELAS_TROCA = ["tb_periodos"] + db.TABELAS_ALOCACAO + TABELAS_ARQUIVO
+
+_COLUNAS = "id_alocacao, dia_semana, turno, hora_inicio, hora_fim, modalidade, id_sala, id_docente, id_disciplina"
+
+_SQL_PERIODOS = """
+    SELECT p.id_periodo, p.descricao, p.data_inicio, p.data_fim, p.ativo,
+           CASE WHEN p.ativo THEN (SELECT COUNT(*) FROM tb_alocacoes)
+                ELSE (SELECT COUNT(*) FROM tb_alocacoes_arquivo arq WHERE arq.id_periodo = p.id_periodo)
+           END AS aulas
+    FROM tb_periodos p
+    ORDER BY p.descricao
+"""
+_SQL_ATIVO = "SELECT id_periodo, descricao FROM tb_periodos WHERE ativo"
+
+_RE_SEMESTRE = re.compile(r"^(\d{4})\.([12])$")
+
+# ==============================================================================
+# 1. CONSULTAS
+# ==============================================================================
+
+def listar():
+    """Períodos com o nº de aulas de cada um (do ativo em tb_alocacoes, dos demais no arquivo)."""
+    return db.run_query_cached(_SQL_PERIODOS, rotulo="periodos")
+
+def periodo_ativo():
+    """{"id_periodo", "descricao"} do período ativo, ou None."""
+    df = db.run_query_cached(_SQL_ATIVO, rotulo="periodo_ativo")
+    if df.empty:
+        return None
+    return {"id_periodo": int(df.iloc[0]["id_periodo"]), "descricao": df.iloc[0]["descricao"]}
+
+def proxima_descricao(descricao):
+    """'2026.1' -> '2026.2' e '2026.2' -> '2027.1'; None se a descrição não seguir o padrão AAAA.S."""
+    casamento = _RE_SEMESTRE.match(str(descricao).strip())
+    if not casamento:
+        return None
+    ano, semestre = int(casamento.group(1)), int(casamento.group(2))
+    return f"{ano}.2" if semestre == 1 else f"{ano + 1}.1"
+
+# ==============================================================================
+# 2. TROCA DO PERÍODO ATIVO E VIRADA
+# ==============================================================================
+
+def _travar(cursor):
+    # Bloqueia escritas concorrentes na grade (leituras continuam) até o commit
+    cursor.execute("LOCK TABLE tb_periodos, tb_alocacoes, tb_alocacao_turmas IN SHARE ROW EXCLUSIVE MODE")
+
+def _buscar(cursor, id_periodo):
+    cursor.execute("SELECT id_periodo, descricao, ativo FROM tb_periodos WHERE id_periodo = %s", (int(id_periodo),))
+    return cursor.fetchone()
+
+def _trocar(cursor, id_periodo):
+    """Move a grade ativa para o arquivo e traz a de id_periodo (na transação do cursor)."""
+    cursor.execute(f"""
+        INSERT INTO tb_alocacoes_arquivo (id_periodo, {_COLUNAS})
+        SELECT id_periodo, {_COLUNAS} FROM tb_alocacoes
+    """)
+    cursor.execute("""
+        INSERT INTO tb_alocacao_turmas_arquivo (id_periodo, id_alocacao, id_turma)
+        SELECT a.id_periodo, atur.id_alocacao, atur.id_turma
+        FROM tb_alocacao_turmas atur JOIN tb_alocacoes a ON atur.id_alocacao = a.id_alocacao
+    """)
+    cursor.execute("DELETE FROM tb_alocacoes")  # Vínculos caem em cascata
+
+    cursor.execute("UPDATE tb_periodos SET ativo = FALSE WHERE ativo")
+    cursor.execute("UPDATE tb_periodos SET ativo = TRUE WHERE id_periodo = %s", (id_periodo,))
+
+    cursor.execute(f"""
+        INSERT INTO tb_alocacoes (id_periodo, {_COLUNAS})
+        SELECT id_periodo, {_COLUNAS} FROM tb_alocacoes_arquivo WHERE id_periodo = %s
+    """, (id_periodo,))
+    cursor.execute("""
+        INSERT INTO tb_alocacao_turmas (id_alocacao, id_turma)
+        SELECT id_alocacao, id_turma FROM tb_alocacao_turmas_arquivo WHERE id_periodo = %s
+    """, (id_periodo,))
+    cursor.execute("DELETE FROM tb_alocacoes_arquivo WHERE id_periodo = %s", (id_periodo,))
+
+    db.reconstruir_grades_materializadas(cursor)
+
+def _transacao(operacao):
+    """Roda operacao(cursor) -> (ok, msg, mudou) numa transação travada e avisa os caches se algo mudou."""
+    conn = db.get_connection()
+    if not conn:
+        return False, "Sem conexão com o banco."
+
+    cursor = conn.cursor()
+    try:
+        _travar(cursor)
+        sucesso, msg, mudou = operacao(cursor)
+        if not sucesso:
+            conn.rollback()
+            return False, msg
+        if mudou:
+            db.publicar_alteracao(cursor, TABELAS_TROCA)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return False, db.mensagem_conflito(e) or str(e)
+    finally:
+        cursor.close()
+        conn.close()
+
+    if mudou:
+        db.invalidar_tabelas(TABELAS_TROCA)
+    return True, msg
+
+def ativar(id_periodo):
+    """Torna id_periodo o período ativo. Retorna (sucesso, mensagem)."""
+    def operacao(cursor):
+        periodo = _buscar(cursor, id_periodo)
+        if periodo is None:
+            return False, "Período não encontrado.", False
+        _, descricao, ativo = periodo
+        if ativo:
+            return True, f"O período {descricao} já é o ativo.", False
+        _trocar(cursor, int(id_periodo))
+        return True, f"Período {descricao} ativado.", True
+
+    return _transacao(operacao)
+
+def virar(id_origem, descricao, data_inicio=None, data_fim=None, ativar_novo=False):
+    """
+    Cria o período 'descricao' com uma cópia da grade de id_origem (novos ids de
+    alocação, mesmas salas, docentes, disciplinas, turmas e horários). A cópia vai
+    para o arquivo; com ativar_novo=True o novo período já vira o ativo.
+    Retorna (sucesso, mensagem).
+    """
+    descricao = str(descricao).strip()
+
+    def operacao(cursor):
+        origem = _buscar(cursor, id_origem)
+        if origem is None:
+            return False, "Período de origem não encontrado.", False
+        if not descricao:
+            return False, "Informe a descrição do novo período.", False
+        cursor.execute("SELECT 1 FROM tb_periodos WHERE descricao = %s", (descricao,))
+        if cursor.fetchone():
+            return False, f"Já existe o período {descricao}.", False
+
+        cursor.execute(
+            "INSERT INTO tb_periodos (descricao, data_inicio, data_fim) VALUES (%s, %s, %s) RETURNING id_periodo",
+            (descricao, data_inicio, data_fim)
+        )
+        id_novo = cursor.fetchone()[0]
+
+        # A grade de origem está em tb_alocacoes (ativa) ou no arquivo; as duas têm id_periodo
+        _, descricao_origem, origem_ativa = origem
+        aulas, vinculos = ("tb_alocacoes", "tb_alocacao_turmas") if origem_ativa else TABELAS_ARQUIVO
+        filtro_vinculos = "" if origem_ativa else "WHERE v.id_periodo = %(origem)s"
+        params = {"origem": int(id_origem), "novo": id_novo}
+
+        cursor.execute(f"""
+            CREATE TEMP TABLE tmp_virada ON COMMIT DROP AS
+            SELECT id_alocacao AS id_antigo,
+                   nextval(pg_get_serial_sequence('tb_alocacoes', 'id_alocacao'))::int AS id_novo
+            FROM {aulas} WHERE id_periodo = %(origem)s
+        """, params)
+        cursor.execute(f"""
+            INSERT INTO tb_alocacoes_arquivo (id_periodo, {_COLUNAS})
+            SELECT %(novo)s, m.id_novo, o.dia_semana, o.turno, o.hora_inicio, o.hora_fim, o.modalidade,
+                   o.id_sala, o.id_docente, o.id_disciplina
+            FROM {aulas} o JOIN tmp_virada m ON o.id_alocacao = m.id_antigo
+        """, params)
+        copiadas = cursor.rowcount
+        cursor.execute(f"""
+            INSERT INTO tb_alocacao_turmas_arquivo (id_periodo, id_alocacao, id_turma)
+            SELECT %(novo)s, m.id_novo, v.id_turma
+            FROM {vinculos} v JOIN tmp_virada m ON v.id_alocacao = m.id_antigo
+            {filtro_vinculos}
+        """, params)
+
+        msg = f"Período {descricao} criado com {copiadas} aulas copiadas de {descricao_origem}."
+        if ativar_novo:
+            _trocar(cursor, id_novo)
+            msg += f" {descricao} agora é o período ativo."
+        return True, msg, True
+
+    return _transacao(operacao)
+
+# ==============================================================================
+# 3. LINHA DE COMANDO
+# ==============================================================================
+
+def _id_por_descricao(descricao):
+    df = listar()
+    linha = df[df["descricao"] == descricao]
+    return None if linha.empty else int(linha.iloc[0]["id_periodo"])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Períodos letivos: lista, troca o ativo e vira o semestre.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("listar", help="Lista os períodos e o nº de aulas de cada um.")
+    p_ativar = comandos.add_parser("ativar", help="Torna um período o ativo (a grade atual vai para o arquivo).")
+    p_ativar.add_argument("periodo", help="Descrição do período (ex: 2026.1).")
+    p_virar = comandos.add_parser("virar", help="Cria o próximo período copiando a grade de outro.")
+    p_virar.add_argument("--de", help="Período de origem (padrão: o ativo).")
+    p_virar.add_argument("--para", help="Descrição do novo período (padrão: o semestre seguinte ao de origem).")
+    p_virar.add_argument("--inicio", help="Data de início do novo período (AAAA-MM-DD).")
+    p_virar.add_argument("--fim", help="Data de fim do novo período (AAAA-MM-DD).")
+    p_virar.add_argument("--ativar", action="store_true", help="Ativa o novo período ao final.")
+    args = parser.parse_args(argv)
+
+    if args.comando == "listar":
+        for p in listar().itertuples(index=False):
+            marca = "▶" if p.ativo else " "
+            print(f"{marca} {p.descricao:<12} {p.aulas:>7} aulas")
+        return 0
+
+    if args.comando == "ativar":
+        id_periodo = _id_por_descricao(args.periodo)
+        if id_periodo is None:
+            print(f"❌ Período {args.periodo} não encontrado.")
+            return 1
+        sucesso, msg = ativar(id_periodo)
+    else:
+        ativo = periodo_ativo()
+        origem = args.de or (ativo["descricao"] if ativo else None)
+        id_origem = _id_por_descricao(origem) if origem else None
+        if id_origem is None:
+            print(f"❌ Período de origem {origem or '(nenhum ativo)'} não encontrado.")
+            return 1
+        destino = args.para or proxima_descricao(origem)
+        if not destino:
+            print(f"❌ Não sei o período seguinte a {origem}: informe --para.")
+            return 1
+        sucesso, msg = virar(id_origem, destino, args.inicio, args.fim, ativar_novo=args.ativar)
+
+    print(("✅ " if sucesso else "❌ ") + msg)
+    return 0 if sucesso else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Recomendação de salas por melhor encaixe de capacidade.
+
+Dado o total de alunos das turmas, o tipo de sala e o horário (dia + intervalo),
+devolve as salas livres em ordem de sobra de lugares (a menor sala que comporta
+vem primeiro).
+
+- As salas ficam num índice por tipo, ordenado por capacidade (cache do
+  db_connection, invalidado por escritas em tb_salas). O agendador usa o mesmo índice.
+- Para cada (dia, inicio, fim, tipo) guardamos a lista ordenada das salas
+  livres, refeita só quando a ocupação daquele dia muda (ocupacao.versao_dia).
+- A recomendação é um bisect nessa lista: O(log n + k) por rerun, mesmo com
+  milhares de salas.
+"""
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from database import db_connection as db
+from database import ocupacao
+
+LIMITE_SUGESTOES = 5
+MAX_HORARIOS_GUARDADOS = 256  # Listas de salas livres mantidas (horários distintos x tipos)
+
+_TABELAS = ["tb_salas"]
+
+_livres = {}   # (dia, inicio, fim, tipo) -> (indice, versao do dia, capacidades, ids)
+_lock = threading.Lock()
+
+# ==============================================================================
+# 1. ÍNDICES
+# ==============================================================================
+
+def _carregar_salas():
+    df = db._executar_consulta("SELECT id_sala, nome, capacidade, tipo FROM tb_salas", rotulo="indice_salas")
+    por_tipo = defaultdict(list)
+    nomes = {}
+    for id_sala, nome, capacidade, tipo in df.itertuples(index=False, name=None):
+        sala = (int(capacidade), int(id_sala))
+        por_tipo[tipo].append(sala)
+        por_tipo[None].append(sala)  # "Qualquer tipo"
+        nomes[int(id_sala)] = nome
+
+    por_tipo_ordenado = {}
+    for tipo, salas in por_tipo.items():
+        salas.sort()
+        por_tipo_ordenado[tipo] = ([c for c, _ in salas], [i for _, i in salas])
+    return {"por_tipo": por_tipo_ordenado, "nomes": nomes}
+
+def get_indice_salas():
+    """{"por_tipo": {tipo: (capacidades, ids)} ordenado por capacidade (None = qualquer), "nomes": {id: nome}}."""
+    return db.memoizar(("indice_salas",), _TABELAS, _carregar_salas)
+
+def tipos_de_sala():
+    return sorted(t for t in get_indice_salas()["por_tipo"] if t is not None)
+
+def _salas_livres(dia, inicio, fim, tipo):
+    """(capacidades, ids) das salas do tipo livres em [inicio, fim) no dia, ordenadas por capacidade."""
+    indice = get_indice_salas()
+    versao = ocupacao.versao_dia(dia)  # Lida antes das salas ocupadas: escrita no meio refaz depois
+    inicio, fim = db.minutos(inicio), db.minutos(fim)
+    chave = (dia, inicio, fim, tipo)
+    with _lock:
+        guardado = _livres.get(chave)
+        if guardado and guardado[0] is indice and guardado[1] == versao:
+            return guardado[2], guardado[3]
+
+    capacidades, ids = indice["por_tipo"].get(tipo, ([], []))
+    ocupadas = ocupacao.salas_ocupadas(dia, inicio, fim)
+    livres_cap, livres_ids = [], []
+    for capacidade, id_sala in zip(capacidades, ids):
+        if id_sala not in ocupadas:
+            livres_cap.append(capacidade)
+            livres_ids.append(id_sala)
+
+    with _lock:
+        if len(_livres) >= MAX_HORARIOS_GUARDADOS:
+            _livres.clear()
+        _livres[chave] = (indice, versao, livres_cap, livres_ids)
+    return livres_cap, livres_ids
+
+# ==============================================================================
+# 2. RECOMENDAÇÃO
+# ==============================================================================
+
+def recomendar_salas(alunos, dia, inicio, fim, tipo=None, limite=LIMITE_SUGESTOES):
+    """
+    Salas livres em [inicio, fim) no dia que comportam 'alunos', da menor sobra para a maior.
+    Retorna [{"id_sala", "nome", "capacidade", "sobra"}] com até 'limite' itens.
+    """
+    capacidades, ids = _salas_livres(dia, inicio, fim, tipo)
+    nomes = get_indice_salas()["nomes"]
+    primeira = bisect_left(capacidades, alunos)
+    return [
+        {"id_sala": ids[j], "nome": nomes.get(ids[j]), "capacidade": capacidades[j], "sobra": capacidades[j] - alunos}
+        for j in range(primeira, min(primeira + limite, len(ids)))
+    ]
+
+def maior_sala_livre(dia, inicio, fim, tipo=None):
+    """Capacidade da maior sala livre do tipo no horário (0 se não houver nenhuma)."""
+    capacidades, _ = _salas_livres(dia, inicio, fim, tipo)
+    return capacidades[-1] if capacidades else 0
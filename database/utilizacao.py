@@ -0,0 +1,240 @@
+"""
+Utilização das salas: matrizes de ocupação sala x dia x turno em NumPy.
+
+tb_salas, tb_alocacoes, tb_alocacao_turmas e tb_turmas são lidas uma vez (só
+as colunas necessárias) e viram arrays densos de forma (salas, dias, turnos),
+medidos em minutos dentro da janela de cada turno (db.MAP_HORARIOS):
+
+- minutos: minutos da janela cobertos por aulas (união dos horários reais, então
+  duas aulas sobrepostas não contam em dobro e a ocupação não passa de 100%);
+- ocupacao: minutos / minutos da janela (0 = livre, 1 = janela inteira);
+- aluno_minutos: qtd_alunos das turmas x minutos de cada aula na janela;
+- alunos: média de alunos em sala nos minutos ocupados (aluno_minutos / minutos).
+
+Por sala ficam também o total de aulas e quantas delas começam antes de terminar
+outra na mesma sala (sobreposição real de horários; o detalhe dos choques está
+na auditoria, database/validacao.py).
+
+O preenchimento (alunos / capacidade) e os resumos por sala saem de operações
+vetoriais sobre esses arrays (bincount, máscaras, argpartition), sem laços em
+Python por sala - um campus com milhares de salas é recalculado em milissegundos
+a cada filtro da tela. As matrizes ficam no cache do db_connection e são
+invalidadas por qualquer escrita nas tabelas lidas.
+"""
+from database import db_connection as db
+
+TOP_N = 10
+
+_TABELAS = ["tb_salas", "tb_alocacoes", "tb_alocacao_turmas", "tb_turmas"]
+
+_SQL_SALAS = "SELECT id_sala, nome, capacidade, tipo FROM tb_salas ORDER BY id_sala"
+_SQL_ALOCACOES = """
+    SELECT id_alocacao, id_sala, dia_semana,
+           (EXTRACT(EPOCH FROM hora_inicio) / 60)::int AS inicio, (EXTRACT(EPOCH FROM hora_fim) / 60)::int AS fim
+    FROM tb_alocacoes ORDER BY id_alocacao
+"""
+_SQL_ALOCACAO_TURMAS = "SELECT id_alocacao, id_turma FROM tb_alocacao_turmas"
+_SQL_TURMAS = "SELECT id_turma, qtd_alunos FROM tb_turmas ORDER BY id_turma"
+
+# ==============================================================================
+# 1. MATRIZES
+# ==============================================================================
+
+def _posicoes(ids_ordenados, ids):
+    """Posição de cada id em ids_ordenados (-1 se não existir), via busca binária vetorial."""
+    import numpy as np
+
+    if len(ids_ordenados) == 0:
+        return np.full(len(ids), -1, dtype=np.int64)
+    pos = np.searchsorted(ids_ordenados, ids)
+    pos = np.minimum(pos, len(ids_ordenados) - 1)
+    return np.where(ids_ordenados[pos] == ids, pos, -1)
+
+def _janelas(turnos):
+    """(inícios, fins) em minutos da janela de cada turno."""
+    import numpy as np
+
+    horarios = [db.horario_do_turno(turno) for turno in turnos]
+    return np.array([h[0] for h in horarios], dtype=np.int64), np.array([h[1] for h in horarios], dtype=np.int64)
+
+def _montar(df_salas, df_aloc, df_at, df_turmas):
+    """Matrizes a partir das quatro consultas (separado da leitura para os testes)."""
+    import numpy as np
+
+    dias = list(db.MAP_DIAS)
+    turnos = list(db.MAP_HORARIOS)
+    janela_ini, janela_fim = _janelas(turnos)
+
+    ids_salas = df_salas["id_sala"].to_numpy(dtype=np.int64)
+    ids_aloc = df_aloc["id_alocacao"].to_numpy(dtype=np.int64)
+    ids_turmas = df_turmas["id_turma"].to_numpy(dtype=np.int64)
+    qtd_alunos = df_turmas["qtd_alunos"].fillna(0).to_numpy(dtype=np.float64)
+
+    # Alunos por alocação: qtd_alunos de cada vínculo somado na posição da alocação
+    pos_turma = _posicoes(ids_turmas, df_at["id_turma"].to_numpy(dtype=np.int64))
+    pos_aloc = _posicoes(ids_aloc, df_at["id_alocacao"].to_numpy(dtype=np.int64))
+    validos = (pos_turma >= 0) & (pos_aloc >= 0)
+    alunos_aloc = np.bincount(pos_aloc[validos], weights=qtd_alunos[pos_turma[validos]], minlength=len(ids_aloc))
+
+    # Coordenadas (sala, dia) e horário de cada alocação; sala/dia fora do cadastro ficam de fora
+    s = _posicoes(ids_salas, df_aloc["id_sala"].to_numpy(dtype=np.int64))
+    d = df_aloc["dia_semana"].map(db.MAP_DIAS).fillna(-1).to_numpy(dtype=np.int64)
+    inicio = df_aloc["inicio"].to_numpy(dtype=np.int64)
+    fim = df_aloc["fim"].to_numpy(dtype=np.int64)
+    validos = (s >= 0) & (d >= 0) & (fim > inicio)
+    s, d, inicio, fim, alunos_aloc = s[validos], d[validos], inicio[validos], fim[validos], alunos_aloc[validos]
+
+    # Por (sala, dia), ordenado pelo início: 'antes' é o maior fim das aulas anteriores
+    # do grupo (máximo acumulado com deslocamento por grupo, sem laço em Python).
+    # Cada aula contribui para a união só com [max(inicio, antes), fim).
+    grupo = s * len(dias) + d
+    ordem = np.lexsort((fim, inicio, grupo))
+    grupo, inicio, fim, alunos_aloc = grupo[ordem], inicio[ordem], fim[ordem], alunos_aloc[ordem]
+    passo = 24 * 60 + 1
+    acumulado = np.maximum.accumulate(grupo * passo + fim) - grupo * passo
+    mesmo_grupo = np.zeros(len(grupo), dtype=bool)
+    mesmo_grupo[1:] = grupo[1:] == grupo[:-1]
+    antes = np.full(len(grupo), -1, dtype=np.int64)
+    antes[1:][mesmo_grupo[1:]] = acumulado[:-1][mesmo_grupo[1:]]
+    sobrepostas = antes > inicio
+    comeco_uniao = np.maximum(inicio, antes)
+
+    def na_janela(de, ate):
+        """(aulas, turnos): minutos de [de, ate) dentro de cada janela."""
+        return np.clip(np.minimum(ate[:, None], janela_fim) - np.maximum(de[:, None], janela_ini), 0, None)
+
+    forma = (len(ids_salas), len(dias), len(turnos))
+    tamanho = int(np.prod(forma))
+    celulas = (grupo[:, None] * len(turnos) + np.arange(len(turnos))).ravel()
+    minutos = np.bincount(celulas, weights=na_janela(comeco_uniao, fim).ravel(), minlength=tamanho).reshape(forma)
+    aluno_minutos = np.bincount(
+        celulas, weights=(na_janela(inicio, fim) * alunos_aloc[:, None]).ravel(), minlength=tamanho
+    ).reshape(forma)
+
+    sala_de = grupo // len(dias)
+    return {
+        "salas": df_salas.reset_index(drop=True),
+        "dias": dias,
+        "turnos": turnos,
+        "janela": (janela_fim - janela_ini).astype(np.float64),
+        "capacidade": df_salas["capacidade"].fillna(0).to_numpy(dtype=np.float64),
+        "minutos": minutos,
+        "ocupacao": minutos / (janela_fim - janela_ini),
+        "aluno_minutos": aluno_minutos,
+        "alunos": np.divide(aluno_minutos, minutos, out=np.zeros(forma), where=minutos > 0),
+        "aulas": np.bincount(sala_de, minlength=len(ids_salas)),
+        "sobrepostas": np.bincount(sala_de[sobrepostas], minlength=len(ids_salas)),
+    }
+
+def _carregar():
+    return _montar(
+        db._executar_consulta(_SQL_SALAS, rotulo="utilizacao_salas"),
+        db._executar_consulta(_SQL_ALOCACOES, rotulo="utilizacao_alocacoes"),
+        db._executar_consulta(_SQL_ALOCACAO_TURMAS, rotulo="utilizacao_alocacao_turmas"),
+        db._executar_consulta(_SQL_TURMAS, rotulo="utilizacao_turmas"),
+    )
+
+def get_matrizes():
+    """Matrizes de minutos ocupados e alunos (salas x dias x turnos), com cache."""
+    return db.memoizar(("utilizacao",), _TABELAS, _carregar)
+
+def preenchimento(m, selecao=slice(None)):
+    """alunos / capacidade por célula das salas selecionadas (média nos minutos ocupados; 0 se livre ou sem capacidade)."""
+    import numpy as np
+
+    alunos = m["alunos"][selecao]
+    capacidade = m["capacidade"][selecao][:, None, None]
+    return np.divide(alunos, capacidade, out=np.zeros(alunos.shape), where=capacidade > 0)
+
+def filtrar(m, tipos=None):
+    """Máscara booleana das salas dos tipos escolhidos (todas se tipos for vazio)."""
+    import numpy as np
+
+    if not tipos:
+        return np.ones(len(m["salas"]), dtype=bool)
+    return m["salas"]["tipo"].isin(tipos).to_numpy()
+
+# ==============================================================================
+# 2. RESUMOS
+# ==============================================================================
+
+def mapa_dia_turno(m, mascara=None, medida="ocupacao"):
+    """
+    Matriz dias x turnos agregada sobre as salas da máscara, em %:
+    - 'ocupacao': minutos ocupados / minutos disponíveis (janela do turno x salas);
+    - 'preenchimento': alunos-minuto / lugares-minuto das salas nos minutos em uso.
+    """
+    import numpy as np
+    import pandas as pd
+
+    mascara = filtrar(m) if mascara is None else mascara
+    if medida == "ocupacao":
+        ocupacao = m["ocupacao"][mascara]
+        valores = 100 * ocupacao.mean(axis=0) if ocupacao.shape[0] else np.zeros(ocupacao.shape[1:])
+    else:
+        assentos = (m["minutos"][mascara] * m["capacidade"][mascara][:, None, None]).sum(axis=0)
+        alunos = m["aluno_minutos"][mascara].sum(axis=0)
+        valores = 100 * np.divide(alunos, assentos, out=np.zeros(alunos.shape), where=assentos > 0)
+    return pd.DataFrame(np.round(valores, 1), index=m["dias"], columns=m["turnos"])
+
+def resumo_por_sala(m, mascara=None):
+    """
+    Uma linha por sala:
+    - uso_pct: minutos com aula / minutos disponíveis na semana (janelas dos turnos);
+    - preenchimento_pct: alunos / capacidade, em média, nos minutos em uso;
+    - aproveitamento_pct: alunos-minuto / (capacidade x minutos disponíveis na semana);
+    - conflitos: aulas que começam antes de terminar outra na mesma sala.
+    """
+    import numpy as np
+
+    mascara = filtrar(m) if mascara is None else mascara
+    disponivel = len(m["dias"]) * m["janela"].sum()
+    em_uso = m["minutos"][mascara].sum(axis=(1, 2))
+    alunos = m["aluno_minutos"][mascara].sum(axis=(1, 2))
+    capacidade = m["capacidade"][mascara]
+
+    df = m["salas"][mascara].reset_index(drop=True)
+    df["aulas"] = m["aulas"][mascara]
+    df["uso_pct"] = np.round(100 * em_uso / disponivel, 1)
+    lugares = capacidade * em_uso
+    df["preenchimento_pct"] = np.round(
+        100 * np.divide(alunos, lugares, out=np.zeros(len(alunos)), where=lugares > 0), 1
+    )
+    lugares = capacidade * disponivel
+    df["aproveitamento_pct"] = np.round(
+        100 * np.divide(alunos, lugares, out=np.zeros(len(alunos)), where=lugares > 0), 1
+    )
+    df["conflitos"] = m["sobrepostas"][mascara]
+    return df
+
+def ranking(resumo, n=TOP_N, mais_usadas=True, coluna="aproveitamento_pct"):
+    """As n salas mais (ou menos) aproveitadas, sem ordenar o campus inteiro (argpartition)."""
+    import numpy as np
+
+    n = min(n, len(resumo))
+    if n == 0:
+        return resumo.iloc[0:0]
+    valores = resumo[coluna].to_numpy()
+    chave = -valores if mais_usadas else valores
+    escolhidas = np.argpartition(chave, n - 1)[:n]
+    escolhidas = escolhidas[np.argsort(chave[escolhidas], kind="stable")]
+    return resumo.iloc[escolhidas].reset_index(drop=True)
+
+def celulas_das_salas(m, ids_salas, medida="preenchimento"):
+    """Formato longo (sala, dia, turno, valor %) das salas pedidas, para o mapa de calor por sala."""
+    import numpy as np
+    import pandas as pd
+
+    pos = _posicoes(m["salas"]["id_sala"].to_numpy(dtype=np.int64), np.asarray(ids_salas, dtype=np.int64))
+    pos = pos[pos >= 0]
+    if medida == "ocupacao":
+        valores = 100 * m["ocupacao"][pos]
+    else:
+        valores = 100 * preenchimento(m, pos)
+    qtd_dias, qtd_turnos = len(m["dias"]), len(m["turnos"])
+    return pd.DataFrame({
+        "sala": np.repeat(m["salas"]["nome"].to_numpy()[pos], qtd_dias * qtd_turnos),
+        "dia_semana": np.tile(np.repeat(m["dias"], qtd_turnos), len(pos)),
+        "turno": np.tile(m["turnos"], len(pos) * qtd_dias),
+        "valor": np.round(valores.ravel(), 1),
+    })
@@ -0,0 +1,236 @@
+"""
+Auditoria da grade inteira numa passada.
+
+Lê todas as alocações e seus vínculos com turmas (duas consultas, tuplas cruas),
+agrupa por hash em (dia, recurso) e, dentro de cada grupo (poucas aulas),
+ordena pelo início e varre procurando intervalos que se cruzam:
+
+- sala: duas ou mais aulas na mesma sala em horários sobrepostos;
+- docente: docente com duas ou mais aulas em horários sobrepostos;
+- turma: turma em duas ou mais aulas em horários sobrepostos;
+- lotacao: soma de qtd_alunos das turmas acima da capacidade da sala.
+
+Cada choque é um bloco de aulas encadeadas por sobreposição, com o horário
+coberto pelo bloco ('HH:MM-HH:MM').
+
+As restrições da migração 0004 já barram choques novos de sala e docente, mas
+dados antigos, importações com as restrições desligadas ou outro banco podem
+trazê-los. A checagem da Nova Alocação só olha a aula sendo criada; esta
+auditoria olha a grade toda e cabe numa rotina noturna.
+
+Uso pela linha de comando (código de saída 1 se houver violações):
+    python -m database.validacao [--tipos sala docente turma lotacao] [--json relatorio.json] [--limite 20]
+                                 [--criar-restricoes]
+--criar-restricoes instala as restrições de intervalo da migração 0004 que
+ficaram de fora por causa de choques antigos (só depois de resolvidos).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+# Permite rodar como script a partir da raiz do projeto
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_connection as db
+from database import instrumentacao
+
+TIPOS = {
+    "sala": "Sala com duas aulas no mesmo horário",
+    "docente": "Docente em duas aulas no mesmo horário",
+    "turma": "Turma em duas aulas no mesmo horário",
+    "lotacao": "Sala acima da capacidade",
+}
+
+_SQL_ALOCACOES = """
+    SELECT a.id_alocacao, a.dia_semana,
+           (EXTRACT(EPOCH FROM a.hora_inicio) / 60)::int, (EXTRACT(EPOCH FROM a.hora_fim) / 60)::int,
+           a.id_sala, s.nome, s.capacidade, a.id_docente, prof.nome
+    FROM tb_alocacoes a
+    JOIN tb_salas s ON a.id_sala = s.id_sala
+    JOIN tb_docentes prof ON a.id_docente = prof.id_docente
+"""
+_SQL_VINCULOS = """
+    SELECT atur.id_alocacao, atur.id_turma, t.identificacao, t.qtd_alunos
+    FROM tb_alocacao_turmas atur
+    JOIN tb_turmas t ON atur.id_turma = t.id_turma
+"""
+
+# ==============================================================================
+# 1. LEITURA
+# ==============================================================================
+
+def _ler(cursor, sql, rotulo):
+    with instrumentacao.medir(sql, rotulo) as reg:
+        cursor.execute(sql)
+        linhas = cursor.fetchall()
+        reg["linhas"] = len(linhas)
+    return linhas
+
+def _carregar():
+    """(alocações, vínculos) como listas de tuplas, lidas na mesma transação (retrato consistente)."""
+    conn = db.get_connection()
+    if not conn:
+        raise RuntimeError("Sem conexão com o banco.")
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            alocacoes = _ler(cursor, _SQL_ALOCACOES, "validacao_alocacoes")
+            vinculos = _ler(cursor, _SQL_VINCULOS, "validacao_vinculos")
+        return alocacoes, vinculos
+    finally:
+        conn.rollback()
+        conn.close()
+
+# ==============================================================================
+# 2. VALIDAÇÃO
+# ==============================================================================
+
+def _faixa(inicio, fim):
+    return f"{db.hora_texto(inicio)}-{db.hora_texto(fim)}"
+
+def _choques(grupos, tipo, nomes):
+    """
+    Em cada grupo (dia, recurso), blocos de aulas que se sobrepõem viram violações.
+    Ordenação + varredura: O(k log k) por grupo de k aulas.
+    """
+    violacoes = []
+    for (dia, recurso), aulas in grupos.items():
+        if len(aulas) < 2:
+            continue
+        aulas.sort()
+        bloco, comeco, termino = [], None, None
+        for inicio, fim, id_aloc in aulas + [(None, None, None)]:  # Sentinela fecha o último bloco
+            if inicio is not None and bloco and inicio < termino:
+                bloco.append(id_aloc)
+                termino = max(termino, fim)
+                continue
+            if len(bloco) > 1:
+                violacoes.append({
+                    "tipo": tipo, "dia_semana": dia, "horario": _faixa(comeco, termino), "id": recurso,
+                    "nome": nomes.get(recurso), "alocacoes": sorted(bloco),
+                    "detalhe": f"{len(bloco)} aulas em horários sobrepostos",
+                })
+            bloco, comeco, termino = [id_aloc], inicio, fim
+    return violacoes
+
+def validar(alocacoes, vinculos):
+    """
+    Audita a grade a partir das tuplas de _SQL_ALOCACOES e _SQL_VINCULOS.
+    Retorna {"alocacoes": n, "violacoes": {tipo: [violação, ...]}}.
+    """
+    por_sala, por_docente, por_turma = defaultdict(list), defaultdict(list), defaultdict(list)
+    nomes_salas, nomes_docentes, nomes_turmas = {}, {}, {}
+    horario = {}
+    for id_aloc, dia, inicio, fim, id_sala, sala, _, id_docente, docente in alocacoes:
+        horario[id_aloc] = (dia, inicio, fim)
+        por_sala[(dia, id_sala)].append((inicio, fim, id_aloc))
+        por_docente[(dia, id_docente)].append((inicio, fim, id_aloc))
+        nomes_salas[id_sala] = sala
+        nomes_docentes[id_docente] = docente
+
+    alunos = defaultdict(int)
+    for id_aloc, id_turma, identificacao, qtd_alunos in vinculos:
+        if id_aloc not in horario:
+            continue
+        dia, inicio, fim = horario[id_aloc]
+        por_turma[(dia, id_turma)].append((inicio, fim, id_aloc))
+        nomes_turmas[id_turma] = identificacao
+        alunos[id_aloc] += qtd_alunos or 0
+
+    lotacao = [
+        {"tipo": "lotacao", "dia_semana": dia, "horario": _faixa(inicio, fim), "id": id_sala, "nome": sala,
+         "alocacoes": [id_aloc], "detalhe": f"{alunos[id_aloc]} alunos para {capacidade} lugares"}
+        for id_aloc, dia, inicio, fim, id_sala, sala, capacidade, _, _ in alocacoes
+        if alunos[id_aloc] > (capacidade or 0)
+    ]
+    return {
+        "alocacoes": len(alocacoes),
+        "violacoes": {
+            "sala": _choques(por_sala, "sala", nomes_salas),
+            "docente": _choques(por_docente, "docente", nomes_docentes),
+            "turma": _choques(por_turma, "turma", nomes_turmas),
+            "lotacao": lotacao,
+        },
+    }
+
+def auditar():
+    """Lê a grade e valida. O relatório traz também o tempo gasto em cada etapa."""
+    inicio = time.perf_counter()
+    alocacoes, vinculos = _carregar()
+    lido = time.perf_counter()
+    relatorio = validar(alocacoes, vinculos)
+    relatorio["leitura_s"] = round(lido - inicio, 3)
+    relatorio["validacao_s"] = round(time.perf_counter() - lido, 3)
+    return relatorio
+
+def criar_restricoes():
+    """Instala as restrições de choque de sala/docente (migração 0004) se a grade permitir. Retorna True se existirem."""
+    conn = db.get_connection()
+    if not conn:
+        raise RuntimeError("Sem conexão com o banco.")
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT sga_criar_restricoes_grade()")
+            criadas = cursor.fetchone()[0]
+        conn.commit()
+        return criadas
+    finally:
+        conn.close()
+
+def total_violacoes(relatorio):
+    return sum(len(lista) for lista in relatorio["violacoes"].values())
+
+def como_dataframe(relatorio):
+    """Todas as violações numa tabela (para a tela e para exportar)."""
+    import pandas as pd
+
+    linhas = [v for lista in relatorio["violacoes"].values() for v in lista]
+    colunas = ["tipo", "dia_semana", "horario", "id", "nome", "alocacoes", "detalhe"]
+    df = pd.DataFrame(linhas, columns=colunas)
+    df["alocacoes"] = df["alocacoes"].map(lambda ids: ", ".join(str(i) for i in ids))
+    return df
+
+# ==============================================================================
+# 3. LINHA DE COMANDO
+# ==============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audita a grade inteira (choques de sala/docente/turma e lotação).")
+    parser.add_argument("--json", help="Grava o relatório completo neste arquivo.")
+    parser.add_argument("--tipos", nargs="+", choices=list(TIPOS), default=list(TIPOS),
+                        help="Tipos de violação que contam (padrão: todos).")
+    parser.add_argument("--limite", type=int, default=20, help="Violações listadas por tipo (padrão: 20).")
+    parser.add_argument("--criar-restricoes", action="store_true",
+                        help="Sem choques de sala/docente, instala as restrições do banco que ficaram pendentes.")
+    args = parser.parse_args(argv)
+
+    relatorio = auditar()
+    relatorio["violacoes"] = {tipo: relatorio["violacoes"][tipo] for tipo in args.tipos}
+    for tipo, lista in relatorio["violacoes"].items():
+        marca = "❌" if lista else "✅"
+        print(f"{marca} {TIPOS[tipo]}: {len(lista)}")
+        for v in lista[:args.limite]:
+            ids = ", ".join(str(i) for i in v["alocacoes"])
+            print(f"    {v['dia_semana']} {v['horario']} | {v['nome']} (id {v['id']}) | {v['detalhe']} | alocações {ids}")
+        if len(lista) > args.limite:
+            print(f"    ... e mais {len(lista) - args.limite}")
+    print(f"📄 {relatorio['alocacoes']} alocações auditadas "
+          f"(leitura {relatorio['leitura_s']}s, validação {relatorio['validacao_s']}s)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+        print(f"💾 Relatório salvo em {args.json}")
+
+    if args.criar_restricoes:
+        if criar_restricoes():
+            print("🔒 Restrições de choque de sala/docente ativas no banco.")
+        else:
+            print("⚠️  Restrições não criadas: resolva antes os choques de sala e docente.")
+    return 1 if total_violacoes(relatorio) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
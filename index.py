@@ -1,57 +1,274 @@
-import subprocess
-import time
-import sys
-import os
+"""
+Supervisor do SGA: sobe os portais do Streamlit e os mantém de pé.
 
-# --- CONFIGURAÇÃO MANUAL DO PYTHON ---
-# Caminho baseado nos seus logs anteriores. 
-# O "r" antes das aspas serve para o Python aceitar as barras invertidas do Windows.
-PYTHON_EXECUTABLE = r"C:\Users\TI\AppData\Local\Programs\Python\Python314\python.exe"
+- Modo "unico" (padrão): um só app multipágina (app.py) com os três portais em
+  /aluno, /docente e /admin - um interpretador, um pool de conexões e um cache
+  por réplica. Modo "separado": um processo por portal, como antes.
+- Nos dois modos sobe também a API HTTP somente leitura das grades
+  (database/api.py, JSON/iCal), que responde aos celulares sem sessão do Streamlit.
+- Usa o mesmo Python que rodou este script (sys.executable).
+- Várias réplicas por portal (ex: portal do aluno na época de matrícula), cada
+  uma numa porta; um proxy reverso (nginx, Caddy...) distribui entre elas.
+- Health check HTTP em /_stcore/health; réplica que cai ou para de responder é
+  reiniciada com espera exponencial (backoff).
+- Ctrl+C / SIGTERM encerra tudo de forma limpa.
 
-# Se o caminho acima não existir, tenta achar o padrão do sistema (fallback)
-if not os.path.exists(PYTHON_EXECUTABLE):
-    print(f"⚠️  Atenção: Não achei o Python em {PYTHON_EXECUTABLE}")
-    print("Tentando usar o comando 'python' padrão do sistema...")
-    PYTHON_EXECUTABLE = "python" # Tenta o comando global
+Uso:
+    python index.py [--replicas app=4 --replicas api=2] [--host 0.0.0.0] [--sem-api]
+    python index.py --modo separado [--replicas aluno=4 --replicas docente=2]
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
 
 # --- DIRETÓRIOS ---
 base_dir = os.path.dirname(os.path.abspath(__file__))
 
-apps = [
-    (os.path.join(base_dir, "apps", "admin.py"), "8501"),
-    (os.path.join(base_dir, "apps", "portal_aluno.py"), "8502"),
-    (os.path.join(base_dir, "apps", "portal_docente.py"), "8503")
-]
-
-print("🚀 INICIANDO SGA (FORÇANDO PYTHON CORRETO)")
-print(f"🐍 Usando Python: {PYTHON_EXECUTABLE}")
-print("------------------------------------------------")
-
-processes = []
-
-try:
-    for filename, port in apps:
-        if not os.path.exists(filename):
-            print(f"❌ ARQUIVO NÃO ENCONTRADO: {filename}")
-            continue
-
-        print(f"▶️  Subindo {os.path.basename(filename)} na porta {port}...")
-        
-        # Aqui usamos o PYTHON_EXECUTABLE que definimos lá em cima
-        p = subprocess.Popen(
-            [PYTHON_EXECUTABLE, "-m", "streamlit", "run", filename, "--server.port", port],
-            cwd=base_dir
-        )
-        processes.append(p)
-        time.sleep(2)
-
-    print("\n✅ Todos os sistemas foram iniciados!")
+# Portal -> (script, porta da primeira réplica). Réplica k usa porta + k * SALTO_PORTA.
+API = ("api", os.path.join(base_dir, "database", "api.py"), 8600)
+
+PORTAIS_UNICO = {
+    "app": (os.path.join(base_dir, "app.py"), 8501),
+}
+PORTAIS_SEPARADOS = {
+    "admin": (os.path.join(base_dir, "apps", "admin.py"), 8501),
+    "aluno": (os.path.join(base_dir, "apps", "portal_aluno.py"), 8502),
+    "docente": (os.path.join(base_dir, "apps", "portal_docente.py"), 8503),
+}
+SALTO_PORTA = 10
+
+INTERVALO_CHECAGEM = 2.0     # Segundos entre health checks
+TIMEOUT_HEALTH = 2.0         # Segundos esperando a resposta do /_stcore/health
+FALHAS_PARA_REINICIAR = 3    # Health checks seguidos sem resposta = réplica travada
+TIMEOUT_SUBIDA = 60.0        # Segundos para a réplica responder pela primeira vez
+BACKOFF_INICIAL = 1.0
+BACKOFF_MAXIMO = 60.0
+ESTAVEL_APOS = 60.0          # Réplica de pé há esse tempo zera o backoff
+TIMEOUT_ENCERRAMENTO = 10.0  # Segundos de espera pelo terminate antes do kill
+
+class Replica:
+    """Um processo do Streamlit supervisionado."""
+
+    def __init__(self, portal, script, porta, host):
+        self.portal = portal
+        self.script = script
+        self.porta = porta
+        self.host = host
+        self.processo = None
+        self.iniciado_em = None
+        self.saudavel_em = None       # Primeira resposta OK desde o último start
+        self.tempo_subida = None      # Segundos do start até a primeira resposta OK
+        self.falhas_health = 0
+        self.reinicios = 0
+        self.backoff = BACKOFF_INICIAL
+        self.proximo_start = 0.0
+
+    @property
+    def nome(self):
+        return f"{self.portal}:{self.porta}"
+
+    caminho_health = "/_stcore/health"
+
+    def comando(self):
+        return [sys.executable, "-m", "streamlit", "run", self.script,
+                "--server.port", str(self.porta), "--server.address", self.host,
+                "--server.headless", "true"]
+
+    def iniciar(self):
+        self.processo = subprocess.Popen(self.comando(), cwd=base_dir)
+        self.iniciado_em = time.monotonic()
+        self.saudavel_em = None
+        self.falhas_health = 0
+
+    def rodando(self):
+        return self.processo is not None and self.processo.poll() is None
+
+    def saudavel(self):
+        host = "127.0.0.1" if self.host in ("0.0.0.0", "") else self.host
+        try:
+            with urllib.request.urlopen(f"http://{host}:{self.porta}{self.caminho_health}", timeout=TIMEOUT_HEALTH) as resposta:
+                return resposta.status == 200
+        except OSError:
+            return False
+
+    def parar(self):
+        if self.rodando():
+            self.processo.terminate()
+
+    def matar(self):
+        if self.rodando():
+            self.processo.kill()
+
+class ReplicaApi(Replica):
+    """A API HTTP das grades (database/api.py), supervisionada como os portais."""
+
+    caminho_health = "/saude"
+
+    def comando(self):
+        return [sys.executable, "-m", "database.api", "--porta", str(self.porta), "--host", self.host]
+
+class Supervisor:
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self.encerrando = False
+        self.inicio = time.monotonic()
+
+    def _agendar_reinicio(self, replica, motivo):
+        agora = time.monotonic()
+        # Caiu logo depois de subir? Espera cada vez mais antes de tentar de novo
+        if replica.saudavel_em and agora - replica.saudavel_em >= ESTAVEL_APOS:
+            replica.backoff = BACKOFF_INICIAL
+        print(f"⚠️  {replica.nome} {motivo}. Reiniciando em {replica.backoff:.0f}s...")
+        replica.proximo_start = agora + replica.backoff
+        replica.backoff = min(replica.backoff * 2, BACKOFF_MAXIMO)
+        replica.processo = None
+
+    def _checar(self, replica):
+        agora = time.monotonic()
+        if replica.processo is None:
+            if agora >= replica.proximo_start:
+                replica.reinicios += 1
+                replica.iniciar()
+            return
+
+        if not replica.rodando():
+            self._agendar_reinicio(replica, f"saiu com código {replica.processo.returncode}")
+            return
+
+        if replica.saudavel():
+            replica.falhas_health = 0
+            if replica.saudavel_em is None:
+                replica.saudavel_em = agora
+                replica.tempo_subida = agora - replica.iniciado_em
+                if replica.reinicios:
+                    print(f"✅ {replica.nome} de volta em {replica.tempo_subida:.1f}s")
+            return
+
+        # Sem resposta: ainda subindo ou travada
+        if replica.saudavel_em is None:
+            if agora - replica.iniciado_em > TIMEOUT_SUBIDA:
+                replica.matar()
+                self._agendar_reinicio(replica, f"não respondeu em {TIMEOUT_SUBIDA:.0f}s")
+            return
+        replica.falhas_health += 1
+        if replica.falhas_health >= FALHAS_PARA_REINICIAR:
+            replica.matar()
+            self._agendar_reinicio(replica, f"sem resposta em {replica.falhas_health} health checks")
+
+    def subir(self):
+        """Sobe todas as réplicas em paralelo e espera a primeira resposta de cada uma."""
+        for replica in self.replicas:
+            if not os.path.exists(replica.script):
+                print(f"❌ ARQUIVO NÃO ENCONTRADO: {replica.script}")
+                continue
+            print(f"▶️  Subindo {replica.nome}...")
+            replica.iniciar()
+
+        ativas = [r for r in self.replicas if r.processo is not None]
+        while not self.encerrando and any(r.saudavel_em is None and r.processo is not None for r in ativas):
+            for replica in ativas:
+                if replica.saudavel_em is None:
+                    self._checar(replica)
+            time.sleep(0.25)
+        self.relatorio_subida()
+
+    def relatorio_subida(self):
+        print("\n⏱️  Tempo até o primeiro health check OK")
+        print("------------------------------------------------")
+        for replica in self.replicas:
+            if replica.tempo_subida is not None:
+                print(f"  {replica.nome:<16} {replica.tempo_subida:>6.2f}s  (pid {replica.processo.pid})")
+            else:
+                print(f"  {replica.nome:<16}   ---   (não subiu)")
+        print(f"  {'total':<16} {time.monotonic() - self.inicio:>6.2f}s")
+        print("------------------------------------------------")
+
+    def supervisionar(self):
+        while not self.encerrando:
+            for replica in self.replicas:
+                if self.encerrando:
+                    break
+                if os.path.exists(replica.script):
+                    self._checar(replica)
+            time.sleep(INTERVALO_CHECAGEM)
+
+    def encerrar(self, *_):
+        if self.encerrando:
+            return
+        self.encerrando = True
+        print("\n🛑 Encerrando...")
+
+    def finalizar(self):
+        for replica in self.replicas:
+            replica.parar()
+        limite = time.monotonic() + TIMEOUT_ENCERRAMENTO
+        for replica in self.replicas:
+            if replica.processo is None:
+                continue
+            try:
+                replica.processo.wait(timeout=max(limite - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                print(f"💀 {replica.nome} não encerrou a tempo, forçando.")
+                replica.matar()
+        print("👋 Todos os processos foram encerrados.")
+
+MODOS = {"unico": PORTAIS_UNICO, "separado": PORTAIS_SEPARADOS}
+
+def _ler_replicas(valores, portais):
+    """{portal: N}; 'api' também é aceito (réplicas da API HTTP)."""
+    portais = {**portais, API[0]: API[1:]}
+    replicas = {portal: 1 for portal in portais}
+    for valor in valores or []:
+        portal, _, n = valor.partition("=")
+        if portal not in portais or not n.isdigit():
+            raise argparse.ArgumentTypeError(f"Use portal=N com portal em {', '.join(portais)} (recebido: {valor})")
+        replicas[portal] = int(n)
+    return replicas
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sobe e supervisiona os portais do SGA.")
+    parser.add_argument("--modo", choices=list(MODOS), default="unico",
+                        help="unico: app multipágina (app.py); separado: um processo por portal.")
+    parser.add_argument("--replicas", action="append", metavar="PORTAL=N",
+                        help="Réplicas por portal (ex: --replicas app=4, ou aluno=4 no modo separado). Padrão: 1 de cada.")
+    parser.add_argument("--host", default="0.0.0.0", help="Endereço em que os portais escutam.")
+    parser.add_argument("--sem-api", action="store_true", help="Não sobe a API HTTP das grades.")
+    args = parser.parse_args(argv)
+    try:
+        portais = MODOS[args.modo]
+        quantidades = _ler_replicas(args.replicas, portais)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    replicas = [
+        Replica(portal, script, porta + k * SALTO_PORTA, args.host)
+        for portal, (script, porta) in portais.items()
+        for k in range(quantidades[portal])
+    ]
+    if not args.sem_api:
+        nome, script, porta = API
+        replicas += [ReplicaApi(nome, script, porta + k * SALTO_PORTA, args.host) for k in range(quantidades[nome])]
+
+    print("🚀 INICIANDO SGA")
+    print(f"🐍 Usando Python: {sys.executable}")
+    print(f"🧩 Modo: {args.modo}")
     print("------------------------------------------------")
-    
-    while True:
-        time.sleep(1)
-
-except KeyboardInterrupt:
-    print("\n🛑 Encerrando...")
-    for p in processes:
-        p.terminate()
\ No newline at end of file
+
+    supervisor = Supervisor(replicas)
+    signal.signal(signal.SIGINT, supervisor.encerrar)
+    signal.signal(signal.SIGTERM, supervisor.encerrar)
+    try:
+        supervisor.subir()
+        if not supervisor.encerrando:
+            print("\n✅ Todos os sistemas foram iniciados! (Ctrl+C para encerrar)")
+            supervisor.supervisionar()
+    finally:
+        supervisor.finalizar()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Permite importar 'database' a partir da raiz do projeto
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,50 @@
+"""API das grades: validadores (ETag/Last-Modified) derivados dos dados. Precisa do banco."""
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from database import api
+from database import db_connection as db
+
+@pytest.fixture(scope="module")
+def servidor():
+    if db.get_connection() is None:
+        pytest.skip("Sem conexão com o banco.")
+    turmas = db.run_query("SELECT id_turma FROM tb_grade_turma ORDER BY id_turma LIMIT 1")
+    if turmas.empty:
+        pytest.skip("Sem grade carregada.")
+    servidor = api.criar_servidor("127.0.0.1", 0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}", int(turmas.iloc[0, 0])
+    servidor.shutdown()
+    servidor.server_close()
+
+def _get(url, **cabecalhos):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=cabecalhos)) as resposta:
+            return resposta.status, resposta.headers, resposta.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+def test_etag_nao_muda_com_escrita_de_outro_recurso(servidor):
+    base, id_turma = servidor
+    url = f"{base}/api/turmas/{id_turma}/grade"
+    status, cabecalhos, corpo = _get(url)
+    assert status == 200 and corpo.startswith(b"[")
+    tag = cabecalhos["ETag"]
+    assert cabecalhos["Last-Modified"]
+
+    # Carimbos novos (escrita em outra turma, ou outra máquina) sem mudar os dados desta grade
+    db.invalidar_tabelas(db.TABELAS_ALOCACAO)
+    status, cabecalhos, _ = _get(url, **{"If-None-Match": tag})
+    assert status == 304 and cabecalhos["ETag"] == tag
+
+def test_etag_e_o_hash_do_corpo(servidor):
+    base, id_turma = servidor
+    for caminho in ("/api/docentes", f"/api/turmas/{id_turma}/grade.ics"):
+        status, cabecalhos, corpo = _get(base + caminho)
+        assert status == 200 and cabecalhos["ETag"] == api.etag(corpo)
+    # Listas não têm data de alteração no banco: só o ETag valida
+    assert "Last-Modified" not in _get(f"{base}/api/docentes")[1]
@@ -0,0 +1,38 @@
+"""Avisos entre processos (sem banco): o que cada aviso recebido carimba."""
+import json
+
+import pytest
+
+from database import avisos
+from database import db_connection as db
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+def _aviso(origem, pasta_carimbos, tabelas):
+    return json.dumps({"o": origem, "c": pasta_carimbos, "t": tabelas})
+
+def test_aviso_da_mesma_pasta_nao_carimba_de_novo(pasta):
+    # Quem escreveu (outro processo, mesma máquina e SGA_CACHE_DIR) já carimbou
+    db.invalidar_tabelas(["tb_alocacoes"])
+    carimbo = db.versao_tabela("tb_alocacoes")
+    avisos.processar(_aviso("outro:1:ab", avisos._pasta_carimbos(), ["tb_alocacoes"]))
+    assert db.versao_tabela("tb_alocacoes") == carimbo
+
+def test_aviso_de_outra_maquina_carimba(pasta):
+    db.invalidar_tabelas(["tb_alocacoes"])
+    carimbo = db.versao_tabela("tb_alocacoes")
+    avisos.processar(_aviso("outra:1:ab", "outra:/tmp/sga_cache", ["tb_alocacoes"]))
+    assert db.versao_tabela("tb_alocacoes") > carimbo
+
+def test_aviso_descarta_o_cache_mesmo_sem_carimbar(pasta):
+    db.memoizar("teste_avisos", ["tb_salas"], lambda: "antes", ttl=3600)
+    avisos.processar(_aviso("outro:1:ab", avisos._pasta_carimbos(), ["tb_salas"]))
+    assert db.memoizar("teste_avisos", ["tb_salas"], lambda: "depois", ttl=3600) == "depois"
+
+def test_aviso_proprio_e_ignorado(pasta):
+    geracao = avisos.geracao()
+    avisos.processar(_aviso(avisos.ORIGEM, "outra:/x", ["tb_alocacoes"]))
+    assert avisos.geracao() == geracao and db.versao_tabela("tb_alocacoes") == 0
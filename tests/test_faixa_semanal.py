@@ -0,0 +1,64 @@
+"""
+Codificação das restrições de choque da migração 0004 (sga_faixa_semanal):
+duas faixas se cruzam (&&) se e só se são do mesmo recurso, no mesmo dia, em
+horários sobrepostos. Precisa do banco (POSTGRES_URL ou DB_CONFIG) com as
+migrações aplicadas; sem ele, o teste é pulado.
+"""
+import random
+
+import pytest
+
+from database import db_connection as db
+
+DIAS = list(db.MAP_DIAS)
+
+@pytest.fixture(scope="module")
+def cursor():
+    conn = db.get_connection()
+    if conn is None:
+        pytest.skip("Sem conexão com o banco.")
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regproc('sga_faixa_semanal') IS NOT NULL")
+            if not cur.fetchone()[0]:
+                pytest.skip("Migração 0004 não aplicada.")
+            yield cur
+    finally:
+        conn.rollback()
+        conn.close()
+
+def _aula(rng):
+    inicio = rng.choice([0, rng.randrange(24 * 60 - 1)])
+    fim = rng.choice([24 * 60 - 1, rng.randrange(inicio + 1, 24 * 60)])
+    # Poucos ids e ids grandes: vizinhos na codificação (id*10080 + dia*1440) aparecem com frequência
+    return rng.choice([1, 2, 3, 2**31 - 1]), rng.choice(DIAS + ["Domingo"]), inicio, fim
+
+def test_cruzamento_igual_forca_bruta(cursor):
+    rng = random.Random(0)
+    pares = [(_aula(rng), _aula(rng)) for _ in range(3000)]
+    colunas = list(zip(*[a + b for a, b in pares]))
+    horas = lambda minutos: [db.hora_texto(m) for m in minutos]
+    cursor.execute(
+        """
+        SELECT sga_faixa_semanal(id_a, dia_a, ini_a::time, fim_a::time)
+               && sga_faixa_semanal(id_b, dia_b, ini_b::time, fim_b::time)
+        FROM unnest(%s::int[], %s::text[], %s::text[], %s::text[], %s::int[], %s::text[], %s::text[], %s::text[])
+             AS p (id_a, dia_a, ini_a, fim_a, id_b, dia_b, ini_b, fim_b)
+        """,
+        (list(colunas[0]), list(colunas[1]), horas(colunas[2]), horas(colunas[3]),
+         list(colunas[4]), list(colunas[5]), horas(colunas[6]), horas(colunas[7])),
+    )
+    obtido = [bool(linha[0]) for linha in cursor.fetchall()]  # NULL (dia fora da semana) não cruza nada
+    esperado = [
+        id_a == id_b and dia_a == dia_b and dia_a in db.MAP_DIAS and ini_a < fim_b and ini_b < fim_a
+        for (id_a, dia_a, ini_a, fim_a), (id_b, dia_b, ini_b, fim_b) in pares
+    ]
+    assert obtido == esperado
+    assert any(esperado) and not all(esperado)
+
+def test_faixa_de_um_dia_nao_invade_o_seguinte(cursor):
+    cursor.execute(
+        "SELECT sga_faixa_semanal(1, 'Segunda', '00:00', '23:59') && sga_faixa_semanal(1, 'Terca', '00:00', '00:01'),"
+        "       sga_faixa_semanal(1, 'Sabado', '00:00', '23:59') && sga_faixa_semanal(2, 'Segunda', '00:00', '00:01')"
+    )
+    assert cursor.fetchone() == (False, False)
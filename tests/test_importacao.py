@@ -0,0 +1,10 @@
+"""Linha de comando da importação: erros de arquivo viram mensagem e código 1."""
+from database import importacao
+
+def test_caminho_inexistente(tmp_path, capsys):
+    assert importacao.main([str(tmp_path / "nao_existe.csv")]) == 1
+    assert capsys.readouterr().out.startswith("❌ ")
+
+def test_caminho_ilegivel(tmp_path, capsys):
+    assert importacao.main([str(tmp_path)]) == 1  # Diretório no lugar do arquivo
+    assert capsys.readouterr().out.startswith("❌ ")
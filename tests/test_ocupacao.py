@@ -0,0 +1,114 @@
+"""Índice de ocupação em memória (sem banco): comparado com a força bruta."""
+import random
+
+import pytest
+
+from database import ocupacao
+from database.ocupacao import _TABELAS, RECURSOS, Agenda, _Intervalos
+
+DIAS = ["Segunda", "Terca", "Quarta"]
+
+def _cruza(a_inicio, a_fim, b_inicio, b_fim):
+    return a_inicio < b_fim and b_inicio < a_fim
+
+def _aula_aleatoria(rng):
+    inicio = rng.randrange(7 * 60, 22 * 60)
+    return rng.choice(DIAS), inicio, inicio + rng.choice([15, 50, 100, 210, 300])
+
+def test_sobrepostos_intervalo_semiaberto():
+    intervalos = _Intervalos()
+    intervalos.adicionar(480, 690, 1)
+    assert intervalos.sobrepostos(690, 720) == []   # Começa quando a outra termina
+    assert intervalos.sobrepostos(420, 480) == []   # Termina quando a outra começa
+    assert intervalos.sobrepostos(689, 700) == [1]
+    assert intervalos.sobrepostos(500, 510) == [1]  # Contida
+    assert intervalos.sobrepostos(400, 800) == [1]  # Contém
+
+@pytest.mark.parametrize("semente", range(20))
+def test_sobrepostos_igual_forca_bruta(semente):
+    rng = random.Random(semente)
+    intervalos, aulas = _Intervalos(), {}
+    for id_aloc in range(60):
+        _, inicio, fim = _aula_aleatoria(rng)
+        intervalos.adicionar(inicio, fim, id_aloc)
+        aulas[id_aloc] = (inicio, fim)
+    for id_aloc in rng.sample(sorted(aulas), 20):
+        intervalos.remover(*aulas.pop(id_aloc), id_aloc)
+
+    for _ in range(200):
+        _, inicio, fim = _aula_aleatoria(rng)
+        esperado = {i for i, (a, b) in aulas.items() if _cruza(a, b, inicio, fim)}
+        assert set(intervalos.sobrepostos(inicio, fim)) == esperado
+
+@pytest.mark.parametrize("semente", range(10))
+def test_agenda_igual_forca_bruta(semente):
+    rng = random.Random(semente)
+    agenda, aulas = Agenda(), {}
+    for id_aloc in range(150):
+        dia, inicio, fim = _aula_aleatoria(rng)
+        registro = (dia, inicio, fim, rng.randrange(8), rng.randrange(6), tuple(rng.sample(range(10), rng.randrange(1, 3))))
+        agenda.adicionar(id_aloc, *registro)
+        aulas[id_aloc] = registro
+    for id_aloc in rng.sample(sorted(aulas), 50):
+        agenda.remover(id_aloc)
+        del aulas[id_aloc]
+    agenda.remover(10_000)  # Inexistente: ignorada
+
+    def em_uso(recurso, dia, inicio, fim):
+        ids = set()
+        for d, a, b, id_sala, id_docente, turmas in aulas.values():
+            if d == dia and _cruza(a, b, inicio, fim):
+                ids.update({"salas": (id_sala,), "docentes": (id_docente,), "turmas": turmas}[recurso])
+        return ids
+
+    for _ in range(100):
+        dia, inicio, fim = _aula_aleatoria(rng)
+        for recurso in RECURSOS:
+            esperado = em_uso(recurso, dia, inicio, fim)
+            assert agenda.ocupados(recurso, dia, inicio, fim) == esperado
+            id_recurso = rng.randrange(10)
+            assert agenda.ocupado(recurso, id_recurso, dia, inicio, fim) == (id_recurso in esperado)
+        turmas = rng.sample(range(10), 3)
+        conflitos = agenda.conflitos(dia, inicio, fim, id_sala=3, id_docente=2, ids_turmas=turmas)
+        assert conflitos == {
+            "sala": 3 in em_uso("salas", dia, inicio, fim),
+            "docente": 2 in em_uso("docentes", dia, inicio, fim),
+            "turmas": [t for t in turmas if t in em_uso("turmas", dia, inicio, fim)],
+        }
+
+def test_copia_independente():
+    agenda = Agenda()
+    agenda.adicionar(1, "Segunda", 480, 690, 1, 1, [1])
+    copia = agenda.copia()
+    copia.adicionar(2, "Segunda", 700, 800, 2, 2, [2])
+    copia.remover(1)
+    assert agenda.ocupado("salas", 1, "Segunda", 500, 510)
+    assert not agenda.ocupado("salas", 2, "Segunda", 700, 800)
+    assert agenda.geracoes["Segunda"] == 1
+
+def _evento(id_alocacao, antes, depois):
+    return {"acao": "inserir", "id_alocacao": id_alocacao, "dia": "Segunda", "inicio": 480, "fim": 690,
+            "id_sala": 1, "id_docente": 1, "turmas": [1],
+            "carimbos": {t: (antes, depois) for t in _TABELAS}}
+
+def test_ao_escrever_so_avanca_a_partir_da_versao_montada(monkeypatch):
+    monkeypatch.setattr(ocupacao, "_agenda", Agenda())
+    monkeypatch.setattr(ocupacao, "_estado", {"versao": (10, 10), "montado_em": 0.0, "reconstrucoes": 0})
+
+    ocupacao._ao_escrever(_evento(1, 10, 20))
+    assert ocupacao._estado["versao"] == (20, 20)
+    ocupacao._ao_escrever(_evento(2, 10, 20))  # Segundo evento do mesmo lote
+    assert ocupacao._estado["versao"] == (20, 20)
+    assert set(ocupacao._agenda.alocacoes) == {1, 2}
+
+    # Outro processo escreveu entre a montagem e esta escrita: o índice não pode encobrir
+    ocupacao._ao_escrever(_evento(3, 25, 30))
+    assert ocupacao._estado["versao"] is None
+
+def test_ao_escrever_sem_carimbos_invalida(monkeypatch):
+    monkeypatch.setattr(ocupacao, "_agenda", Agenda())
+    monkeypatch.setattr(ocupacao, "_estado", {"versao": (10, 10), "montado_em": 0.0, "reconstrucoes": 0})
+    evento = _evento(1, 10, 20)
+    evento["carimbos"] = {}
+    ocupacao._ao_escrever(evento)
+    assert ocupacao._estado["versao"] is None
@@ -0,0 +1,85 @@
+"""
+Cookie da sessão do painel com apps/admin.py rodando sozinho (index.py --modo
+separado / streamlit run apps/admin.py) e pelo app.py. Precisa do banco com as
+migrações aplicadas; sem ele, os testes são pulados.
+"""
+import os
+
+import bcrypt
+import pytest
+
+from database import autenticacao
+from database import db_connection as db
+
+streamlit_testing = pytest.importorskip("streamlit.testing.v1")
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USUARIO, SENHA = "teste_sessao", "senha-de-teste"
+IP = "203.0.113.7"  # TEST-NET-3: não colide com clientes reais
+
+@pytest.fixture(scope="module")
+def usuario():
+    if db.get_connection() is None:
+        pytest.skip("Sem conexão com o banco.")
+    hash_senha = bcrypt.hashpw(SENHA.encode("utf-8"), bcrypt.gensalt(4)).decode("utf-8")
+    db.run_command("DELETE FROM tb_usuarios WHERE usuario = %s", (USUARIO,))
+    ok, msg = db.run_command(
+        "INSERT INTO tb_usuarios (usuario, senha_hash, nome) VALUES (%s, %s, %s)", (USUARIO, hash_senha, "Teste")
+    )
+    assert ok, msg
+    yield USUARIO
+    db.run_command("DELETE FROM tb_usuarios WHERE usuario = %s", (USUARIO,))
+    db.run_command("DELETE FROM tb_login_falhas WHERE chave IN (%s, %s)", (f"usuario:{USUARIO}", f"ip:{IP}"))
+
+def _scripts_de_cookie(teste, token=""):
+    """Scripts que gravam o cookie com o token (token vazio: os que o apagam)."""
+    return [e.proto.body for e in teste.get("html") if f"{autenticacao.COOKIE_SESSAO}={token};" in e.proto.body]
+
+def _botao(teste, rotulo):
+    return next(b for b in teste.button if b.label == rotulo)
+
+def test_admin_sozinho_grava_e_apaga_o_cookie(usuario):
+    teste = streamlit_testing.AppTest.from_file(os.path.join(RAIZ, "apps", "admin.py"), default_timeout=120).run()
+
+    teste.text_input[0].input(usuario)
+    teste.text_input[1].input(SENHA)
+    _botao(teste, "Entrar").click().run()
+    token = teste.session_state[autenticacao.COOKIE_SESSAO]
+    assert autenticacao.validar_token(token)["usuario"] == usuario
+    assert len(_scripts_de_cookie(teste, token)) == 1
+
+    # Logout: o token é revogado no banco e sai do estado da sessão
+    _botao(teste, "Sair (Logout)").click().run()
+    assert autenticacao.validar_token(token) is None
+    assert teste.session_state[autenticacao.COOKIE_SESSAO] is None
+    assert _scripts_de_cookie(teste, token) == []
+    # O AppTest simula st.context.cookies com um objeto que "tem" qualquer cookie: o apagar aparece
+    assert len(_scripts_de_cookie(teste)) == 1
+
+def test_app_multipagina_sincroniza_uma_vez(usuario):
+    token = autenticacao.emitir_token(usuario, "Teste")
+    teste = streamlit_testing.AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=120)
+    teste.session_state[autenticacao.COOKIE_SESSAO] = token
+    teste.run()
+    assert len(_scripts_de_cookie(teste, token)) == 1  # Só o painel grava: o app.py não repete o script
+
+def test_limite_de_tentativas_vale_entre_processos(usuario):
+    # Falhas gravadas por outra réplica (linhas no banco, não na memória deste processo)
+    chave = f"usuario:{usuario}"
+    db.run_command("DELETE FROM tb_login_falhas WHERE chave = %s", (chave,))
+    for _ in range(autenticacao.MAX_FALHAS_USUARIO - 1):
+        assert db.run_command("INSERT INTO tb_login_falhas (chave) VALUES (%s)", (chave,))[0]
+
+    ok, _, erro = autenticacao.autenticar(usuario, "senha-errada", IP)
+    assert not ok and erro == "Usuário ou senha incorretos."
+    # A falha que completa o limite bloqueia até a senha certa, vinda de qualquer IP
+    ok, _, erro = autenticacao.autenticar(usuario, SENHA, "198.51.100.1")
+    assert not ok and erro.startswith("Muitas tentativas.")
+
+    # Janela vencida: as falhas antigas deixam de contar e o login certo zera o usuário
+    assert db.run_command(
+        "UPDATE tb_login_falhas SET momento = momento - make_interval(secs => %s) WHERE chave = %s",
+        (autenticacao.JANELA_FALHAS, chave),
+    )[0]
+    assert autenticacao.autenticar(usuario, SENHA, IP)[:2] == (True, "Teste")
+    assert db.run_query("SELECT 1 FROM tb_login_falhas WHERE chave = %s", (chave,)).empty
@@ -0,0 +1,83 @@
+"""Matrizes de utilização (minutos por sala x dia x turno) comparadas com a força bruta por minuto."""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from database import db_connection as db
+from database.utilizacao import _montar, mapa_dia_turno, resumo_por_sala
+
+def _dados(rng, qtd_salas=6, qtd_aulas=80):
+    salas = pd.DataFrame({
+        "id_sala": np.arange(1, qtd_salas + 1) * 10,
+        "nome": [f"Sala {i}" for i in range(qtd_salas)],
+        "capacidade": [rng.choice([0, 30, 50]) for _ in range(qtd_salas)],
+        "tipo": "Sala",
+    })
+    linhas = []
+    for id_aloc in range(1, qtd_aulas + 1):
+        inicio = rng.randrange(6 * 60, 22 * 60)
+        linhas.append((id_aloc, rng.randrange(1, qtd_salas + 2) * 10, rng.choice(list(db.MAP_DIAS) + ["Domingo"]),
+                       inicio, min(inicio + rng.choice([20, 100, 210, 400]), 24 * 60 - 1)))
+    aloc = pd.DataFrame(linhas, columns=["id_alocacao", "id_sala", "dia_semana", "inicio", "fim"])
+    turmas = pd.DataFrame({"id_turma": range(1, 11), "qtd_alunos": [rng.randrange(5, 45) for _ in range(10)]})
+    vinculos = pd.DataFrame(
+        [(id_aloc, id_turma) for id_aloc in aloc["id_alocacao"] for id_turma in rng.sample(range(1, 11), rng.randrange(0, 3))],
+        columns=["id_alocacao", "id_turma"],
+    )
+    return salas, aloc, vinculos, turmas
+
+@pytest.mark.parametrize("semente", range(10))
+def test_minutos_igual_forca_bruta(semente):
+    rng = random.Random(semente)
+    salas, aloc, vinculos, turmas = _dados(rng)
+    m = _montar(salas, aloc, vinculos, turmas)
+
+    # Um vetor de 1440 minutos por (sala, dia), marcado aula a aula
+    dias, turnos = list(db.MAP_DIAS), list(db.MAP_HORARIOS)
+    alunos_aula = vinculos.merge(turmas, on="id_turma").groupby("id_alocacao")["qtd_alunos"].sum()
+    ocupado = np.zeros((len(salas), len(dias), 24 * 60), dtype=bool)
+    alunos_min = np.zeros((len(salas), len(dias), 24 * 60))
+    aulas, sobrepostas = np.zeros(len(salas), int), np.zeros(len(salas), int)
+    posicao = {id_sala: i for i, id_sala in enumerate(salas["id_sala"])}
+    for id_aloc, id_sala, dia, inicio, fim in aloc.itertuples(index=False):
+        if id_sala not in posicao or dia not in db.MAP_DIAS:
+            continue
+        s, d = posicao[id_sala], db.MAP_DIAS[dia]
+        aulas[s] += 1
+        outras = aloc[(aloc.id_sala == id_sala) & (aloc.dia_semana == dia) & (aloc.id_alocacao != id_aloc)]
+        # Sobreposta: começa depois (ou junto, com desempate) de outra aula ainda em andamento
+        anteriores = outras[(outras.inicio < inicio) | ((outras.inicio == inicio) & (
+            (outras.fim < fim) | ((outras.fim == fim) & (outras.id_alocacao < id_aloc))))]
+        sobrepostas[s] += bool((anteriores.fim > inicio).any())
+        ocupado[s, d, inicio:fim] = True
+        alunos_min[s, d, inicio:fim] += alunos_aula.get(id_aloc, 0)
+
+    for t, turno in enumerate(turnos):
+        ini, fim = db.horario_do_turno(turno)
+        assert np.array_equal(m["minutos"][:, :, t], ocupado[:, :, ini:fim].sum(axis=2))
+        assert np.allclose(m["aluno_minutos"][:, :, t], alunos_min[:, :, ini:fim].sum(axis=2))
+    assert np.array_equal(m["aulas"], aulas)
+    assert np.array_equal(m["sobrepostas"], sobrepostas)
+    assert m["ocupacao"].max() <= 1.0
+
+def test_resumo_e_mapa():
+    salas = pd.DataFrame({"id_sala": [1, 2], "nome": ["A", "B"], "capacidade": [40, 20], "tipo": "Sala"})
+    inicio, fim = db.horario_do_turno("Matutino")
+    aloc = pd.DataFrame(
+        [(1, 1, "Segunda", inicio, fim), (2, 1, "Segunda", inicio, fim)],  # Duas aulas na mesma janela
+        columns=["id_alocacao", "id_sala", "dia_semana", "inicio", "fim"],
+    )
+    vinculos = pd.DataFrame({"id_alocacao": [1, 2], "id_turma": [1, 1]})
+    turmas = pd.DataFrame({"id_turma": [1], "qtd_alunos": [20]})
+    m = _montar(salas, aloc, vinculos, turmas)
+
+    resumo = resumo_por_sala(m)
+    assert resumo["aulas"].tolist() == [2, 0]
+    assert resumo["conflitos"].tolist() == [1, 0]
+    assert resumo["uso_pct"].tolist() == [round(100 * (fim - inicio) / m["janela"].sum() / len(db.MAP_DIAS), 1), 0.0]
+    assert resumo["preenchimento_pct"].tolist() == [100.0, 0.0]  # 40 alunos em 40 lugares nos minutos em uso
+    mapa = mapa_dia_turno(m)
+    assert mapa.loc["Segunda", "Matutino"] == 50.0  # Uma das duas salas, com a janela inteira
+    assert mapa.to_numpy().sum() == 50.0
@@ -0,0 +1,89 @@
+"""Auditoria da grade (varredura por grupo) comparada com a força bruta, sem banco."""
+import random
+from collections import defaultdict
+
+import pytest
+
+from database import db_connection as db
+from database.validacao import total_violacoes, validar
+
+DIAS = list(db.MAP_DIAS)
+
+def _grade_aleatoria(rng, qtd=120):
+    alocacoes, vinculos = [], []
+    for id_aloc in range(1, qtd + 1):
+        inicio = rng.randrange(7 * 60, 22 * 60)
+        fim = inicio + rng.choice([30, 100, 210])
+        id_sala, id_docente = rng.randrange(10), rng.randrange(15)
+        capacidade = rng.choice([30, 40, 60])
+        alocacoes.append((id_aloc, rng.choice(DIAS), inicio, fim, id_sala, f"Sala {id_sala}", capacidade,
+                          id_docente, f"Docente {id_docente}"))
+        for id_turma in rng.sample(range(20), rng.randrange(1, 3)):
+            vinculos.append((id_aloc, id_turma, f"T{id_turma}", rng.randrange(10, 40)))
+    return alocacoes, vinculos
+
+def _blocos_forca_bruta(aulas):
+    """
+    (dia, recurso, aulas) ligadas por sobreposição, direta ou encadeada: compara
+    todos os pares de cada (dia, recurso) e junta os componentes conexos.
+    """
+    grupos = defaultdict(list)
+    for id_aloc, dia, inicio, fim, recurso in aulas:
+        grupos[(dia, recurso)].append((id_aloc, inicio, fim))
+
+    blocos = set()
+    for (dia, recurso), itens in grupos.items():
+        vizinhos = defaultdict(set)
+        for i, (id_a, ini_a, fim_a) in enumerate(itens):
+            for id_b, ini_b, fim_b in itens[i + 1:]:
+                if ini_a < fim_b and ini_b < fim_a:
+                    vizinhos[id_a].add(id_b)
+                    vizinhos[id_b].add(id_a)
+        vistos = set()
+        for inicio in vizinhos:
+            if inicio in vistos:
+                continue
+            pilha, bloco = [inicio], set()
+            while pilha:
+                atual = pilha.pop()
+                if atual not in bloco:
+                    bloco.add(atual)
+                    pilha.extend(vizinhos[atual] - bloco)
+            vistos |= bloco
+            blocos.add((dia, recurso, frozenset(bloco)))
+    return blocos
+
+@pytest.mark.parametrize("semente", range(15))
+def test_choques_igual_forca_bruta(semente):
+    rng = random.Random(semente)
+    alocacoes, vinculos = _grade_aleatoria(rng)
+    relatorio = validar(alocacoes, vinculos)
+
+    por_sala = [(a[0], a[1], a[2], a[3], a[4]) for a in alocacoes]
+    por_docente = [(a[0], a[1], a[2], a[3], a[7]) for a in alocacoes]
+    horario = {a[0]: a[1:4] for a in alocacoes}
+    por_turma = [(id_aloc, *horario[id_aloc], id_turma) for id_aloc, id_turma, _, _ in vinculos]
+
+    for tipo, aulas in (("sala", por_sala), ("docente", por_docente), ("turma", por_turma)):
+        blocos = {(v["dia_semana"], v["id"], frozenset(v["alocacoes"])) for v in relatorio["violacoes"][tipo]}
+        assert blocos == _blocos_forca_bruta(aulas), tipo
+
+def test_bloco_encadeado_e_horario_coberto():
+    # A cruza B e B cruza C, mas A não cruza C: um único bloco de 08:00 a 12:00
+    alocacoes = [
+        (1, "Segunda", 480, 600, 1, "Sala 1", 40, 1, "Ana"),
+        (2, "Segunda", 570, 690, 1, "Sala 1", 40, 2, "Bia"),
+        (3, "Segunda", 660, 720, 1, "Sala 1", 40, 3, "Caio"),
+        (4, "Segunda", 720, 780, 1, "Sala 1", 40, 4, "Duda"),  # Começa quando a 3 termina
+        (5, "Terca", 480, 600, 1, "Sala 1", 40, 1, "Ana"),
+    ]
+    relatorio = validar(alocacoes, [])
+    assert [(v["alocacoes"], v["horario"]) for v in relatorio["violacoes"]["sala"]] == [([1, 2, 3], "08:00-12:00")]
+    assert relatorio["violacoes"]["docente"] == []
+
+def test_lotacao():
+    alocacoes = [(1, "Segunda", 480, 600, 1, "Sala 1", 40, 1, "Ana"), (2, "Terca", 480, 600, 1, "Sala 1", 40, 1, "Ana")]
+    vinculos = [(1, 10, "T10", 30), (1, 11, "T11", 15), (2, 10, "T10", 30), (99, 12, "T12", 50)]
+    relatorio = validar(alocacoes, vinculos)
+    assert [(v["alocacoes"], v["detalhe"]) for v in relatorio["violacoes"]["lotacao"]] == [([1], "45 alunos para 40 lugares")]
+    assert total_violacoes(relatorio) == 1